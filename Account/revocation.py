@@ -0,0 +1,150 @@
+# Account/revocation.py
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, func, or_
+
+from extensions import db
+from Models.token_blacklist import TokenBlacklist
+
+# Marge de relecture sous le filigrane : un id attribué avant un autre peut être validé après lui
+WATERMARK_OVERLAP = 100
+
+
+class RevokedTokenCache:
+    """Ensemble local (par processus) des JTI révoqués, rafraîchi de manière incrémentale depuis token_blacklist.
+
+    Une réponse négative ne touche pas la base : la table n'est relue que toutes les
+    TOKEN_REVOCATION_REFRESH_SECONDS secondes (staleness maximale pour les autres workers).
+    """
+
+    def __init__(self):
+        self.app = None
+        self._revoked = {}  # jti -> date à partir de laquelle l'entrée peut être oubliée
+        self._watermark = None
+        self._last_refresh = 0.0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        self.refresh_interval = app.config['TOKEN_REVOCATION_REFRESH_SECONDS']
+        self.prune_interval = app.config['TOKEN_BLACKLIST_PRUNE_INTERVAL_SECONDS']
+        self.prune_batch_size = app.config['TOKEN_BLACKLIST_PRUNE_BATCH_SIZE']
+        # Un JTI révoqué n'a plus besoin d'être mémorisé une fois le token expiré
+        expires = app.config.get('JWT_ACCESS_TOKEN_EXPIRES', timedelta(minutes=15))
+        self.ttl = expires if isinstance(expires, timedelta) else (timedelta(seconds=expires) if expires else None)
+        app.extensions['revoked_tokens'] = self
+        if self.prune_interval:
+            self._start_prune_timer()
+
+    def is_revoked(self, jti):
+        self._refresh_if_stale()
+        with self._lock:
+            return jti in self._revoked
+
+    def revoke(self, jti, expires_at=None):
+        """Enregistre la révocation en base et la rend visible immédiatement dans ce processus."""
+        revoked_at = datetime.utcnow()
+        blacklisted_token = TokenBlacklist(jti=jti, created_at=revoked_at, expires_at=expires_at)
+        db.session.add(blacklisted_token)
+        db.session.commit()
+        self._add(jti, revoked_at, expires_at)
+        return blacklisted_token
+
+    def prune(self, batch_size=None, max_batches=None):
+        """Supprime par lots les révocations de tokens qui ne peuvent plus être validés."""
+        batch_size = batch_size or self.prune_batch_size
+        now = datetime.utcnow()
+        expired = TokenBlacklist.expires_at < now
+        if self.ttl:
+            # Lignes antérieures à l'enregistrement de exp : le token a expiré au plus tard created_at + durée de vie
+            expired = or_(expired, and_(TokenBlacklist.expires_at.is_(None), TokenBlacklist.created_at < now - self.ttl))
+        deleted = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            ids = [row[0] for row in db.session.query(TokenBlacklist.id).filter(expired).limit(batch_size).all()]
+            if not ids:
+                break
+            db.session.query(TokenBlacklist).filter(TokenBlacklist.id.in_(ids)).delete(synchronize_session=False)
+            db.session.commit()
+            deleted += len(ids)
+            batches += 1
+            if len(ids) < batch_size:
+                break
+        return deleted
+
+    def clear(self):
+        with self._lock:
+            self._revoked.clear()
+            self._watermark = None
+            self._last_refresh = 0.0
+
+    def _add(self, jti, revoked_at, expires_at=None):
+        forget_after = expires_at or (revoked_at + self.ttl if self.ttl and revoked_at else None)
+        with self._lock:
+            self._revoked[jti] = forget_after
+
+    def _refresh_if_stale(self):
+        if time.monotonic() - self._last_refresh < self.refresh_interval:
+            return
+        # Un seul thread rafraîchit ; les autres répondent avec l'état courant
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            query = db.session.query(
+                TokenBlacklist.id, TokenBlacklist.jti, TokenBlacklist.created_at, TokenBlacklist.expires_at
+            )
+            if self._watermark is None:
+                # Chargement initial : seules les révocations de tokens encore valides sont utiles
+                watermark = db.session.query(func.max(TokenBlacklist.id)).scalar() or 0
+                now = datetime.utcnow()
+                still_valid = TokenBlacklist.expires_at >= now
+                if self.ttl:
+                    still_valid = or_(still_valid, and_(
+                        TokenBlacklist.expires_at.is_(None), TokenBlacklist.created_at >= now - self.ttl
+                    ))
+                else:
+                    still_valid = or_(still_valid, TokenBlacklist.expires_at.is_(None))
+                query = query.filter(still_valid)
+            else:
+                watermark = self._watermark
+                query = query.filter(TokenBlacklist.id > self._watermark - WATERMARK_OVERLAP)
+            rows = query.order_by(TokenBlacklist.id).all()
+            for _, jti, created_at, expires_at in rows:
+                self._add(jti, created_at, expires_at)
+            self._watermark = max([watermark] + [row[0] for row in rows[-1:]])
+            self._evict_expired()
+            self._last_refresh = time.monotonic()
+        except Exception as e:
+            # En cas d'erreur, l'ensemble courant reste utilisé et la relecture est retentée à la prochaine requête
+            self.app.logger.error(f"Erreur lors du rafraîchissement des tokens révoqués : {e}")
+            db.session.rollback()
+        finally:
+            self._refresh_lock.release()
+
+    def _start_prune_timer(self):
+        def run():
+            while not stop.wait(self.prune_interval):
+                with self.app.app_context():
+                    try:
+                        deleted = self.prune()
+                        if deleted:
+                            self.app.logger.info(f"{deleted} tokens expirés supprimés de token_blacklist")
+                    except Exception as e:
+                        db.session.rollback()
+                        self.app.logger.error(f"Erreur lors de la purge de token_blacklist : {e}")
+
+        stop = threading.Event()
+        threading.Thread(target=run, name='token-blacklist-prune', daemon=True).start()
+
+    def _evict_expired(self):
+        now = datetime.utcnow()
+        with self._lock:
+            expired = [jti for jti, forget_after in self._revoked.items() if forget_after and forget_after < now]
+            for jti in expired:
+                del self._revoked[jti]
+
+
+revoked_tokens = RevokedTokenCache()
@@ -0,0 +1,93 @@
+# Account/roles.py
+import threading
+from functools import wraps
+
+from flask_restx import abort
+from flask_jwt_extended import get_jwt, get_jwt_identity, verify_jwt_in_request
+
+from Account.models import Account
+from Models.version_counter import CachedVersion
+
+ROLE_SUPER_ADMIN = 'super_admin'
+ROLE_ADMIN = 'admin'
+
+# Incrémenté à chaque changement de is_admin/is_superuser : invalide les claims des tokens déjà émis.
+# Relu au plus toutes les 5 secondes, ce qui borne le délai de prise en compte dans les autres workers.
+role_version = CachedVersion('account_roles', refresh_seconds=5)
+
+# (id, rôle) relus en base pour les tokens dont les claims sont périmés, par (identifiant, version)
+_checked_roles = {}
+_checked_roles_lock = threading.Lock()
+
+
+def account_role(account):
+    if account.is_superuser:
+        return ROLE_SUPER_ADMIN
+    if account.is_admin:
+        return ROLE_ADMIN
+    return None
+
+
+def role_claims(account):
+    """Claims ajoutés aux tokens admin : l'autorisation se fait ensuite sans requête sur accounts_account."""
+    return {
+        'account_id': account.id,
+        'role': account_role(account),
+        'role_version': role_version.get()
+    }
+
+
+def bump_role_version():
+    """À appeler après toute modification de is_admin/is_superuser."""
+    role_version.bump()
+    with _checked_roles_lock:
+        _checked_roles.clear()
+
+
+def current_role():
+    claims = get_jwt()
+    version = role_version.get()
+    if 'role' in claims and claims.get('role_version') == version:
+        return claims['role']
+    # Token sans claims de rôle, ou émis avant un changement de rôles : vérification en base
+    return _checked_account(version)[1]
+
+
+def current_account_id():
+    claims = get_jwt()
+    if 'account_id' in claims:
+        return claims['account_id']
+    return _checked_account(role_version.get())[0]
+
+
+def _checked_account(version):
+    key = (get_jwt_identity(), version)
+    with _checked_roles_lock:
+        if key in _checked_roles:
+            return _checked_roles[key]
+    account = Account.query.filter_by(identifiant=key[0]).first()
+    checked = (account.id, account_role(account)) if account else (None, None)
+    with _checked_roles_lock:
+        if len(_checked_roles) > 10000:
+            _checked_roles.clear()
+        _checked_roles[key] = checked
+    return checked
+
+
+def admin_required(message="Accès interdit", superuser=False):
+    """Remplace @jwt_required() sur les ressources admin : vérifie le JWT puis le rôle."""
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            verify_jwt_in_request()
+            role = current_role()
+            allowed = role == ROLE_SUPER_ADMIN if superuser else role in (ROLE_ADMIN, ROLE_SUPER_ADMIN)
+            if not allowed:
+                abort(403, message)
+            return fn(*args, **kwargs)
+        return decorator
+    return wrapper
+
+
+def superuser_required(message="Accès réservé aux super admins"):
+    return admin_required(message, superuser=True)
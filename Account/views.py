@@ -5,6 +5,7 @@ from flask_restx import Api, Resource, fields
 from flask_jwt_extended import create_access_token, get_jwt_identity, jwt_required
 from werkzeug.security import check_password_hash
 from Account.models import Account
+from Account.roles import role_claims, account_role
 from Models.referral import Referral
 from Customer.models import Customer
 from extensions import db
@@ -98,11 +99,12 @@ class AdminLogin(Resource):
                 current_app.logger.warning(f"Admin login failed: User {email} is not an admin")
                 return {"message": "User is not an admin"}, 403
 
-            access_token = create_access_token(identity=admin.identifiant)
+            # Les rôles sont portés par le token : les ressources admin n'ont plus à relire le compte
+            access_token = create_access_token(identity=admin.identifiant, additional_claims=role_claims(admin))
             current_app.logger.info(f"Admin {email} logged in successfully")
             return {
                 "access_token": access_token,
-                "role": "super_admin" if admin.is_superuser else "admin",
+                "role": account_role(admin),
                 "name": f"{admin.first_name} {admin.last_name}",
                 "email": admin.email
             }, 200
@@ -1,7 +1,7 @@
 # admin/resources/admin.py (corrigé)
 from flask_restx import Resource, fields
-from flask_jwt_extended import jwt_required, get_jwt_identity
 from Account.models import Account
+from Account.roles import admin_required
 from Admin.views import api  # Correction de "Admin" à "admin"
 
 admin_model = api.model('Admin', {
@@ -15,13 +15,9 @@ admin_model = api.model('Admin', {
 })
 
 class AdminList(Resource):
-    @jwt_required()
+    @admin_required("Accès interdit")
     @api.marshal_with(admin_model, as_list=True)
     def get(self):
-        user_id = get_jwt_identity()  # Retourne 'identifiant' (ex: 'superadmin_001')
-        user = Account.query.filter_by(identifiant=user_id).first()
-        if not user or not (user.is_admin or user.is_superuser):
-            api.abort(403, "Accès interdit")
         admins = Account.query.filter((Account.is_admin == True) | (Account.is_superuser == True)).all()
         return [{
             'id': admin.id,
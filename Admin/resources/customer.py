@@ -1,8 +1,7 @@
 # admin/resources/customer.py
 from flask_restx import Resource, fields
-from flask_jwt_extended import jwt_required, get_jwt_identity
 from Customer.models import Customer
-from Account.models import Account
+from Account.roles import admin_required
 from Admin.views import api
 
 customer_model = api.model('Customer', {
@@ -19,13 +18,9 @@ customer_model = api.model('Customer', {
 })
 
 class CustomerList(Resource):
-    @jwt_required()
+    @admin_required("Accès interdit")
     @api.marshal_with(customer_model, as_list=True)
     def get(self):
-        user_id = get_jwt_identity()
-        user = Account.query.filter_by(identifiant=user_id).first()
-        if not user or not (user.is_admin or user.is_superuser):
-            api.abort(403, "Accès interdit")
         customers = Customer.query.all()
         return [{
             'id': customer.id,
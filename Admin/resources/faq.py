@@ -1,8 +1,7 @@
 # admin/resources/faq.py (adapté)
 from flask_restx import Resource, fields
-from flask_jwt_extended import jwt_required, get_jwt_identity
 from Faq.models import FAQ
-from Account.models import Account
+from Account.roles import admin_required, superuser_required
 from extensions import db
 from Admin.views import api  # Correction de "Admin" à "admin"
 from flask import request
@@ -19,24 +18,16 @@ faq_input_model = api.model('FAQInput', {
 })
 
 class FAQList(Resource):
-    @jwt_required()
+    @admin_required("Accès interdit")
     @api.marshal_with(faq_model, as_list=True)
     def get(self):
-        user_id = get_jwt_identity()  # Retourne 'identifiant' (ex: 'superadmin_001')
-        user = Account.query.filter_by(identifiant=user_id).first()
-        if not user or not (user.is_admin or user.is_superuser):
-            api.abort(403, "Accès interdit")
         faqs = FAQ.query.all()
         return [faq.to_dict() for faq in faqs]
 
-    @jwt_required()
+    @superuser_required("Seuls les super admins peuvent créer des FAQs")
     @api.expect(faq_input_model)
     @api.marshal_with(faq_model, code=201)
     def post(self):
-        user_id = get_jwt_identity()  # Retourne 'identifiant' (ex: 'superadmin_001')
-        user = Account.query.filter_by(identifiant=user_id).first()
-        if not user or not user.is_superuser:
-            api.abort(403, "Seuls les super admins peuvent créer des FAQs")
         data = request.get_json()
         faq = FAQ(question=data['question'], answer=data['answer'])
         db.session.add(faq)
@@ -44,24 +35,16 @@ class FAQList(Resource):
         return faq.to_dict()
 
 class FAQDetail(Resource):
-    @jwt_required()
+    @admin_required("Accès interdit")
     @api.marshal_with(faq_model)
     def get(self, faq_id):
-        user_id = get_jwt_identity()  # Retourne 'identifiant' (ex: 'superadmin_001')
-        user = Account.query.filter_by(identifiant=user_id).first()
-        if not user or not (user.is_admin or user.is_superuser):
-            api.abort(403, "Accès interdit")
         faq = FAQ.query.get_or_404(faq_id)
         return faq.to_dict()
 
-    @jwt_required()
+    @superuser_required("Seuls les super admins peuvent modifier des FAQs")
     @api.expect(faq_input_model)
     @api.marshal_with(faq_model)
     def put(self, faq_id):
-        user_id = get_jwt_identity()  # Retourne 'identifiant' (ex: 'superadmin_001')
-        user = Account.query.filter_by(identifiant=user_id).first()
-        if not user or not user.is_superuser:
-            api.abort(403, "Seuls les super admins peuvent modifier des FAQs")
         faq = FAQ.query.get_or_404(faq_id)
         data = request.get_json()
         faq.question = data['question']
@@ -69,12 +52,8 @@ class FAQDetail(Resource):
         db.session.commit()
         return faq.to_dict()
 
-    @jwt_required()
+    @superuser_required("Seuls les super admins peuvent supprimer des FAQs")
     def delete(self, faq_id):
-        user_id = get_jwt_identity()  # Retourne 'identifiant' (ex: 'superadmin_001')
-        user = Account.query.filter_by(identifiant=user_id).first()
-        if not user or not user.is_superuser:
-            api.abort(403, "Seuls les super admins peuvent supprimer des FAQs")
         faq = FAQ.query.get_or_404(faq_id)
         db.session.delete(faq)
         db.session.commit()
@@ -1,10 +1,10 @@
 # admin/resources/logout.py
 from flask_restx import Resource, fields
-from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
-from Account.models import Account
-from Models.token_blacklist import TokenBlacklist
-from extensions import db
+from flask_jwt_extended import get_jwt_identity, get_jwt
+from Account.roles import admin_required
+from Account.revocation import revoked_tokens
 from flask import current_app
+from datetime import datetime
 from Admin.views import api  # Importer l'instance 'api' depuis views.py
 
 logout_response_model = api.model('LogoutResponse', {
@@ -12,18 +12,15 @@ logout_response_model = api.model('LogoutResponse', {
 })
 
 class AdminLogout(Resource):
-    @jwt_required()
+    @admin_required("Utilisateur non autorisé")
     @api.marshal_with(logout_response_model)
     def post(self):
         admin_identifiant = get_jwt_identity()
-        admin = Account.query.filter_by(identifiant=admin_identifiant).first()
-        if not admin or not (admin.is_admin or admin.is_superuser):
-            return {"msg": "Utilisateur non autorisé"}, 403
         try:
-            jti = get_jwt()['jti']
-            blacklisted_token = TokenBlacklist(jti=jti)
-            db.session.add(blacklisted_token)
-            db.session.commit()
+            claims = get_jwt()
+            jti = claims['jti']
+            expires_at = datetime.utcfromtimestamp(claims['exp']) if 'exp' in claims else None
+            revoked_tokens.revoke(jti, expires_at)
             current_app.logger.info(f"Admin {admin_identifiant} logged out successfully, token JTI {jti} blacklisted")
             return {"msg": "Déconnexion réussie"}, 200
         except Exception as e:
@@ -1,33 +1,143 @@
 # admin/resources/notifications.py
+from flask import current_app, request
 from flask_restx import Resource, fields
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from Account.models import Account
-from Lot.models import Notification
+from Account.roles import admin_required, current_account_id, superuser_required
+from Category.tiers import tier_table
+from Lot.broadcast import create_broadcast, serialize_broadcast, start_broadcast
+from Lot.models import NotificationBroadcast
+from Lot.notifications import mark_read, notifications_page, serialize_notification, unread_count
+from pubsub import ADMINS_CHANNEL, event_broker, sse_response, user_channel
+from extensions import db
+from pagination import page_size
 from Admin.views import api
 
 notification_model = api.model('Notification', {
     'id': fields.Integer(description='Notification ID'),
     'message': fields.String(description='Notification message'),
-    'created_at': fields.String(description='Creation date')
+    'created_at': fields.String(description='Creation date'),
+    'is_read': fields.Boolean(description='Read by the admin'),
+    'read_at': fields.String(description='Read date')
 })
 
 notifications_response_model = api.model('NotificationsResponse', {
     'msg': fields.String(description='Success message'),
-    'notifications': fields.List(fields.Nested(notification_model), description='List of notifications')
+    'notifications': fields.List(fields.Nested(notification_model), description='List of notifications'),
+    'unread_count': fields.Integer(description='Number of unread notifications'),
+    'limit': fields.Integer(description='Page size'),
+    'has_more': fields.Boolean(description='More notifications are available'),
+    'next_cursor': fields.String(description='Cursor of the next page (null on the last page)')
+})
+
+unread_count_model = api.model('UnreadCount', {
+    'unread_count': fields.Integer(description='Number of unread notifications')
+})
+
+mark_read_response_model = api.model('MarkNotificationsReadResponse', {
+    'msg': fields.String(description='Success message'),
+    'marked': fields.Integer(description='Notifications marked as read'),
+    'unread_count': fields.Integer(description='Number of unread notifications')
+})
+
+broadcast_input_model = api.model('NotificationBroadcastInput', {
+    'message': fields.String(required=True, description='Notification message'),
+    'categories': fields.List(fields.String, description='Target customer categories (all customers if omitted)')
+})
+
+broadcast_model = api.model('NotificationBroadcast', {
+    'id': fields.Integer(description='Broadcast ID'),
+    'message': fields.String(description='Notification message'),
+    'categories': fields.List(fields.String, description='Target customer categories (null for all customers)'),
+    'status': fields.String(description='pending, running, completed or failed'),
+    'total': fields.Integer(description='Number of recipients'),
+    'sent': fields.Integer(description='Notifications inserted so far'),
+    'progress': fields.Float(description='Progress percentage'),
+    'error': fields.String(description='Error of a failed broadcast'),
+    'created_at': fields.String(description='Creation date'),
+    'started_at': fields.String(description='Start date'),
+    'finished_at': fields.String(description='End date')
 })
 
 class AdminNotifications(Resource):
-    @jwt_required()
+    @admin_required("Utilisateur non autorisé")
     @api.marshal_with(notifications_response_model)
     def get(self):
-        admin_identifiant = get_jwt_identity()
-        admin = Account.query.filter_by(identifiant=admin_identifiant).first()
-        if not admin or not (admin.is_admin or admin.is_superuser):
-            return {"msg": "Utilisateur non autorisé"}, 403
-        notifications = Notification.query.filter_by(user_id=admin.id).order_by(Notification.created_at.desc()).all()
-        notifications_data = [{
-            'id': notification.id,
-            'message': notification.message,
-            'created_at': str(notification.created_at) if notification.created_at else "Unknown"
-        } for notification in notifications]
-        return {'msg': 'Notifications récupérées avec succès', 'notifications': notifications_data}
\ No newline at end of file
+        account_id = current_account_id()
+        limit = page_size(
+            request.args.get('limit'),
+            current_app.config['NOTIFICATIONS_PAGE_SIZE'],
+            current_app.config['NOTIFICATIONS_PAGE_SIZE_MAX']
+        )
+        try:
+            notifications, next_cursor = notifications_page(account_id, request.args.get('cursor'), limit)
+        except ValueError as e:
+            return {'msg': str(e)}, 400
+        return {
+            'msg': 'Notifications récupérées avec succès',
+            'notifications': [serialize_notification(notification) for notification in notifications],
+            'unread_count': unread_count(account_id),
+            'limit': limit,
+            'has_more': next_cursor is not None,
+            'next_cursor': next_cursor
+        }
+
+class AdminEvents(Resource):
+    @admin_required("Utilisateur non autorisé")
+    def get(self):
+        """Flux SSE : notifications de l'admin, nouvelles commandes et changements de statut."""
+        subscription = event_broker.subscribe([user_channel(current_account_id()), ADMINS_CHANNEL])
+        return sse_response(
+            subscription,
+            heartbeat=current_app.config['EVENTS_HEARTBEAT_SECONDS'],
+            max_seconds=current_app.config['EVENTS_STREAM_MAX_SECONDS']
+        )
+
+class AdminBroadcasts(Resource):
+    @admin_required("Utilisateur non autorisé")
+    @api.marshal_with(broadcast_model, as_list=True, envelope='broadcasts')
+    def get(self):
+        broadcasts = NotificationBroadcast.query.order_by(NotificationBroadcast.id.desc()).limit(50).all()
+        return [serialize_broadcast(broadcast) for broadcast in broadcasts]
+
+    @superuser_required("Seuls les super admins peuvent envoyer des notifications groupées")
+    @api.expect(broadcast_input_model)
+    @api.marshal_with(broadcast_model, code=202)
+    def post(self):
+        data = request.get_json(silent=True) or {}
+        message = (data.get('message') or '').strip()
+        if not message:
+            return {'msg': 'Le message est requis'}, 400
+        categories = data.get('categories')
+        if categories is not None:
+            known = {tier.name for tier in tier_table().tiers}
+            if not isinstance(categories, list) or not categories or not all(c in known for c in categories):
+                return {'msg': f"categories doit être une liste non vide parmi : {', '.join(sorted(known))}"}, 400
+        broadcast = create_broadcast(message, categories, created_by=current_account_id())
+        db.session.commit()
+        # Insertion par tranches dans un thread : la réponse n'attend pas l'envoi, suivi via GET /notifications/broadcasts/<id>
+        start_broadcast(current_app._get_current_object(), broadcast.id)
+        return serialize_broadcast(broadcast), 202
+
+class AdminBroadcastDetail(Resource):
+    @admin_required("Utilisateur non autorisé")
+    @api.marshal_with(broadcast_model)
+    def get(self, broadcast_id):
+        broadcast = NotificationBroadcast.query.get_or_404(broadcast_id)
+        return serialize_broadcast(broadcast)
+
+class AdminUnreadNotifications(Resource):
+    @admin_required("Utilisateur non autorisé")
+    @api.marshal_with(unread_count_model)
+    def get(self):
+        return {'unread_count': unread_count(current_account_id())}
+
+class AdminReadNotifications(Resource):
+    @admin_required("Utilisateur non autorisé")
+    @api.marshal_with(mark_read_response_model)
+    def post(self):
+        account_id = current_account_id()
+        ids = (request.get_json(silent=True) or {}).get('ids')
+        if ids is not None and (not isinstance(ids, list) or not all(isinstance(i, int) for i in ids)):
+            return {'msg': "ids doit être une liste d'identifiants de notifications"}, 400
+        marked = mark_read(account_id, ids)
+        db.session.commit()
+        return {'msg': 'Notifications marquées comme lues', 'marked': marked, 'unread_count': unread_count(account_id)}
@@ -1,11 +1,12 @@
 # admin/resources/orders.py
 from flask_restx import Resource, fields
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from Account.models import Account
+from Account.roles import admin_required, superuser_required, current_account_id
 from Lot.models import Notification, Order, Recompense, CartItem, Stock
 from Customer.models import Customer
+from Category.tiers import detect_tier_changes, tier_change_message, tier_table
 from extensions import db
 from Admin.views import api
+from Monitoring.query_counter import query_budget
 
 order_model = api.model('Order', {
     'id': fields.String(description='Order ID'),
@@ -32,27 +33,34 @@ order_update_response_model = api.model('OrderUpdateResponse', {
     'status': fields.String(description='Updated order status')
 })
 
+def _cart_items_by_user(user_ids):
+    """Articles de panier (avec leur récompense) des utilisateurs donnés, en une seule requête jointe."""
+    items_by_user = {user_id: [] for user_id in user_ids}
+    if not items_by_user:
+        return items_by_user
+    rows = db.session.query(CartItem.user_id, CartItem.quantity, Recompense.id, Recompense.libelle) \
+        .join(Recompense, Recompense.id == CartItem.reward_id) \
+        .filter(CartItem.user_id.in_(items_by_user)) \
+        .order_by(CartItem.id) \
+        .all()
+    for user_id, quantity, reward_id, libelle in rows:
+        items_by_user[user_id].append({
+            'reward_id': reward_id,
+            'libelle': libelle,
+            'quantity': quantity
+        })
+    return items_by_user
+
 class AdminOrders(Resource):
-    @jwt_required()
+    @query_budget(6)
+    @admin_required("Utilisateur non autorisé")
     @api.marshal_with(orders_response_model)
     def get(self):
-        admin_identifiant = get_jwt_identity()
-        admin = Account.query.filter_by(identifiant=admin_identifiant).first()
-        if not admin or not (admin.is_admin or admin.is_superuser):
-            return {"msg": "Utilisateur non autorisé"}, 403
         orders = Order.query.all()
+        items_by_user = _cart_items_by_user({order.user_id for order in orders})
         orders_data = []
         for order in orders:
-            cart_items = CartItem.query.filter_by(user_id=order.user_id).all()
-            items_data = []
-            for item in cart_items:
-                reward = Recompense.query.get(item.reward_id)
-                if reward:
-                    items_data.append({
-                        'reward_id': reward.id,
-                        'libelle': reward.libelle,
-                        'quantity': item.quantity
-                    })
+            items_data = items_by_user[order.user_id]
             orders_data.append({
                 'id': str(order.id),
                 'user_id': order.user_id,
@@ -66,26 +74,13 @@ class AdminOrders(Resource):
         return {'msg': 'Commandes récupérées avec succès', 'orders': orders_data}
 
 class AdminOrderDetail(Resource):
-    @jwt_required()
+    @admin_required("Utilisateur non autorisé")
     @api.marshal_with(order_model)
     def get(self, order_id):
-        admin_identifiant = get_jwt_identity()
-        admin = Account.query.filter_by(identifiant=admin_identifiant).first()
-        if not admin or not (admin.is_admin or admin.is_superuser):
-            return {"msg": "Utilisateur non autorisé"}, 403
         order = Order.query.get(order_id)
         if not order:
             return {"msg": "Commande non trouvée"}, 404
-        cart_items = CartItem.query.filter_by(user_id=order.user_id).all()
-        items_data = []
-        for item in cart_items:
-            reward = Recompense.query.get(item.reward_id)
-            if reward:
-                items_data.append({
-                    'reward_id': reward.id,
-                    'libelle': reward.libelle,
-                    'quantity': item.quantity
-                })
+        items_data = _cart_items_by_user({order.user_id})[order.user_id]
         order_data = {
             'id': str(order.id),
             'user_id': order.user_id,
@@ -98,12 +93,8 @@ class AdminOrderDetail(Resource):
         }
         return order_data
 
-    @jwt_required()
+    @superuser_required("Seuls les super admins peuvent supprimer les commandes")
     def delete(self, order_id):
-        admin_identifiant = get_jwt_identity()
-        admin = Account.query.filter_by(identifiant=admin_identifiant).first()
-        if not admin or not admin.is_superuser:
-            return {"msg": "Seuls les super admins peuvent supprimer les commandes"}, 403
         order = Order.query.get(order_id)
         if not order:
             return {"msg": "Commande non trouvée"}, 404
@@ -112,13 +103,9 @@ class AdminOrderDetail(Resource):
         return {"msg": f"Commande {order_id} supprimée avec succès"}, 200
 
 class ValidateOrder(Resource):
-    @jwt_required()
+    @superuser_required("Seuls les super admins peuvent valider les commandes")
     @api.marshal_with(order_update_response_model)
     def put(self, order_id):
-        admin_identifiant = get_jwt_identity()
-        admin = Account.query.filter_by(identifiant=admin_identifiant).first()
-        if not admin or not admin.is_superuser:
-            return {"msg": "Seuls les super admins peuvent valider les commandes"}, 403
         order = Order.query.get(order_id)
         if not order:
             return {"msg": "Commande non trouvée"}, 404
@@ -127,15 +114,20 @@ class ValidateOrder(Resource):
         if order.status == 'validated':
             return {"msg": "La commande est déjà validée"}, 400
         cart_items = CartItem.query.filter_by(user_id=order.user_id).all()
+        reward_ids = {item.reward_id for item in cart_items}
+        # Stocks et récompenses du panier chargés en deux requêtes (le premier stock par récompense fait foi)
+        stocks = {}
+        for stock in Stock.query.filter(Stock.reward_id.in_(reward_ids)).order_by(Stock.id).all():
+            stocks.setdefault(stock.reward_id, stock)
+        rewards = {reward.id: reward for reward in Recompense.query.filter(Recompense.id.in_(reward_ids)).all()}
         for item in cart_items:
-            stock = Stock.query.filter_by(reward_id=item.reward_id).first()
+            stock = stocks.get(item.reward_id)
             if not stock or stock.quantity_available < item.quantity:
                 order.status = 'cancelled'
                 db.session.commit()
-                customer = Customer.query.get(order.customer_id)
-                reward = Recompense.query.get(item.reward_id)
+                reward = rewards.get(item.reward_id)
                 notification_user = Notification(user_id=order.user_id, message=f"Votre commande {order.id} a été annulée car l'article {reward.libelle} n'est pas disponible en stock.")
-                notification_admin = Notification(user_id=admin.id, message=f"La commande {order.id} a été annulée car l'article {reward.libelle} n'est pas disponible en stock.")
+                notification_admin = Notification(user_id=current_account_id(), message=f"La commande {order.id} a été annulée car l'article {reward.libelle} n'est pas disponible en stock.")
                 db.session.add_all([notification_user, notification_admin])
                 db.session.commit()
                 return {"msg": f"Commande {order_id} annulée car stock insuffisant", "status": order.status}, 200
@@ -146,25 +138,25 @@ class ValidateOrder(Resource):
         customer.solde -= order.amount
         customer.total = customer.solde
         for item in cart_items:
-            stock = Stock.query.filter_by(reward_id=item.reward_id).first()
-            stock.quantity_available -= item.quantity
+            stocks[item.reward_id].quantity_available -= item.quantity
         customer_name = f"{customer.first_name} {customer.short_name}"
         total_items = len(cart_items)
-        item_details = ", ".join([f"{item.quantity} x {Recompense.query.get(item.reward_id).libelle}" for item in cart_items])
+        item_details = ", ".join([f"{item.quantity} x {rewards[item.reward_id].libelle}" for item in cart_items])
         notification_user = Notification(user_id=order.user_id, message=f"Votre commande {order.id} de {total_items} article(s) ({item_details}) a été validée. Passez en agence pour la récupérer.")
-        notification_admin = Notification(user_id=admin.id, message=f"La commande {order.id} de {customer_name} pour {total_items} article(s) ({item_details}) a été validée.")
+        notification_admin = Notification(user_id=current_account_id(), message=f"La commande {order.id} de {customer_name} pour {total_items} article(s) ({item_details}) a été validée.")
         db.session.add_all([notification_user, notification_admin])
+        # Changement de palier dû au débit : signalé tout de suite (`flask recompute-tiers` couvre les soldes chargés en lot)
+        for change in detect_tier_changes(tier_table(), [(customer.customer_code, customer.category, customer.solde, order.user_id)]):
+            customer.category = change.current
+            if change.promoted is not None:
+                db.session.add(Notification(user_id=order.user_id, message=tier_change_message(change)))
         db.session.commit()
         return {"msg": f"Commande {order_id} validée avec succès", "status": order.status}
 
 class CancelOrder(Resource):
-    @jwt_required()
+    @superuser_required("Seuls les super admins peuvent annuler les commandes")
     @api.marshal_with(order_update_response_model)
     def put(self, order_id):
-        admin_identifiant = get_jwt_identity()
-        admin = Account.query.filter_by(identifiant=admin_identifiant).first()
-        if not admin or not admin.is_superuser:
-            return {"msg": "Seuls les super admins peuvent annuler les commandes"}, 403
         order = Order.query.get(order_id)
         if not order:
             return {"msg": "Commande non trouvée"}, 404
@@ -175,7 +167,7 @@ class CancelOrder(Resource):
         order.status = 'cancelled'
         customer = Customer.query.get(order.customer_id)
         notification_user = Notification(user_id=order.user_id, message=f"Votre commande {order.id} a été annulée.")
-        notification_admin = Notification(user_id=admin.id, message=f"La commande {order.id} a été annulée.")
+        notification_admin = Notification(user_id=current_account_id(), message=f"La commande {order.id} a été annulée.")
         db.session.add_all([notification_user, notification_admin])
         db.session.commit()
         return {"msg": f"Commande {order_id} annulée avec succès", "status": order.status}
\ No newline at end of file
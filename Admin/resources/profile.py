@@ -1,7 +1,8 @@
 # admin/resources/profile.py
 from flask_restx import Resource, fields
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import get_jwt_identity
 from Account.models import Account
+from Account.roles import admin_required
 from Admin.views import api
 
 admin_profile_model = api.model('AdminProfile', {
@@ -17,13 +18,14 @@ admin_profile_model = api.model('AdminProfile', {
 })
 
 class AdminProfile(Resource):
-    @jwt_required()
+    @admin_required("Accès interdit")
     @api.marshal_with(admin_profile_model)
     def get(self):
+        # Seule ressource admin qui a besoin du compte complet (données renvoyées)
         user_id = get_jwt_identity()
         user = Account.query.filter_by(identifiant=user_id).first()
-        if not (user.is_admin or user.is_superuser):
-            api.abort(403, "Accès interdit")
+        if not user:
+            api.abort(404, "Utilisateur non trouvé")
         return {
             'id': user.id,
             'first_name': user.first_name,
@@ -1,8 +1,7 @@
 # Admin/resources/referral.py
 from flask import request
 from flask_restx import Resource, fields
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from Account.models import Account
+from Account.roles import admin_required
 from Models.referral import Referral
 from Support.models import SupportRequest
 from extensions import db
@@ -25,18 +24,8 @@ update_status_model = {
 }
 
 class ReferralManagementResource(Resource):
-    @jwt_required()
+    @admin_required('Accès réservé aux administrateurs')
     def get(self):
-        # Récupérer l'utilisateur connecté
-        identifiant = get_jwt_identity()
-        admin = Account.query.filter_by(identifiant=identifiant).first()
-        if not admin:
-            return {'message': 'Utilisateur non trouvé'}, 404
-
-        # Vérifier si l'utilisateur est un admin ou super admin
-        if not (admin.is_admin or admin.is_superuser):
-            return {'message': 'Accès réservé aux administrateurs'}, 403
-
         # Récupérer tous les parrainages
         referrals = Referral.query.all()
         referral_data = [{
@@ -53,18 +42,8 @@ class ReferralManagementResource(Resource):
             'referrals': referral_data
         }, 200
 
-    @jwt_required()
+    @admin_required('Accès réservé aux administrateurs')
     def put(self, referral_id):
-        # Récupérer l'utilisateur connecté
-        identifiant = get_jwt_identity()
-        admin = Account.query.filter_by(identifiant=identifiant).first()
-        if not admin:
-            return {'message': 'Utilisateur non trouvé'}, 404
-
-        # Vérifier si l'utilisateur est un admin ou super admin
-        if not (admin.is_admin or admin.is_superuser):
-            return {'message': 'Accès réservé aux administrateurs'}, 403
-
         # Récupérer le parrainage
         referral = Referral.query.get(referral_id)
         if not referral:
@@ -81,18 +60,8 @@ class ReferralManagementResource(Resource):
 
         return {'message': 'Statut mis à jour avec succès'}, 200
 
-    @jwt_required()
+    @admin_required('Accès réservé aux administrateurs')
     def delete(self, referral_id):
-        # Récupérer l'utilisateur connecté
-        identifiant = get_jwt_identity()
-        admin = Account.query.filter_by(identifiant=identifiant).first()
-        if not admin:
-            return {'message': 'Utilisateur non trouvé'}, 404
-
-        # Vérifier si l'utilisateur est un admin ou super admin
-        if not (admin.is_admin or admin.is_superuser):
-            return {'message': 'Accès réservé aux administrateurs'}, 403
-
         # Récupérer le parrainage
         referral = Referral.query.get(referral_id)
         if not referral:
@@ -1,13 +1,15 @@
 # admin/resources/stats.py (corrigé complet)
 from flask_restx import Resource, fields
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from Account.models import Account
+from Account.roles import admin_required
 from Customer.models import Customer
 from Lot.models import Order, Recompense, order_items
-from Models.page_visit import PageVisit  # Ajoute l'importation
+from Models.page_visit_rollup import PageVisitRollup
+from Analytics.rollup import unique_users
+from Analytics.visit_buffer import visit_buffer
 from Admin.views import api
 from extensions import db
 from sqlalchemy.sql import desc
+from datetime import datetime, timedelta
 
 stats_model = api.model('Stats', {
     'total_customers': fields.Integer(description='Total Customers'),
@@ -16,17 +18,26 @@ stats_model = api.model('Stats', {
     'cancelled_orders': fields.Integer(description='Cancelled Orders'),
     'validated_orders': fields.Integer(description='Validated Orders'),
     'most_visited_pages': fields.String(description='Most Visited Pages'),
+    'unique_visitors_today': fields.Integer(description='Approximate distinct users today'),
+    'unique_visitors_7d': fields.Integer(description='Approximate distinct users over the last 7 days'),
     'most_purchased_reward': fields.String(description='Most Purchased Reward')
 })
 
+page_visit_queue_model = api.model('PageVisitQueueStats', {
+    'queue_depth': fields.Integer(description='Visites en attente d\'écriture'),
+    'queue_capacity': fields.Integer(description='Capacité maximale de la file'),
+    'overflow_policy': fields.String(description='Politique en cas de saturation (drop_new, drop_oldest, block)'),
+    'enqueued': fields.Integer(description='Visites mises en file'),
+    'written': fields.Integer(description='Visites écrites en base'),
+    'dropped': fields.Integer(description='Visites abandonnées (file saturée)'),
+    'failed': fields.Integer(description='Visites perdues suite à une erreur d\'écriture'),
+    'batches': fields.Integer(description='Lots écrits')
+})
+
 class Stats(Resource):
-    @jwt_required()
+    @admin_required("Accès interdit")
     @api.marshal_with(stats_model)
     def get(self):
-        user_id = get_jwt_identity()
-        user = Account.query.filter_by(identifiant=user_id).first()
-        if not user or not (user.is_admin or user.is_superuser):
-            api.abort(403, "Accès interdit")
         total_customers = Customer.query.count()
         top_customer = Customer.query.order_by(Customer.solde.desc()).first()
         top_customer_tokens = f"{top_customer.first_name} {top_customer.short_name} ({top_customer.solde} tokens)" if top_customer else "N/A"
@@ -34,12 +45,18 @@ class Stats(Resource):
         cancelled_orders = Order.query.filter_by(status='cancelled').count()
         validated_orders = Order.query.filter_by(status='validated').count()
         # Récupérer les pages les plus visitées (limité aux 3 premières)
-        most_visited = db.session.query(PageVisit.path, db.func.count(PageVisit.path).label('visit_count')) \
-            .group_by(PageVisit.path) \
-            .order_by(desc(db.func.count(PageVisit.path))) \
+        # Lecture des agrégats journaliers (coût proportionnel au nombre de périodes, pas de visites)
+        most_visited = db.session.query(PageVisitRollup.route, db.func.sum(PageVisitRollup.hits).label('visit_count')) \
+            .filter(PageVisitRollup.granularity == 'day') \
+            .group_by(PageVisitRollup.route) \
+            .order_by(desc(db.func.sum(PageVisitRollup.hits))) \
             .limit(3) \
             .all()
         most_visited_pages = ", ".join([page[0] for page in most_visited]) if most_visited else "Aucune donnée"
+        # Utilisateurs distincts estimés par fusion des sketches HyperLogLog journaliers
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        unique_visitors_today = unique_users(today, today + timedelta(days=1))
+        unique_visitors_7d = unique_users(today - timedelta(days=6), today + timedelta(days=1))
         # Récupérer l'article le plus commandé
         most_purchased_reward_query = db.session.query(Recompense, db.func.count(order_items.c.reward_id).label('purchase_count')) \
             .join(order_items, Recompense.id == order_items.c.reward_id) \
@@ -56,5 +73,14 @@ class Stats(Resource):
             'cancelled_orders': cancelled_orders,
             'validated_orders': validated_orders,
             'most_visited_pages': most_visited_pages,
+            'unique_visitors_today': unique_visitors_today,
+            'unique_visitors_7d': unique_visitors_7d,
             'most_purchased_reward': most_purchased_reward_name
-        }
\ No newline at end of file
+        }
+
+class PageVisitQueueStats(Resource):
+    @admin_required("Accès interdit")
+    @api.marshal_with(page_visit_queue_model)
+    def get(self):
+        # Compteurs propres au processus courant
+        return visit_buffer.stats()
@@ -1,9 +1,8 @@
 # admin/resources/stock.py (corrigé)
 from flask import request
 from flask_restx import Resource, fields
-from flask_jwt_extended import jwt_required, get_jwt_identity
 from Lot.models import Stock
-from Account.models import Account
+from Account.roles import admin_required, superuser_required
 from extensions import db
 from datetime import datetime
 from Admin.views import api  # Correction de "Admin" à "admin"
@@ -22,24 +21,16 @@ stock_input_model = api.model('StockInput', {
 })
 
 class StockList(Resource):
-    @jwt_required()
+    @admin_required("Accès interdit")
     @api.marshal_with(stock_model, as_list=True)
     def get(self):
-        user_id = get_jwt_identity()  # Retourne 'identifiant' (ex: 'superadmin_001')
-        user = Account.query.filter_by(identifiant=user_id).first()
-        if not user or not (user.is_admin or user.is_superuser):
-            api.abort(403, "Accès interdit")
         stocks = Stock.query.all()
         return [stock.to_dict() for stock in stocks]
 
-    @jwt_required()
+    @superuser_required("Seuls les super admins peuvent ajouter du stock")
     @api.expect(stock_input_model)
     @api.marshal_with(stock_model, code=201)
     def post(self):
-        user_id = get_jwt_identity()  # Retourne 'identifiant' (ex: 'superadmin_001')
-        user = Account.query.filter_by(identifiant=user_id).first()
-        if not user or not user.is_superuser:
-            api.abort(403, "Seuls les super admins peuvent ajouter du stock")
         data = request.get_json()
         reward_id = data['reward_id']
         quantity_available = data['quantity_available']
@@ -64,13 +55,9 @@ class StockList(Resource):
                 api.abort(400, f"Erreur d'intégrité : {str(e)}")
 
 class StockDetail(Resource):
-    @jwt_required()
+    @superuser_required("Seuls les super admins peuvent modifier le stock")
     @api.marshal_with(stock_model)
     def put(self, stock_id):
-        user_id = get_jwt_identity()  # Retourne 'identifiant' (ex: 'superadmin_001')
-        user = Account.query.filter_by(identifiant=user_id).first()
-        if not user or not user.is_superuser:
-            api.abort(403, "Seuls les super admins peuvent modifier le stock")
         stock = Stock.query.get_or_404(stock_id)
         data = request.get_json()
         stock.quantity_available = data.get('quantity_available', stock.quantity_available)
@@ -78,12 +65,8 @@ class StockDetail(Resource):
         db.session.commit()
         return stock.to_dict()
 
-    @jwt_required()
+    @superuser_required("Seuls les super admins peuvent supprimer le stock")
     def delete(self, stock_id):
-        user_id = get_jwt_identity()  # Retourne 'identifiant' (ex: 'superadmin_001')
-        user = Account.query.filter_by(identifiant=user_id).first()
-        if not user or not user.is_superuser:
-            api.abort(403, "Seuls les super admins peuvent supprimer le stock")
         stock = Stock.query.get_or_404(stock_id)
         db.session.delete(stock)
         db.session.commit()
@@ -1,7 +1,6 @@
 # admin/resources/support.py
 from flask_restx import Resource, fields
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from Account.models import Account
+from Account.roles import admin_required
 from Support.models import SupportRequest
 from Admin.views import api
 
@@ -16,12 +15,8 @@ support_request_model = api.model('SupportRequest', {
 })
 
 class SupportRequestList(Resource):
-    @jwt_required()
+    @admin_required("Accès interdit")
     @api.marshal_with(support_request_model, as_list=True)
     def get(self):
-        user_id = get_jwt_identity()
-        user = Account.query.filter_by(identifiant=user_id).first()
-        if not user or not (user.is_admin or user.is_superuser):
-            api.abort(403, "Accès interdit")
         support_requests = SupportRequest.query.all()
         return [request.to_dict() for request in support_requests]
\ No newline at end of file
@@ -1,12 +1,13 @@
 # admin/resources/surveys.py
 from flask import request
 from flask_restx import Resource, fields
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from Account.models import Account
+from sqlalchemy import func
+from Account.roles import admin_required, superuser_required
 from Survey.models import Survey, SurveyOption, SurveyResponse
 from Customer.models import Customer
 from extensions import db
 from Admin.views import api
+from Monitoring.query_counter import query_budget
 
 survey_model = api.model('Survey', {
     'id': fields.Integer(description='Survey ID'),
@@ -50,14 +51,10 @@ survey_response_detail_model = api.model('SurveyResponseDetail', {
 })
 
 class AdminSurveys(Resource):
-    @jwt_required()
+    @superuser_required("Seuls les super admins peuvent créer des sondages")
     @api.expect(survey_input_model)
     @api.marshal_with(survey_response_model, code=201)
     def post(self):
-        admin_identifiant = get_jwt_identity()
-        admin = Account.query.filter_by(identifiant=admin_identifiant).first()
-        if not admin or not admin.is_superuser:
-            api.abort(403, "Seuls les super admins peuvent créer des sondages")
         data = request.get_json()
         survey = Survey(title=data['title'], description=data.get('description'), is_active=data.get('is_active', True))
         db.session.add(survey)
@@ -73,13 +70,9 @@ class AdminSurveys(Resource):
         db.session.commit()
         return {"msg": "Sondage créé avec succès", "survey_id": survey.id}, 201
 
-    @jwt_required()
+    @admin_required("Utilisateur non autorisé")
     @api.marshal_with(survey_model, as_list=True)
     def get(self):
-        admin_identifiant = get_jwt_identity()
-        admin = Account.query.filter_by(identifiant=admin_identifiant).first()
-        if not admin or not (admin.is_admin or admin.is_superuser):
-            api.abort(403, "Utilisateur non autorisé")
         surveys = Survey.query.all()
         surveys_data = []
         for survey in surveys:
@@ -94,14 +87,10 @@ class AdminSurveys(Resource):
         return surveys_data
 
 class AdminSurvey(Resource):
-    @jwt_required()
+    @superuser_required("Seuls les super admins peuvent modifier des sondages")
     @api.expect(survey_input_model)
     @api.marshal_with(survey_response_model)
     def put(self, survey_id):
-        admin_identifiant = get_jwt_identity()
-        admin = Account.query.filter_by(identifiant=admin_identifiant).first()
-        if not admin or not admin.is_superuser:
-            api.abort(403, "Seuls les super admins peuvent modifier des sondages")
         survey = Survey.query.get(survey_id)
         if not survey:
             api.abort(404, "Sondage non trouvé")
@@ -112,13 +101,9 @@ class AdminSurvey(Resource):
         db.session.commit()
         return {"msg": "Sondage modifié avec succès", "survey_id": survey.id}
 
-    @jwt_required()
+    @superuser_required("Seuls les super admins peuvent supprimer des sondages")
     @api.marshal_with(survey_response_model)
     def delete(self, survey_id):
-        admin_identifiant = get_jwt_identity()
-        admin = Account.query.filter_by(identifiant=admin_identifiant).first()
-        if not admin or not admin.is_superuser:
-            api.abort(403, "Seuls les super admins peuvent supprimer des sondages")
         survey = Survey.query.get(survey_id)
         if not survey:
             api.abort(404, "Sondage non trouvé")
@@ -129,21 +114,25 @@ class AdminSurvey(Resource):
         return {"msg": "Sondage supprimé avec succès", "survey_id": survey_id}
 
 class SurveyResults(Resource):
-    @jwt_required()
+    @query_budget(7)
+    @admin_required("Utilisateur non autorisé")
     @api.marshal_with(survey_result_model, as_list=True)
     def get(self, survey_id):
-        admin_identifiant = get_jwt_identity()
-        admin = Account.query.filter_by(identifiant=admin_identifiant).first()
-        if not admin or not (admin.is_admin or admin.is_superuser):
-            api.abort(403, "Utilisateur non autorisé")
         survey = Survey.query.get(survey_id)
         if not survey:
             api.abort(404, "Sondage non trouvé")
         options = SurveyOption.query.filter_by(survey_id=survey_id).all()
-        total_responses = SurveyResponse.query.filter_by(survey_id=survey_id).count()
+        # Nombre de réponses par option en une seule agrégation
+        counts = dict(
+            db.session.query(SurveyResponse.option_id, func.count(SurveyResponse.id))
+            .filter(SurveyResponse.survey_id == survey_id)
+            .group_by(SurveyResponse.option_id)
+            .all()
+        )
+        total_responses = sum(counts.values())
         results = []
         for option in options:
-            response_count = SurveyResponse.query.filter_by(survey_id=survey_id, option_id=option.id).count()
+            response_count = counts.get(option.id, 0)
             percentage = (response_count / total_responses * 100) if total_responses > 0 else 0
             results.append({
                 'option_text': option.option_text,
@@ -154,21 +143,21 @@ class SurveyResults(Resource):
         return results
 
 class SurveyResponses(Resource):
-    @jwt_required()
+    @query_budget(7)
+    @admin_required("Utilisateur non autorisé")
     @api.marshal_with(survey_response_detail_model, as_list=True)
     def get(self, survey_id):
-        admin_identifiant = get_jwt_identity()
-        admin = Account.query.filter_by(identifiant=admin_identifiant).first()
-        if not admin or not (admin.is_admin or admin.is_superuser):
-            api.abort(403, "Utilisateur non autorisé")
         survey = Survey.query.get(survey_id)
         if not survey:
             api.abort(404, "Sondage non trouvé")
-        responses = SurveyResponse.query.filter_by(survey_id=survey_id).all()
+        responses = db.session.query(SurveyResponse, Customer, SurveyOption) \
+            .join(Customer, Customer.id == SurveyResponse.customer_id) \
+            .join(SurveyOption, SurveyOption.id == SurveyResponse.option_id) \
+            .filter(SurveyResponse.survey_id == survey_id) \
+            .order_by(SurveyResponse.id) \
+            .all()
         response_data = []
-        for response in responses:
-            customer = Customer.query.get(response.customer_id)
-            option = SurveyOption.query.get(response.option_id)
+        for response, customer, option in responses:
             response_data.append({
                 'response_id': response.id,
                 'customer_code': customer.customer_code,
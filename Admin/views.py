@@ -17,10 +17,10 @@ from .resources.admin import AdminList
 from .resources.customer import CustomerList
 from .resources.stock import StockList, StockDetail
 from .resources.profile import AdminProfile
-from .resources.stats import Stats
+from .resources.stats import Stats, PageVisitQueueStats
 from .resources.support import SupportRequestList
 from .resources.orders import AdminOrders, AdminOrderDetail, ValidateOrder, CancelOrder
-from .resources.notifications import AdminNotifications
+from .resources.notifications import AdminNotifications, AdminUnreadNotifications, AdminReadNotifications, AdminEvents, AdminBroadcasts, AdminBroadcastDetail
 from .resources.surveys import AdminSurveys, AdminSurvey, SurveyResults, SurveyResponses
 
 # Définir les modèles pour ReferralManagementResource
@@ -42,12 +42,18 @@ api.add_resource(StockList, '/stock')
 api.add_resource(StockDetail, '/stock/<int:stock_id>')
 api.add_resource(AdminProfile, '/profile')
 api.add_resource(Stats, '/stats')
+api.add_resource(PageVisitQueueStats, '/stats/page-visits')
 api.add_resource(SupportRequestList, '/support-requests')
 api.add_resource(AdminOrders, '/orders')
 api.add_resource(AdminOrderDetail, '/orders/<int:order_id>')
 api.add_resource(ValidateOrder, '/orders/<int:order_id>/validate')
 api.add_resource(CancelOrder, '/orders/<int:order_id>/cancel')
 api.add_resource(AdminNotifications, '/notifications')
+api.add_resource(AdminUnreadNotifications, '/notifications/unread-count')
+api.add_resource(AdminReadNotifications, '/notifications/read')
+api.add_resource(AdminBroadcasts, '/notifications/broadcasts')
+api.add_resource(AdminBroadcastDetail, '/notifications/broadcasts/<int:broadcast_id>')
+api.add_resource(AdminEvents, '/events')
 api.add_resource(AdminSurveys, '/surveys')
 api.add_resource(AdminSurvey, '/surveys/<int:survey_id>')
 api.add_resource(SurveyResults, '/surveys/<int:survey_id>/results')
@@ -0,0 +1,77 @@
+# Analytics/hll.py
+import hashlib
+import math
+import zlib
+
+DEFAULT_PRECISION = 10  # 1024 registres, erreur relative ~3,2 %
+_FORMAT_VERSION = 1
+
+
+class HyperLogLog:
+    """Estimateur de cardinalité fusionnable (utilisateurs distincts par route et par période)."""
+
+    def __init__(self, precision=DEFAULT_PRECISION, registers=None):
+        if not 4 <= precision <= 16:
+            raise ValueError("La précision doit être comprise entre 4 et 16")
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = bytearray(registers) if registers is not None else bytearray(self.m)
+        if len(self.registers) != self.m:
+            raise ValueError("Nombre de registres incompatible avec la précision")
+
+    def add(self, value):
+        digest = hashlib.blake2b(str(value).encode('utf-8'), digest_size=8).digest()
+        hashed = int.from_bytes(digest, 'big')
+        index = hashed >> (64 - self.precision)
+        remaining_bits = 64 - self.precision
+        word = hashed & ((1 << remaining_bits) - 1)
+        rank = remaining_bits - word.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, values):
+        for value in values:
+            self.add(value)
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("Impossible de fusionner des sketches de précisions différentes")
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+        return self
+
+    @classmethod
+    def merged(cls, sketches, precision=DEFAULT_PRECISION):
+        result = cls(precision)
+        for sketch in sketches:
+            result.merge(sketch)
+        return result
+
+    def count(self):
+        m = self.m
+        if m == 16:
+            alpha = 0.673
+        elif m == 32:
+            alpha = 0.697
+        elif m == 64:
+            alpha = 0.709
+        else:
+            alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        # Correction pour les petites cardinalités (linear counting)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def to_bytes(self):
+        # Les sketches peu remplis sont majoritairement nuls : la compression les rend très compacts
+        return bytes([_FORMAT_VERSION, self.precision]) + zlib.compress(bytes(self.registers))
+
+    @classmethod
+    def from_bytes(cls, data):
+        if not data:
+            return cls()
+        version, precision = data[0], data[1]
+        if version != _FORMAT_VERSION:
+            raise ValueError(f"Format de sketch inconnu : {version}")
+        return cls(precision, zlib.decompress(data[2:]))
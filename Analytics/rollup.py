@@ -0,0 +1,113 @@
+# Analytics/rollup.py
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from sqlalchemy import func
+
+from extensions import db
+from Analytics.hll import HyperLogLog
+from Models.page_visit import PageVisit
+from Models.page_visit_rollup import PageVisitRollup
+from Models.upsert import upsert_add
+
+GRANULARITIES = {
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1)
+}
+
+# Clé utilisée pour les requêtes sans règle d'URL (404) afin de ne pas multiplier les clés
+UNMATCHED_ROUTE = '<unmatched>'
+
+
+def bucket_start(timestamp, granularity):
+    if granularity == 'hour':
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def apply_visits(rows):
+    """Ajoute un lot de visites aux agrégats horaires et journaliers, dans la transaction courante."""
+    hits = Counter()
+    users = defaultdict(set)
+    for row in rows:
+        route = row.get('route') or UNMATCHED_ROUTE
+        for granularity in GRANULARITIES:
+            key = (granularity, bucket_start(row['timestamp'], granularity), route)
+            hits[key] += 1
+            if row.get('user_id'):
+                users[key].add(row['user_id'])
+
+    upsert_add(
+        PageVisitRollup.__table__,
+        [{
+            'granularity': granularity,
+            'bucket_start': start,
+            'route': route,
+            'hits': count,
+            'distinct_users': 0
+        } for (granularity, start, route), count in hits.items()],
+        index_elements=['granularity', 'bucket_start', 'route'],
+        add_columns=['hits']
+    )
+    if users:
+        _merge_users(users)
+
+
+def _merge_users(users):
+    # Verrouillage des lignes concernées : plusieurs workers peuvent fusionner dans la même période
+    rollups = db.session.query(PageVisitRollup).filter(
+        PageVisitRollup.granularity.in_({key[0] for key in users}),
+        PageVisitRollup.bucket_start.in_({key[1] for key in users}),
+        PageVisitRollup.route.in_({key[2] for key in users})
+    ).with_for_update().all()
+    for rollup in rollups:
+        user_ids = users.get((rollup.granularity, rollup.bucket_start, rollup.route))
+        if not user_ids:
+            continue
+        sketch = HyperLogLog.from_bytes(rollup.users_hll)
+        sketch.update(user_ids)
+        rollup.users_hll = sketch.to_bytes()
+        rollup.distinct_users = sketch.count()
+    db.session.flush()
+
+
+def unique_users(start, end, route=None):
+    """Nombre approximatif d'utilisateurs distincts sur [start, end[, par fusion des sketches journaliers."""
+    query = db.session.query(PageVisitRollup.users_hll).filter(
+        PageVisitRollup.granularity == 'day',
+        PageVisitRollup.bucket_start >= bucket_start(start, 'day'),
+        PageVisitRollup.bucket_start < end,
+        PageVisitRollup.users_hll.isnot(None)
+    )
+    if route is not None:
+        query = query.filter(PageVisitRollup.route == route)
+    return HyperLogLog.merged(HyperLogLog.from_bytes(data) for (data,) in query).count()
+
+
+def rebuild_rollups(since=None, chunk_size=10000):
+    """Recalcule les agrégats depuis la table page_visits brute (initialisation ou reprise)."""
+    if since is not None:
+        since = bucket_start(since, 'day')
+    delete_query = db.session.query(PageVisitRollup)
+    # Les visites antérieures à l'enregistrement des routes (route NULL) sont agrégées sur leur chemin brut
+    visits_query = db.session.query(
+        func.coalesce(PageVisit.route, PageVisit.path), PageVisit.user_id, PageVisit.timestamp
+    )
+    if since is not None:
+        delete_query = delete_query.filter(PageVisitRollup.bucket_start >= since)
+        visits_query = visits_query.filter(PageVisit.timestamp >= since)
+    delete_query.delete(synchronize_session=False)
+
+    processed = 0
+    chunk = []
+    for route, user_id, timestamp in visits_query.order_by(PageVisit.id).yield_per(chunk_size):
+        chunk.append({'route': route, 'user_id': user_id, 'timestamp': timestamp})
+        if len(chunk) >= chunk_size:
+            apply_visits(chunk)
+            processed += len(chunk)
+            chunk = []
+    if chunk:
+        apply_visits(chunk)
+        processed += len(chunk)
+    db.session.commit()
+    return processed
@@ -0,0 +1,161 @@
+# Analytics/visit_buffer.py
+import atexit
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+from extensions import db
+from Account.models import Account
+from Models.page_visit import PageVisit
+from Analytics.rollup import apply_visits
+
+OVERFLOW_POLICIES = ('drop_new', 'drop_oldest', 'block')
+
+
+class PageVisitBuffer:
+    """File d'attente bornée des visites de pages, vidée par un thread d'écriture en lots."""
+
+    def __init__(self):
+        self.app = None
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._counters = {'enqueued': 0, 'written': 0, 'dropped': 0, 'failed': 0, 'batches': 0}
+
+    def init_app(self, app):
+        self.app = app
+        self.batch_size = app.config['PAGE_VISIT_BATCH_SIZE']
+        self.flush_interval = app.config['PAGE_VISIT_FLUSH_INTERVAL_MS'] / 1000.0
+        self.block_timeout = app.config['PAGE_VISIT_BLOCK_TIMEOUT_MS'] / 1000.0
+        self.overflow = app.config['PAGE_VISIT_OVERFLOW']
+        if self.overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"PAGE_VISIT_OVERFLOW invalide : {self.overflow}")
+        self.excluded_prefixes = tuple(app.config['PAGE_VISIT_EXCLUDED_PREFIXES'])
+        self._queue = queue.Queue(maxsize=app.config['PAGE_VISIT_QUEUE_SIZE'])
+        app.extensions['page_visit_buffer'] = self
+        atexit.register(self.stop)
+
+    def record(self, path, route=None, identifiant=None, timestamp=None):
+        if path.startswith(self.excluded_prefixes):
+            return False
+        self._ensure_started()
+        item = (path, route, identifiant, timestamp or datetime.utcnow())
+        try:
+            if self.overflow == 'block':
+                self._queue.put(item, timeout=self.block_timeout)
+            elif self.overflow == 'drop_oldest':
+                while True:
+                    try:
+                        self._queue.put_nowait(item)
+                        break
+                    except queue.Full:
+                        try:
+                            self._queue.get_nowait()
+                            self._increment('dropped')
+                        except queue.Empty:
+                            pass
+            else:
+                self._queue.put_nowait(item)
+        except queue.Full:
+            self._increment('dropped')
+            return False
+        self._increment('enqueued')
+        return True
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+        counters['queue_depth'] = self._queue.qsize() if self._queue else 0
+        counters['queue_capacity'] = self._queue.maxsize if self._queue else 0
+        counters['overflow_policy'] = getattr(self, 'overflow', None)
+        return counters
+
+    def flush(self):
+        """Vide la file de manière synchrone (arrêt du processus, commandes CLI)."""
+        while True:
+            batch = self._drain(self.batch_size)
+            if not batch:
+                return
+            self._write(batch)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=self.flush_interval * 2 + 1)
+        if self._queue is not None:
+            self.flush()
+
+    def _ensure_started(self):
+        # Relancer le thread après un fork (workers gunicorn en mode preload)
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='page-visit-writer', daemon=True)
+            self._thread.start()
+
+    def _increment(self, name, value=1):
+        with self._lock:
+            self._counters[name] += value
+
+    def _drain(self, limit):
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch):
+        with self.app.app_context():
+            try:
+                identifiants = {identifiant for _, _, identifiant, _ in batch if identifiant}
+                account_ids = {}
+                if identifiants:
+                    account_ids = dict(
+                        db.session.query(Account.identifiant, Account.id)
+                        .filter(Account.identifiant.in_(identifiants))
+                        .all()
+                    )
+                rows = [{
+                    'path': path[:255],
+                    'route': route,
+                    'user_id': account_ids.get(identifiant),
+                    'timestamp': timestamp
+                } for path, route, identifiant, timestamp in batch]
+                db.session.execute(PageVisit.__table__.insert(), rows)
+                # Agrégats horaires/journaliers mis à jour dans la même transaction
+                apply_visits(rows)
+                db.session.commit()
+                self._increment('written', len(rows))
+                self._increment('batches')
+            except Exception as e:
+                db.session.rollback()
+                self._increment('failed', len(batch))
+                self.app.logger.error(f"Erreur lors de l'écriture des visites en lot : {e}")
+
+
+visit_buffer = PageVisitBuffer()
@@ -0,0 +1,132 @@
+# Batch/views.py
+import inspect
+import json
+
+from flask import Blueprint, current_app, g, request
+from flask_restx import Api, Resource, fields
+from flask_jwt_extended import jwt_required
+
+from extensions import db
+
+batch_bp = Blueprint('batch', __name__)
+api = Api(batch_bp, version='1.0', title='Batch API', description='Several API calls in one round trip')
+
+# Blueprints accessibles en sous-requête
+BATCH_BLUEPRINTS = ('customer', 'lot', 'survey', 'faq', 'support')
+BATCH_METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+# En-têtes transmis par le client pour une sous-requête (l'authentification est celle du lot)
+FORWARDED_HEADERS = ('If-None-Match', 'Accept-Language')
+# Clés de flask.g propres à une requête HTTP (compteurs SQL, métriques) : sauvegardées autour de chaque
+# sous-requête. Le reste de g (JWT vérifié, identité résolue, contrôle de révocation) est partagé par le lot.
+REQUEST_SCOPED_KEYS = ('_query_stats', '_metrics_start')
+
+sub_request_model = api.model('SubRequest', {
+    'id': fields.String(description='Client identifier echoed in the response'),
+    'method': fields.String(description='HTTP method (GET by default)'),
+    'path': fields.String(required=True, description='Path including the query string, e.g. /customer/me?fields=tier'),
+    'body': fields.Raw(description='JSON body'),
+    'headers': fields.Raw(description=f"Extra headers among {', '.join(FORWARDED_HEADERS)}")
+})
+
+batch_input_model = api.model('BatchInput', {
+    'requests': fields.List(fields.Nested(sub_request_model), required=True, description='Sub-requests, run in order')
+})
+
+sub_response_model = api.model('SubResponse', {
+    'id': fields.String(description='Identifier of the sub-request'),
+    'status': fields.Integer(description='HTTP status'),
+    'headers': fields.Raw(description='ETag and Location headers'),
+    'body': fields.Raw(description='JSON body (or text)')
+})
+
+batch_response_model = api.model('BatchResponse', {
+    'responses': fields.List(fields.Nested(sub_response_model), description='Responses, in request order')
+})
+
+
+def _error(sub_id, status, message):
+    return {'id': sub_id, 'status': status, 'headers': {}, 'body': {'message': message}}
+
+
+def _body(response):
+    if response.status_code == 304:
+        return None
+    data = response.get_data(as_text=True)
+    if response.is_json:
+        return json.loads(data) if data else None
+    return data
+
+
+def _dispatch(sub):
+    """Exécute une sous-requête dans le processus, avec les hooks before/after_request habituels."""
+    sub_id = sub.get('id')
+    method = (sub.get('method') or 'GET').upper()
+    path = sub.get('path')
+    if not isinstance(path, str) or not path.startswith('/'):
+        return _error(sub_id, 400, "path must be an absolute path")
+    if method not in BATCH_METHODS:
+        return _error(sub_id, 405, f"Method not allowed: {method}")
+
+    headers = {name: value for name, value in (sub.get('headers') or {}).items() if name in FORWARDED_HEADERS}
+    if request.headers.get('Authorization'):
+        headers['Authorization'] = request.headers['Authorization']
+    options = {'method': method, 'headers': headers}
+    if sub.get('body') is not None:
+        options['json'] = sub['body']
+
+    app = current_app._get_current_object()
+    saved = {key: g.pop(key) for key in REQUEST_SCOPED_KEYS if key in g}
+    try:
+        with app.test_request_context(path, **options):
+            if request.routing_exception is None and request.blueprint not in BATCH_BLUEPRINTS:
+                return _error(sub_id, 403, f"Path not allowed in a batch: {path}")
+            try:
+                response = app.full_dispatch_request()
+            except Exception as e:
+                current_app.logger.error(f"Erreur de la sous-requête {method} {path} : {e}")
+                return _error(sub_id, 500, "Internal Server Error")
+            if inspect.isgenerator(response.response):
+                # Flux produit par un générateur (SSE, export) : impossible à inclure dans une réponse groupée
+                response.close()
+                return _error(sub_id, 400, f"Streaming endpoints cannot be batched: {path}")
+            result = {
+                'id': sub_id,
+                'status': response.status_code,
+                'headers': {name: response.headers[name] for name in ('ETag', 'Location') if name in response.headers},
+                'body': _body(response)
+            }
+            query_count = int(response.headers.get('X-DB-Query-Count', 0))
+            query_time = float(response.headers.get('X-DB-Time-Ms', 0))
+    finally:
+        # Session partagée par le lot : une sous-requête en échec (500 sans rollback) ou des objets
+        # non validés ne doivent pas atteindre la suivante. Les identités mémorisées sont des namedtuples.
+        db.session.rollback()
+        for key in REQUEST_SCOPED_KEYS:
+            g.pop(key, None)
+        for key, value in saved.items():
+            setattr(g, key, value)
+
+    # Les requêtes SQL des sous-requêtes sont reportées dans les compteurs du lot
+    stats = g.get('_query_stats')
+    if stats is not None:
+        stats.count += query_count
+        stats.duration += query_time / 1000
+    return result
+
+
+@api.route('')
+class Batch(Resource):
+    @jwt_required()
+    @api.expect(batch_input_model)
+    @api.response(200, 'Success', batch_response_model)
+    def post(self):
+        """Run several API calls in one round trip, sharing authentication and identity resolution."""
+        data = request.get_json(silent=True) or {}
+        subs = data.get('requests')
+        if not isinstance(subs, list) or not subs or not all(isinstance(sub, dict) for sub in subs):
+            return {"message": "requests must be a non-empty list of sub-requests"}, 400
+        max_requests = current_app.config['BATCH_MAX_REQUESTS']
+        if len(subs) > max_requests:
+            return {"message": f"A batch is limited to {max_requests} sub-requests"}, 400
+        # Exécution séquentielle, dans l'ordre : une sous-requête voit les écritures des précédentes
+        return {"responses": [_dispatch(sub) for sub in subs]}, 200
@@ -0,0 +1,207 @@
+# Category/tiers.py
+import threading
+from bisect import bisect_right
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import exists, func, select
+
+from extensions import db
+from Account.models import Account
+from Category.models import Category
+from Customer.identity import identity_cache
+from Customer.models import Customer
+from Customer.response_cache import response_cache
+from Lot.notifications import insert_notifications
+from Models.categ_client import CategClient
+from Models.version_counter import CachedVersion
+
+try:
+    import numpy
+except ImportError:  # Optionnel : repli sur bisect, plus lent sur de gros volumes
+    numpy = None
+
+Tier = namedtuple('Tier', ['name', 'min_points'])
+# promoted vaut None lorsque la catégorie précédente est vide ou inconnue (première affectation)
+TierChange = namedtuple('TierChange', ['customer_code', 'account_id', 'previous', 'current', 'promoted'])
+
+# Seuils historiques (bornes basses incluses), utilisés tant que category_category est vide
+DEFAULT_TIERS = (
+    Tier('Eco Premium', 0),
+    Tier('Executive', 100),
+    Tier('Executive +', 1000),
+    Tier('First Class', 3000),
+)
+
+# Incrémenté quand les seuils de category_category changent ; relu au plus toutes les 30 secondes
+tier_version = CachedVersion('category_tiers', refresh_seconds=30)
+
+
+class TierTable:
+    """Paliers triés par seuil : un palier couvre [cat_point, cat_point du palier suivant)."""
+
+    def __init__(self, tiers):
+        self.tiers = tuple(sorted(tiers, key=lambda tier: tier.min_points))
+        self.thresholds = [tier.min_points for tier in self.tiers]
+
+    def index_for(self, points):
+        """Indice du palier de points par recherche dichotomique ; None sous le premier seuil."""
+        index = bisect_right(self.thresholds, points) - 1
+        return index if index >= 0 else None
+
+    def name_for(self, points):
+        index = self.index_for(points)
+        return self.tiers[index].name if index is not None else None
+
+    def position(self, points):
+        """(palier, pourcentage parcouru dans le palier, jetons manquants pour le suivant)."""
+        index = self.index_for(points)
+        if index is None:
+            return None, 0, 0
+        tier = self.tiers[index]
+        if index + 1 == len(self.tiers):
+            # Dernier palier : pas de borne haute
+            return tier.name, 0, 0
+        next_min = self.tiers[index + 1].min_points
+        percentage = (points - tier.min_points) / (next_min - tier.min_points) * 100
+        return tier.name, percentage, next_min - points
+
+    def indexes_for(self, points):
+        """Indices des paliers pour toute une séquence de points (-1 sous le premier seuil).
+
+        Recherche vectorisée (numpy.searchsorted) sur le tableau trié des seuils, bisect à défaut de numpy.
+        """
+        if numpy is not None:
+            values = numpy.asarray(points, dtype=numpy.int64)
+            return (numpy.searchsorted(numpy.asarray(self.thresholds), values, side='right') - 1).tolist()
+        return [bisect_right(self.thresholds, value) - 1 for value in points]
+
+
+class TierCache:
+    """Paliers lus une fois dans category_category puis conservés tant que tier_version ne change pas."""
+
+    def __init__(self):
+        self._table = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        version = tier_version.get()
+        if self._table is None or version != self._version:
+            rows = db.session.query(Category.category_name, Category.cat_point).all()
+            table = TierTable([Tier(name, points) for name, points in rows] or DEFAULT_TIERS)
+            with self._lock:
+                self._table = table
+                self._version = version
+        return self._table
+
+    def invalidate(self):
+        with self._lock:
+            self._table = None
+        tier_version.invalidate()
+
+
+tier_cache = TierCache()
+
+
+def tier_table():
+    return tier_cache.get()
+
+
+def detect_tier_changes(table, rows):
+    """Clients dont le palier calculé diffère de la catégorie stockée.
+
+    rows : (customer_code, catégorie stockée, solde, id du compte) ; les soldes sous le premier seuil
+    ne changent pas de catégorie.
+    """
+    positions = {tier.name: index for index, tier in enumerate(table.tiers)}
+    changes = []
+    for (customer_code, category, _, account_id), index in zip(rows, table.indexes_for([row[2] for row in rows])):
+        if index < 0:
+            continue
+        current = table.tiers[index].name
+        if current == category:
+            continue
+        previous = positions.get(category)
+        promoted = None if previous is None else index > previous
+        changes.append(TierChange(customer_code, account_id, category, current, promoted))
+    return changes
+
+
+def tier_change_message(change):
+    if change.promoted:
+        return f"Félicitations ! Vous passez de la catégorie {change.previous} à la catégorie {change.current}."
+    return f"Votre catégorie passe de {change.previous} à {change.current}."
+
+
+def recompute_customer_tiers(batch_size=5000, notify=True, progress=None):
+    """Recalcule Customer.category à partir du solde, notifie les changements de palier et aligne categ_client.
+
+    Les clients sont lus par tranches d'id (une transaction par tranche) et classés en une passe
+    vectorisée ; les catégories modifiées sont écrites par un UPDATE par palier et les notifications
+    (promotion ou rétrogradation) par un seul INSERT multi-lignes. Les caches (identité, réponses) des
+    clients modifiés sont invalidés. Retourne (clients mis à jour, notifications, lignes categ_client alignées).
+    """
+    tier_cache.invalidate()
+    table = tier_table()
+    updated = 0
+    notified = 0
+    last_id = 0
+    while True:
+        upper = db.session.execute(
+            select(func.max(Customer.id)).where(
+                Customer.id.in_(select(Customer.id).where(Customer.id > last_id).order_by(Customer.id).limit(batch_size))
+            )
+        ).scalar()
+        if upper is None:
+            break
+        rows = db.session.query(Customer.customer_code, Customer.category, Customer.solde, Account.id) \
+            .outerjoin(Account, Account.identifiant == Customer.customer_code) \
+            .filter(Customer.id > last_id, Customer.id <= upper, Customer.solde.isnot(None)) \
+            .all()
+        changes = detect_tier_changes(table, rows)
+
+        codes_by_tier = {}
+        for change in changes:
+            codes_by_tier.setdefault(change.current, []).append(change.customer_code)
+        for name, codes in codes_by_tier.items():
+            db.session.query(Customer).filter(Customer.customer_code.in_(codes)) \
+                .update({Customer.category: name}, synchronize_session=False)
+        if notify:
+            now = datetime.utcnow()
+            notifications = [
+                {'user_id': change.account_id, 'message': tier_change_message(change), 'created_at': now}
+                for change in changes if change.account_id is not None and change.promoted is not None
+            ]
+            notified += insert_notifications(notifications)
+        db.session.commit()
+
+        # UPDATE ensembliste : les événements ORM ne sont pas déclenchés, les caches sont vidés ici
+        changed = [change.customer_code for change in changes]
+        for code in changed:
+            identity_cache.delete(code)
+        response_cache.invalidate(changed)
+        updated += len(changed)
+        last_id = upper
+        if progress:
+            progress(updated, last_id)
+
+    synced = _sync_categ_client()
+    db.session.commit()
+    return updated, notified, synced
+
+
+def _sync_categ_client():
+    current = select(Customer.category).where(Customer.customer_code == CategClient.customer_code).scalar_subquery()
+    synced = db.session.query(CategClient) \
+        .filter(CategClient.category.is_distinct_from(current),
+                exists().where(Customer.customer_code == CategClient.customer_code)) \
+        .update({CategClient.category: current}, synchronize_session=False)
+    missing = select(Customer.customer_code, Customer.category).where(
+        Customer.category.isnot(None),
+        ~exists().where(CategClient.customer_code == Customer.customer_code)
+    )
+    result = db.session.execute(
+        CategClient.__table__.insert().from_select(['customer_code', 'category'], missing)
+    )
+    return synced + max(result.rowcount or 0, 0)
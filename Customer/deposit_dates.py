@@ -0,0 +1,84 @@
+# Customer/deposit_dates.py
+from datetime import datetime
+
+import sqlalchemy as sa
+
+# Formats rencontrés dans customer_deposit_withdrawal.deposit_date (texte chargé depuis le core bancaire)
+DEPOSIT_DATE_FORMATS = (
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d %H:%M:%S.%f',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%dT%H:%M:%S.%f',
+    '%Y-%m-%d %H:%M',
+    '%Y-%m-%d',
+    '%d/%m/%Y %H:%M:%S',
+    '%d/%m/%Y %H:%M',
+    '%d/%m/%Y',
+    '%d-%m-%Y',
+)
+
+# Vue minimale de la table : utilisable depuis les migrations comme depuis l'application
+_transactions = sa.table(
+    'customer_deposit_withdrawal',
+    sa.column('id', sa.BigInteger),
+    sa.column('deposit_date', sa.Text),
+    sa.column('deposit_at', sa.DateTime)
+)
+
+
+def parse_deposit_date(value):
+    """Convertit deposit_date en datetime ; None si la valeur est vide ou dans un format inconnu."""
+    if not value:
+        return None
+    value = value.strip()
+    for fmt in DEPOSIT_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def backfill_deposit_at(executor, batch_size=5000, commit=None, progress=None, on_update=None):
+    """Renseigne deposit_at pour les lignes qui n'en ont pas, par lots de batch_size (parcours par id).
+
+    executor est une Session ou une Connection ; commit, s'il est fourni, est appelé après chaque lot
+    afin de ne pas garder de verrous pendant tout le rattrapage. on_update(ids) est appelé avec les ids
+    renseignés d'un lot, avant commit. Retourne (lignes mises à jour, valeurs illisibles).
+    """
+    update = _transactions.update() \
+        .where(_transactions.c.id == sa.bindparam('row_id')) \
+        .values(deposit_at=sa.bindparam('parsed_at'))
+    last_id = None
+    updated = 0
+    unparseable = 0
+    while True:
+        query = sa.select(_transactions.c.id, _transactions.c.deposit_date) \
+            .where(_transactions.c.deposit_at.is_(None), _transactions.c.deposit_date.isnot(None)) \
+            .order_by(_transactions.c.id) \
+            .limit(batch_size)
+        if last_id is not None:
+            query = query.where(_transactions.c.id > last_id)
+        rows = executor.execute(query).all()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        params = []
+        for row_id, deposit_date in rows:
+            parsed = parse_deposit_date(deposit_date)
+            if parsed is None:
+                unparseable += 1
+            else:
+                params.append({'row_id': row_id, 'parsed_at': parsed})
+        if params:
+            executor.execute(update, params)
+            updated += len(params)
+            if on_update:
+                on_update([param['row_id'] for param in params])
+        if commit:
+            commit()
+        if progress:
+            progress(updated, unparseable)
+        if len(rows) < batch_size:
+            break
+    return updated, unparseable
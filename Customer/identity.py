@@ -0,0 +1,79 @@
+# Customer/identity.py
+from collections import namedtuple
+
+from flask import g, has_app_context
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from cache import TTLCache
+from extensions import db
+from Account.models import Account
+from Customer.models import Customer
+
+# Projections légères : pas d'objet ORM conservé entre les requêtes
+AccountRef = namedtuple('AccountRef', ['id', 'identifiant'])
+CustomerRef = namedtuple('CustomerRef', ['id', 'customer_code', 'first_name', 'short_name', 'category', 'solde'])
+
+identity_cache = TTLCache()
+
+
+def init_app(app):
+    identity_cache.configure(maxsize=app.config['IDENTITY_CACHE_SIZE'], ttl=app.config['IDENTITY_CACHE_TTL_SECONDS'])
+
+
+def resolve_identity(identifiant=None):
+    """Retourne (compte, client) pour l'identité JWT, en une seule requête jointe.
+
+    Le résultat est mémorisé pour la requête en cours (flask.g) et dans un cache LRU à durée de vie
+    limitée, invalidé lorsque le solde ou la catégorie du client change.
+    """
+    identifiant = identifiant or get_jwt_identity()
+    memo = g.setdefault('_resolved_identities', {})
+    if identifiant in memo:
+        return memo[identifiant]
+
+    identity = identity_cache.get(identifiant)
+    if identity is None:
+        row = db.session.query(
+            Account.id, Account.identifiant,
+            Customer.id, Customer.customer_code, Customer.first_name, Customer.short_name,
+            Customer.category, Customer.solde
+        ).outerjoin(Customer, Customer.customer_code == Account.identifiant) \
+            .filter(Account.identifiant == identifiant) \
+            .first()
+        if row is None:
+            # Pas de mise en cache des identités inconnues
+            memo[identifiant] = (None, None)
+            return memo[identifiant]
+        account = AccountRef(*row[:2])
+        customer = CustomerRef(*row[2:]) if row[2] is not None else None
+        identity = (account, customer)
+        identity_cache.set(identifiant, identity)
+
+    memo[identifiant] = identity
+    return identity
+
+
+def invalidate_identity(customer_code):
+    identity_cache.delete(customer_code)
+    if has_app_context() and '_resolved_identities' in g:
+        g._resolved_identities.pop(customer_code, None)
+
+
+@event.listens_for(Customer.solde, 'set')
+@event.listens_for(Customer.category, 'set')
+def _customer_changed(target, value, oldvalue, initiator):
+    if value == oldvalue or not target.customer_code:
+        return
+    identity_cache.delete(target.customer_code)
+    # Nouvelle invalidation après le commit : une autre requête a pu remettre l'ancienne valeur en cache entre-temps
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('_identity_invalidations', set()).add(target.customer_code)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    for customer_code in session.info.pop('_identity_invalidations', ()):
+        identity_cache.delete(customer_code)
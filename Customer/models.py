@@ -1,5 +1,7 @@
 from extensions import db
 from datetime import datetime
+from sqlalchemy import event
+from Customer.deposit_dates import parse_deposit_date
 
 class Customer(db.Model):
     __tablename__ = 'customer_customers'
@@ -38,12 +40,45 @@ class Transaction(db.Model):
     sens = db.Column(db.Text)
     montant = db.Column(db.Numeric(38, 0))
     deposit_date = db.Column(db.Text)
+    deposit_at = db.Column(db.DateTime)  # deposit_date typée (trigger PostgreSQL / événements ORM)
     compte = db.Column(db.Text)
     client = db.Column(db.Text)
 
+    __table_args__ = (
+        # Derniers mouvements et périodes d'un client : parcours d'index au lieu d'un scan de la table
+        db.Index('ix_customer_deposit_withdrawal_client_deposit_at', 'client', db.text('deposit_at DESC')),
+    )
+
     def __repr__(self):
         return f"<Transaction {self.client} - {self.sens}>"
 
+
+class CustomerMonthlySummary(db.Model):
+    """Totaux mensuels des mouvements par client, alimentés de manière incrémentale (Customer/monthly_summary.py)."""
+    __tablename__ = 'customer_monthly_summary'
+    id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    client = db.Column(db.Text, nullable=False)
+    month = db.Column(db.Date, nullable=False)  # Premier jour du mois
+    transaction_count = db.Column(db.BigInteger, nullable=False, default=0)  # Tous sens confondus
+    deposit_count = db.Column(db.BigInteger, nullable=False, default=0)
+    deposit_sum = db.Column(db.Numeric(38, 0), nullable=False, default=0)
+    withdrawal_count = db.Column(db.BigInteger, nullable=False, default=0)
+    withdrawal_sum = db.Column(db.Numeric(38, 0), nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('client', 'month', name='uq_customer_monthly_summary_client_month'),
+    )
+
+    def __repr__(self):
+        return f"<CustomerMonthlySummary {self.client} {self.month}>"
+
+
+@event.listens_for(Transaction, 'before_insert')
+@event.listens_for(Transaction, 'before_update')
+def _sync_deposit_at(mapper, connection, target):
+    if target.deposit_at is None or db.inspect(target).attrs.deposit_date.history.has_changes():
+        target.deposit_at = parse_deposit_date(target.deposit_date)
+
 class SoldeDepotRecurrent(db.Model):
     __tablename__ = 'customer_solde_depotrecurrent'
     id = db.Column(db.BigInteger, primary_key=True)
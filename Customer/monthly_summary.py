@@ -0,0 +1,229 @@
+# Customer/monthly_summary.py
+"""Totaux mensuels par client (customer_monthly_summary), tenus à jour depuis un filigrane sur l'id.
+
+Les mouvements d'id <= filigrane sont déjà comptés dans les résumés ; une lecture sur une période
+combine les mois entiers tirés des résumés, les bords de période et la queue (id > filigrane) lus
+dans les mouvements bruts. Chaque (client, mois) touché est recalculé en entier depuis les mouvements
+bruts, ce qui permet de relire sans double comptage une marge d'ids sous le filigrane (ids validés
+dans le désordre) et les mouvements dont deposit_at est renseigné après coup (resummarise, appelé par
+`flask backfill-deposit-at`). Seule une correction ou une suppression de lignes existantes impose
+`flask rebuild-monthly-summaries`.
+"""
+from datetime import datetime
+
+from sqlalchemy import and_, case, func, or_, select
+
+from extensions import db
+from Customer.models import CustomerMonthlySummary, Transaction
+from Customer.response_cache import response_cache
+from Customer.transaction_stats import DEPOSIT, WITHDRAWAL, as_datetime, bucket_expression, empty_series, next_bucket
+from Models.upsert import upsert_replace
+from Models.version_counter import VersionCounter
+
+WATERMARK = 'customer_monthly_summary'
+TOTALS = ('transaction_count', 'deposit_count', 'deposit_sum', 'withdrawal_count', 'withdrawal_sum')
+UPSERT_CHUNK_SIZE = 1000
+# Marge de relecture sous le filigrane : un id attribué avant un autre peut être validé après lui
+WATERMARK_OVERLAP = 1000
+
+
+def _aggregates():
+    """Colonnes agrégées dans l'ordre de TOTALS."""
+    is_deposit = Transaction.sens == DEPOSIT
+    is_withdrawal = Transaction.sens == WITHDRAWAL
+    return (
+        func.count(Transaction.id),
+        func.count(case((is_deposit, 1))),
+        func.coalesce(func.sum(case((is_deposit, Transaction.montant))), 0),
+        func.count(case((is_withdrawal, 1))),
+        func.coalesce(func.sum(case((is_withdrawal, Transaction.montant))), 0),
+    )
+
+
+def _aggregate_by_month(filters, touched=None):
+    """Totaux des mouvements bruts par (client, mois) ; les mouvements sans date ni client sont ignorés.
+
+    touched (filtres) limite le calcul aux (client, mois) des mouvements qu'il sélectionne, comptés en entier.
+    """
+    month = bucket_expression('month')
+    query = db.session.query(Transaction.client, month.label('month'), *_aggregates()) \
+        .filter(Transaction.client.isnot(None), Transaction.deposit_at.isnot(None), *filters)
+    if touched is not None:
+        pairs = select(Transaction.client.label('client'), month.label('month')) \
+            .where(Transaction.client.isnot(None), Transaction.deposit_at.isnot(None), *touched) \
+            .distinct() \
+            .subquery()
+        query = query.join(pairs, and_(pairs.c.client == Transaction.client, pairs.c.month == month))
+    rows = query.group_by(Transaction.client, month).all()
+    return [
+        {'client': client, 'month': as_datetime(month_start).date(), **dict(zip(TOTALS, [int(v or 0) for v in values]))}
+        for client, month_start, *values in rows
+    ]
+
+
+def _upsert(rows):
+    # Les lignes portent les totaux complets du (client, mois) : les remplacer rend la relecture idempotente
+    for i in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        upsert_replace(CustomerMonthlySummary.__table__, rows[i:i + UPSERT_CHUNK_SIZE],
+                       index_elements=['client', 'month'], set_columns=list(TOTALS))
+
+
+def refresh_summaries(batch_size=50000, progress=None):
+    """Intègre aux résumés les mouvements d'id > filigrane, par lots de batch_size ids.
+
+    Les (client, mois) des mouvements d'id > filigrane - WATERMARK_OVERLAP sont recalculés jusqu'à la
+    borne du lot : un id inférieur validé après le rafraîchissement précédent est rattrapé. Chaque lot
+    est validé avec le nouveau filigrane dans la même transaction (reprise sûre après interruption) ;
+    le verrou sur le filigrane sérialise les rafraîchissements. Retourne le nombre de mouvements intégrés.
+    """
+    processed = 0
+    while True:
+        watermark = VersionCounter.lock(WATERMARK)
+        batch = select(Transaction.id).where(Transaction.id > watermark) \
+            .order_by(Transaction.id).limit(batch_size).subquery()
+        upper, count = db.session.execute(select(func.max(batch.c.id), func.count(batch.c.id))).one()
+        upper = upper or watermark
+        rows = _aggregate_by_month(
+            [Transaction.id <= upper],
+            touched=[Transaction.id > watermark - WATERMARK_OVERLAP, Transaction.id <= upper]
+        )
+        _upsert(rows)
+        if count:
+            VersionCounter.set(WATERMARK, upper)
+        db.session.commit()
+        # Mouvements chargés hors de l'application : les tableaux de bord concernés sont recalculés
+        response_cache.invalidate({row['client'] for row in rows})
+        processed += count
+        if progress and count:
+            progress(processed, upper)
+        if count < batch_size:
+            break
+    return processed
+
+
+def resummarise(ids):
+    """Recalcule les (client, mois) des mouvements ids déjà sous le filigrane ; à valider par l'appelant.
+
+    Pour les mouvements dont deposit_at vient d'être renseigné (`flask backfill-deposit-at`) : ignorés
+    lors de leur passage sous le filigrane, ils ne seraient sinon jamais comptés.
+    """
+    watermark = VersionCounter.lock(WATERMARK)
+    rows = _aggregate_by_month([Transaction.id <= watermark], touched=[Transaction.id.in_(ids), Transaction.id <= watermark])
+    _upsert(rows)
+    response_cache.invalidate({row['client'] for row in rows})
+    return len(rows)
+
+
+def rebuild_summaries(since=None, batch_size=50000, progress=None):
+    """Recalcule les résumés depuis le mois contenant since (tous si None), puis rattrape la queue.
+
+    Le recalcul partiel se fait dans une seule transaction, jusqu'au filigrane courant, pour que les
+    lectures concurrentes restent exactes ; le recalcul complet repart d'un filigrane à 0.
+    """
+    watermark = VersionCounter.lock(WATERMARK)
+    if since is None:
+        db.session.query(CustomerMonthlySummary).delete(synchronize_session=False)
+        VersionCounter.set(WATERMARK, 0)
+        db.session.commit()
+        return refresh_summaries(batch_size, progress)
+
+    since_month = since.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    db.session.query(CustomerMonthlySummary) \
+        .filter(CustomerMonthlySummary.month >= since_month.date()) \
+        .delete(synchronize_session=False)
+    _upsert(_aggregate_by_month([Transaction.deposit_at >= since_month, Transaction.id <= watermark]))
+    db.session.commit()
+    return refresh_summaries(batch_size, progress)
+
+
+def summary_split(period_start, period_end):
+    """Mois entièrement compris dans [period_start, period_end] : (premier mois, mois suivant le dernier) ou None."""
+    first_full = period_start.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    if first_full < period_start:
+        first_full = next_bucket(first_full, 'month')
+    end_full = first_full
+    # period_end est inclusif : un mois est entier si la période couvre jusqu'à sa dernière seconde
+    while (next_bucket(end_full, 'month') - period_end).total_seconds() <= 1:
+        end_full = next_bucket(end_full, 'month')
+    if end_full <= first_full:
+        return None
+    return first_full, end_full
+
+
+def _summary_totals(client, first_full, end_full):
+    """Totaux des résumés sur [first_full, end_full) et filigrane lus dans la même requête (même instantané)."""
+    watermark = select(VersionCounter.version).where(VersionCounter.name == WATERMARK).scalar_subquery()
+    row = db.session.query(
+        *[func.coalesce(func.sum(getattr(CustomerMonthlySummary, column)), 0) for column in TOTALS],
+        watermark
+    ).filter(
+        CustomerMonthlySummary.client == client,
+        CustomerMonthlySummary.month >= first_full.date(),
+        CustomerMonthlySummary.month < end_full.date()
+    ).one()
+    return dict(zip(TOTALS, [int(v or 0) for v in row[:-1]])), row[-1] or 0
+
+
+def _raw_filters(client, period_start, period_end, first_full, end_full, watermark):
+    """Mouvements bruts à ajouter aux résumés : bords de période et queue non encore résumée."""
+    in_period = (Transaction.client == client, Transaction.deposit_at >= period_start, Transaction.deposit_at <= period_end)
+    return in_period + (or_(
+        Transaction.deposit_at < first_full,
+        Transaction.deposit_at >= end_full,
+        and_(Transaction.id > watermark, Transaction.deposit_at >= first_full, Transaction.deposit_at < end_full)
+    ),)
+
+
+def period_totals(client, period_start, period_end):
+    """Nombre de mouvements, nombre et somme par sens sur la période (bornes incluses)."""
+    in_period = (Transaction.client == client, Transaction.deposit_at >= period_start, Transaction.deposit_at <= period_end)
+    split = summary_split(period_start, period_end)
+    if split is None:
+        totals = dict.fromkeys(TOTALS, 0)
+        filters = in_period
+    else:
+        totals, watermark = _summary_totals(client, *split)
+        filters = _raw_filters(client, period_start, period_end, *split, watermark)
+    raw = db.session.query(*_aggregates()).filter(*filters).one()
+    for column, value in zip(TOTALS, raw):
+        totals[column] += int(value or 0)
+    return totals
+
+
+def monthly_series(client, period_start, period_end):
+    """Série mensuelle de period_totals : mois entiers depuis les résumés, complétés par les mouvements bruts."""
+    series = empty_series('month', period_start, period_end)
+    split = summary_split(period_start, period_end)
+    if split is None:
+        filters = (Transaction.client == client, Transaction.deposit_at >= period_start, Transaction.deposit_at <= period_end)
+    else:
+        first_full, end_full = split
+        # Filigrane et résumés dans la même requête : un rafraîchissement validé entre deux lectures
+        # ferait sinon compter deux fois (ou pas du tout) le dernier lot
+        current = select(VersionCounter.version.label('watermark')).where(VersionCounter.name == WATERMARK).subquery()
+        rows = db.session.query(
+            current.c.watermark, CustomerMonthlySummary.month, *[getattr(CustomerMonthlySummary, c) for c in TOTALS]
+        ).select_from(current).outerjoin(CustomerMonthlySummary, and_(
+            CustomerMonthlySummary.client == client,
+            CustomerMonthlySummary.month >= first_full.date(),
+            CustomerMonthlySummary.month < end_full.date()
+        )).all()
+        watermark = rows[0][0] if rows else 0
+        for _, month_start, *values in rows:
+            if month_start is not None:
+                _add_to_point(series, datetime.combine(month_start, datetime.min.time()), values)
+        filters = _raw_filters(client, period_start, period_end, first_full, end_full, watermark)
+
+    month = bucket_expression('month').label('month')
+    for month_start, *values in db.session.query(month, *_aggregates()).filter(*filters).group_by(month).all():
+        _add_to_point(series, as_datetime(month_start), values)
+    return list(series.values())
+
+
+def _add_to_point(series, month_start, values):
+    point = series.get(month_start)
+    if point is None:
+        return
+    totals = dict(zip(TOTALS, values))
+    for column in ('deposit_count', 'deposit_sum', 'withdrawal_count', 'withdrawal_sum'):
+        point[column] += int(totals[column] or 0)
@@ -0,0 +1,153 @@
+# Customer/response_cache.py
+import hashlib
+import json
+import logging
+
+from flask import request
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from werkzeug.http import quote_etag
+
+from cache import TTLCache
+from Customer.models import Customer, Transaction
+
+logger = logging.getLogger(__name__)
+
+# Réponses mises en cache par client ; toutes sont invalidées ensemble
+KINDS = ('dashboard', 'profile')
+
+
+class MemoryBackend:
+    """Cache LRU du processus : l'invalidation ne concerne que le processus courant (TTL pour les autres)."""
+
+    def __init__(self, maxsize, ttl):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, value):
+        self._cache.set(key, value)
+
+    def delete(self, keys):
+        for key in keys:
+            self._cache.delete(key)
+
+
+class RedisBackend:
+    """Cache partagé entre processus (dépendance optionnelle redis) ; une panne est traitée comme un défaut de cache."""
+
+    def __init__(self, url, ttl, prefix='witti:response:'):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("RESPONSE_CACHE_URL nécessite le paquet redis (pip install redis)") from e
+        self._client = redis.Redis.from_url(url, socket_timeout=0.2)
+        self._errors = redis.RedisError
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        try:
+            raw = self._client.get(self.prefix + key)
+        except self._errors as e:
+            logger.warning(f"Cache de réponses indisponible : {e}")
+            return None
+        return json.loads(raw) if raw else None
+
+    def set(self, key, value):
+        try:
+            self._client.set(self.prefix + key, json.dumps(value), ex=self.ttl)
+        except self._errors as e:
+            logger.warning(f"Cache de réponses indisponible : {e}")
+
+    def delete(self, keys):
+        try:
+            self._client.delete(*[self.prefix + key for key in keys])
+        except self._errors as e:
+            logger.warning(f"Invalidation du cache de réponses impossible : {e}")
+
+
+class ResponseCache:
+    """Réponses par client (tableau de bord, profil) avec leur ETag, invalidées par les événements ORM."""
+
+    def __init__(self):
+        self.enabled = True
+        self.backend = MemoryBackend(maxsize=1024, ttl=60)
+
+    def init_app(self, app):
+        self.enabled = app.config['RESPONSE_CACHE_ENABLED']
+        ttl = app.config['RESPONSE_CACHE_TTL_SECONDS']
+        if app.config['RESPONSE_CACHE_URL']:
+            self.backend = RedisBackend(app.config['RESPONSE_CACHE_URL'], ttl)
+        else:
+            self.backend = MemoryBackend(maxsize=app.config['RESPONSE_CACHE_SIZE'], ttl=ttl)
+
+    def get(self, kind, customer_code):
+        if not self.enabled:
+            return None
+        return self.backend.get(f'{kind}:{customer_code}')
+
+    def store(self, kind, customer_code, payload):
+        """Mémorise payload (déjà sérialisable en JSON) et retourne l'entrée {etag, payload}."""
+        entry = make_entry(payload)
+        if self.enabled:
+            self.backend.set(f'{kind}:{customer_code}', entry)
+        return entry
+
+    def invalidate(self, customer_codes):
+        keys = [f'{kind}:{code}' for code in customer_codes if code for kind in KINDS]
+        if keys:
+            self.backend.delete(keys)
+
+
+response_cache = ResponseCache()
+
+
+def make_entry(payload):
+    """Entrée {etag, payload} : l'ETag est l'empreinte du JSON canonique de payload."""
+    body = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return {'etag': hashlib.sha1(body.encode('utf-8')).hexdigest(), 'payload': payload}
+
+
+def conditional_response(entry):
+    """(payload, statut, en-têtes) pour marshal_with : 304 si le client possède déjà cette version."""
+    headers = {'ETag': quote_etag(entry['etag']), 'Cache-Control': 'private, no-cache'}
+    if request.if_none_match.contains(entry['etag']):
+        return entry['payload'], 304, headers
+    return entry['payload'], 200, headers
+
+
+def _mark(session, customer_code):
+    response_cache.invalidate([customer_code])
+    # Nouvelle invalidation après le commit : une requête concurrente a pu remettre l'ancienne réponse en cache
+    if session is not None:
+        session.info.setdefault('_response_invalidations', set()).add(customer_code)
+
+
+@event.listens_for(Customer.solde, 'set')
+@event.listens_for(Customer.category, 'set')
+@event.listens_for(Customer.first_name, 'set')
+@event.listens_for(Customer.short_name, 'set')
+def _customer_changed(target, value, oldvalue, initiator):
+    if value == oldvalue or not target.customer_code:
+        return
+    _mark(object_session(target), target.customer_code)
+
+
+@event.listens_for(Transaction, 'after_insert')
+@event.listens_for(Transaction, 'after_update')
+@event.listens_for(Transaction, 'after_delete')
+def _transaction_changed(mapper, connection, target):
+    if target.client:
+        _mark(object_session(target), target.client)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    response_cache.invalidate(session.info.pop('_response_invalidations', ()))
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop('_response_invalidations', None)
@@ -0,0 +1,95 @@
+# Customer/transaction_stats.py
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+from extensions import db
+from Customer.models import Transaction
+
+DEPOSIT = 'DEPOSIT'
+WITHDRAWAL = 'WITHDRAWAL'
+BUCKETS = ('day', 'week', 'month')
+
+
+def trends_from_counts(counts, total=None):
+    """Pourcentages de dépôts et de retraits ; total vaut par défaut la somme des comptes par sens."""
+    if total is None:
+        total = sum(counts.values())
+    deposit_percentage = (counts.get(DEPOSIT, 0) / total * 100) if total > 0 else 0
+    withdrawal_percentage = (counts.get(WITHDRAWAL, 0) / total * 100) if total > 0 else 0
+    return total, {
+        "deposit_percentage": round(deposit_percentage, 2),
+        "withdrawal_percentage": round(withdrawal_percentage, 2)
+    }
+
+
+def bucket_floor(value, bucket):
+    """Début de la période (jour, semaine commençant le lundi, mois) contenant value."""
+    day = value.replace(hour=0, minute=0, second=0, microsecond=0)
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(value, bucket):
+    if bucket == 'week':
+        return value + timedelta(days=7)
+    if bucket == 'month':
+        return (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return value + timedelta(days=1)
+
+
+def bucket_expression(bucket):
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        return func.date_trunc(bucket, Transaction.deposit_at)
+    if dialect == 'sqlite':
+        if bucket == 'week':
+            # Lundi de la semaine : recule de 6 jours puis avance au prochain lundi
+            return func.date(Transaction.deposit_at, '-6 days', 'weekday 1')
+        if bucket == 'month':
+            return func.strftime('%Y-%m-01', Transaction.deposit_at)
+        return func.date(Transaction.deposit_at)
+    raise NotImplementedError(f"Séries temporelles non supportées pour le dialecte {dialect}")
+
+
+def as_datetime(value):
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None)
+    return datetime.fromisoformat(str(value))
+
+
+def empty_series(bucket, period_start, period_end):
+    """Points de la série indexés par début de période, tous à 0."""
+    series = {}
+    current = bucket_floor(period_start, bucket)
+    while current <= period_end:
+        series[current] = {
+            'bucket_start': current.strftime('%Y-%m-%d'),
+            'deposit_count': 0,
+            'deposit_sum': 0,
+            'withdrawal_count': 0,
+            'withdrawal_sum': 0
+        }
+        current = next_bucket(current, bucket)
+    return series
+
+
+def bucketed_series(period_filter, bucket, period_start, period_end):
+    """Nombre et somme des montants par sens et par période, agrégés en base ; les périodes vides valent 0."""
+    bucket_column = bucket_expression(bucket).label('bucket')
+    rows = db.session.query(
+        bucket_column, Transaction.sens, func.count(Transaction.id), func.sum(Transaction.montant)
+    ).filter(*period_filter).group_by(bucket_column, Transaction.sens).all()
+
+    series = empty_series(bucket, period_start, period_end)
+    for bucket_start, sens, count, total in rows:
+        point = series.get(as_datetime(bucket_start))
+        if point is None or sens not in (DEPOSIT, WITHDRAWAL):
+            continue
+        prefix = 'deposit' if sens == DEPOSIT else 'withdrawal'
+        point[f'{prefix}_count'] += count
+        point[f'{prefix}_sum'] += int(total or 0)
+    return list(series.values())
@@ -1,15 +1,26 @@
-from flask import Blueprint, current_app, request
+from flask import Blueprint, Response, current_app, request, stream_with_context
 from flask_restx import Api, Resource, fields
+import csv
+import io
+import json
 import uuid
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
-from Customer.models import Customer, Transaction
+from sqlalchemy import String, cast, func, select
+from Customer.models import Transaction
 from Category.models import Category
-from Lot.models import Notification
-from Models.token_blacklist import TokenBlacklist
+from Category.tiers import tier_table
+from Lot.models import CartItem, Favorite, NotificationCounter, Recompense
+from Lot.notifications import mark_read, notifications_page, serialize_notification, unread_count
+from Monitoring.query_counter import query_budget
+from pubsub import CUSTOMERS_CHANNEL, event_broker, sse_response, user_channel
+from Account.revocation import revoked_tokens
 from extensions import db
 from datetime import datetime, timedelta
-from Account.models import Account
-from Customer.models import Customer
+from pagination import decode_cursor, encode_cursor, keyset_before, page_size
+from Customer.identity import resolve_identity
+from Customer.response_cache import conditional_response, make_entry, response_cache
+from Customer.monthly_summary import monthly_series, period_totals
+from Customer.transaction_stats import BUCKETS, DEPOSIT, WITHDRAWAL, bucketed_series, trends_from_counts
 from Models.referral import Referral
 
 
@@ -17,14 +28,6 @@ customer_bp = Blueprint('customer', __name__)
 reward_bp = Blueprint('reward', __name__)
 api = Api(customer_bp, version='1.0', title='Customer API', description='API for customer operations')
 
-# Define category ranges
-CATEGORIES = [
-    {"name": "Eco Premium", "code": "A", "min": 0, "max": 100},
-    {"name": "Executive", "code": "B", "min": 100, "max": 1000},
-    {"name": "Executive +", "code": "C", "min": 1000, "max": 3000},
-    {"name": "First Class", "code": "D", "min": 3000, "max": float('inf')}
-]
-
 # Define response models for dashboard
 dashboard_model = api.model('Dashboard', {
     'category': fields.String(description='Customer category'),
@@ -52,19 +55,73 @@ transactions_response_model = api.model('TransactionsResponse', {
     'total_transactions': fields.Integer(description='Total number of transactions'),
     'period_start': fields.String(description='Start of the period'),
     'period_end': fields.String(description='End of the period'),
-    'trends': fields.Nested(trends_model, description='Transaction trends (deposit and withdrawal percentages)')
+    'trends': fields.Nested(trends_model, description='Transaction trends (deposit and withdrawal percentages)'),
+    'limit': fields.Integer(description='Page size'),
+    'has_more': fields.Boolean(description='More transactions are available'),
+    'next_cursor': fields.String(description='Cursor for the next page (pass as ?cursor=)')
+})
+
+series_point_model = api.model('TransactionSeriesPoint', {
+    'bucket_start': fields.String(description='Start of the bucket (YYYY-MM-DD)'),
+    'deposit_count': fields.Integer(description='Number of deposits'),
+    'deposit_sum': fields.Integer(description='Sum of deposited amounts'),
+    'withdrawal_count': fields.Integer(description='Number of withdrawals'),
+    'withdrawal_sum': fields.Integer(description='Sum of withdrawn amounts')
+})
+
+series_response_model = api.model('TransactionSeriesResponse', {
+    'bucket': fields.String(description='Bucket size (day, week or month)'),
+    'period_start': fields.String(description='Start of the period'),
+    'period_end': fields.String(description='End of the period'),
+    'series': fields.List(fields.Nested(series_point_model), description='Bucketed sums and counts')
 })
 
+# Approximate number of days per bucket, used to cap the number of points of a series
+BUCKET_DAYS = {'day': 1, 'week': 7, 'month': 28}
+MAX_SERIES_POINTS = 1000
+
+EXPORT_COLUMNS = ('id', 'date', 'deposit_at', 'amount', 'type', 'libelle')
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson'
+}
+
+
+def _csv_line(values):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(values)
+    return buffer.getvalue()
+
 # Define response model for notifications
 notification_model = api.model('Notification', {
     'id': fields.Integer(description='Notification ID'),
     'message': fields.String(description='Notification message'),
-    'created_at': fields.String(description='Creation date')
+    'created_at': fields.String(description='Creation date'),
+    'is_read': fields.Boolean(description='Read by the customer'),
+    'read_at': fields.String(description='Read date')
 })
 
 notifications_response_model = api.model('NotificationsResponse', {
     'msg': fields.String(description='Success message'),
-    'notifications': fields.List(fields.Nested(notification_model), description='List of notifications')
+    'notifications': fields.List(fields.Nested(notification_model), description='List of notifications'),
+    'unread_count': fields.Integer(description='Number of unread notifications'),
+    'limit': fields.Integer(description='Page size'),
+    'has_more': fields.Boolean(description='More notifications are available'),
+    'next_cursor': fields.String(description='Cursor of the next page (null on the last page)')
+})
+
+unread_count_model = api.model('UnreadCount', {
+    'unread_count': fields.Integer(description='Number of unread notifications')
+})
+
+mark_read_model = api.model('MarkNotificationsRead', {
+    'ids': fields.List(fields.Integer, description='Notifications to mark as read (all unread notifications if omitted)')
+})
+
+mark_read_response_model = api.model('MarkNotificationsReadResponse', {
+    'msg': fields.String(description='Success message'),
+    'marked': fields.Integer(description='Notifications marked as read'),
+    'unread_count': fields.Integer(description='Number of unread notifications')
 })
 
 # Define response model for profile
@@ -77,6 +134,34 @@ profile_model = api.model('Profile', {
     'percentage': fields.Float(description='Percentage within category range'),
     'tokens_to_next_tier': fields.Integer(description='Jetons needed to reach next tier')
 })
+# Define response models for the aggregate start-up endpoint (/customer/me)
+me_tier_model = api.model('MeTier', {
+    'category': fields.String(description='Customer category'),
+    'jetons': fields.Integer(description='Total jetons'),
+    'percentage': fields.Float(description='Percentage within category range'),
+    'tokens_to_next_tier': fields.Integer(description='Jetons needed to reach next tier')
+})
+
+me_cart_model = api.model('MeCart', {
+    'items': fields.Integer(description='Number of cart lines'),
+    'quantity': fields.Integer(description='Total quantity'),
+    'total_tokens': fields.Integer(description='Jetons required by the cart'),
+    'purchase_possible': fields.Boolean(description='Enough jetons for the whole cart')
+})
+
+me_model = api.model('Me', {
+    'profile': fields.Nested(profile_model, description='Customer profile'),
+    'tier': fields.Nested(me_tier_model, description='Tier progress'),
+    'last_transactions': fields.List(fields.Raw, description='Last 5 transactions'),
+    'unread_count': fields.Integer(description='Number of unread notifications'),
+    'cart': fields.Nested(me_cart_model, description='Cart summary'),
+    'favorite_ids': fields.List(fields.Integer, description='Ids of the favorite rewards')
+})
+
+# Sections de /customer/me, sélectionnables par ?fields=
+ME_SECTIONS = ('profile', 'tier', 'last_transactions', 'unread_count', 'cart', 'favorite_ids')
+TIER_FIELDS = ('category', 'jetons', 'percentage', 'tokens_to_next_tier')
+
 #Invitation de parrainage
 referral_model = api.model('Referral', {
     'referral_link': fields.String(description='Lien de parrainage'),
@@ -90,6 +175,43 @@ logout_response_model = api.model('LogoutResponse', {
     'msg': fields.String(description='Logout message')
 })
 
+def _dashboard_payload(customer):
+    """Contenu du tableau de bord, mis en cache par client (Customer/response_cache.py)."""
+    current_app.logger.info(f"Customer found: ID={customer.id}, solde={customer.solde}")
+
+    jetons = customer.solde or 0
+    # Palier calculé depuis le solde (seuils de category_category) plutôt que la catégorie stockée
+    tier, percentage, tokens_to_next_tier = tier_table().position(jetons)
+    category_name = tier or customer.category or "Unknown"
+    current_app.logger.info(f"Category: {category_name}, Jetons: {jetons}")
+    current_app.logger.info(f"Percentage: {percentage}, Tokens to next tier: {tokens_to_next_tier}")
+
+    # Parcours de l'index (client, deposit_at DESC) ; les dates illisibles (deposit_at NULL) sont ignorées
+    transactions = db.session.query(Transaction).filter(
+        Transaction.client == customer.customer_code,
+        Transaction.deposit_at.isnot(None)
+    ).order_by(Transaction.deposit_at.desc()).limit(5).all()
+    last_transactions = [
+        {
+            "date": t.deposit_date,
+            "amount": str(t.montant) if t.montant else "0.00",
+            "type": t.sens
+        }
+        for t in transactions
+    ]
+    current_app.logger.info(f"Transactions fetched: {len(last_transactions)}")
+
+    dashboard = {
+        "category": category_name,
+        "jetons": jetons,
+        "percentage": round(percentage, 2),
+        "short_name": customer.short_name,
+        "tokens_to_next_tier": tokens_to_next_tier,
+        "last_transactions": last_transactions
+    }
+    return dashboard
+
+
 @api.route('/<string:customer_code>/dashboard')
 class CustomerDashboard(Resource):
     @jwt_required()
@@ -103,60 +225,68 @@ class CustomerDashboard(Resource):
                 current_app.logger.warning(f"Access denied: {customer_code} does not match {identifiant}")
                 return {"message": "Access denied: You can only access your own dashboard"}, 403
 
-            customer = db.session.query(Customer).filter_by(customer_code=identifiant).first()
-            current_app.logger.info(f"Customer query result: {customer}")
+            _, customer = resolve_identity(identifiant)
             if not customer:
                 current_app.logger.warning(f"No customer found for identifiant/customer_code: {identifiant}")
                 return {"message": "Customer not found"}, 404
 
-            current_app.logger.info(f"Customer found: ID={customer.id}, solde={customer.solde}")
-
-            category = customer.category
-            jetons = customer.solde or 0
-            category_name = category.category_name if category else "Unknown"
-            current_app.logger.info(f"Category: {category_name}, Jetons: {jetons}")
-
-            percentage = 0
-            tokens_to_next_tier = 0
-            for i, cat in enumerate(CATEGORIES):
-                if cat['min'] <= jetons < cat['max']:
-                    range_width = cat['max'] - cat['min']
-                    position_in_range = jetons - cat['min']
-                    percentage = (position_in_range / range_width) * 100 if range_width > 0 else 0
-                    if i + 1 < len(CATEGORIES):
-                        tokens_to_next_tier = CATEGORIES[i + 1]['min'] - jetons
-                    break
-            if not tokens_to_next_tier:
-                tokens_to_next_tier = 0
-            current_app.logger.info(f"Percentage: {percentage}, Tokens to next tier: {tokens_to_next_tier}")
-
-            transactions = db.session.query(Transaction).filter_by(customer_id=customer.id).order_by(Transaction.deposit_date.desc()).limit(5).all()
-            last_transactions = [
-                {
-                    "date": t.deposit_date,
-                    "amount": str(t.montant) if t.montant else "0.00",
-                    "type": t.sens
-                }
-                for t in transactions
-            ]
-            current_app.logger.info(f"Transactions fetched: {len(last_transactions)}")
-
-            dashboard = {
-                "category": category_name,
-                "jetons": jetons,
-                "percentage": round(percentage, 2),
-                "short_name": customer.short_name,
-                "tokens_to_next_tier": tokens_to_next_tier,
-                "last_transactions": last_transactions
-            }
+            entry = response_cache.get('dashboard', customer.customer_code)
+            if entry is None:
+                entry = response_cache.store('dashboard', customer.customer_code, _dashboard_payload(customer))
 
             current_app.logger.info(f"Dashboard retrieved for customer_code: {customer_code}")
-            return dashboard, 200
+            return conditional_response(entry)
 
         except Exception as e:
             current_app.logger.error(f"Error fetching dashboard: {str(e)}")
             return {"error": str(e)}, 500
 
+def _period_bounds(args):
+    """Bornes (début, fin) de la période demandée ; ValueError avec le message d'erreur à renvoyer."""
+    period = args.get('period', 'month').lower()
+    start_date = args.get('start_date')
+    end_date = args.get('end_date')
+
+    # Current date (reference date from config, real time when TRANSACTIONS_REFERENCE_DATE is empty)
+    reference_date = current_app.config['TRANSACTIONS_REFERENCE_DATE']
+    now = datetime.strptime(reference_date, '%Y-%m-%d %H:%M') if reference_date else datetime.utcnow()
+
+    # Define period boundaries
+    if period == 'month':
+        period_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        period_end = now
+    elif period == 'week':
+        # Week starts on Monday
+        days_to_monday = (now.weekday() - 0) % 7
+        period_start = (now - timedelta(days=days_to_monday)).replace(hour=0, minute=0, second=0, microsecond=0)
+        period_end = now
+    elif period == 'year':
+        period_start = now.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+        period_end = now
+    elif period == 'custom':
+        if not start_date or not end_date:
+            raise ValueError("start_date and end_date are required for custom period")
+        try:
+            period_start = datetime.strptime(start_date, '%Y-%m-%d')
+            period_end = datetime.strptime(end_date, '%Y-%m-%d').replace(hour=23, minute=59, second=59)
+        except ValueError:
+            raise ValueError("Invalid date format, use YYYY-MM-DD")
+        if period_end < period_start:
+            raise ValueError("end_date must be after start_date")
+    else:
+        raise ValueError("Invalid period, use 'month', 'week', 'year', or 'custom'")
+    return period, period_start, period_end
+
+
+def _period_filter(customer, period_start, period_end):
+    # Range scan on the (client, deposit_at DESC) index
+    return (
+        Transaction.client == customer.customer_code,
+        Transaction.deposit_at >= period_start,
+        Transaction.deposit_at <= period_end
+    )
+
+
 @api.route('/<string:customer_code>/transactions')
 class CustomerTransactions(Resource):
     @jwt_required()
@@ -170,54 +300,38 @@ class CustomerTransactions(Resource):
                 current_app.logger.warning(f"Access denied: {customer_code} does not match {identifiant}")
                 return {"message": "Access denied: You can only access your own transactions"}, 403
 
-            customer = db.session.query(Customer).filter_by(customer_code=identifiant).first()
+            _, customer = resolve_identity(identifiant)
             if not customer:
                 current_app.logger.warning(f"No customer found for identifiant/customer_code: {identifiant}")
                 return {"message": "Customer not found"}, 404
 
             # Get filter parameters from query string
-            period = request.args.get('period', 'month').lower()
-            start_date = request.args.get('start_date')
-            end_date = request.args.get('end_date')
-
-            # Current date
-            now = datetime(2025, 5, 24, 23, 21)
-
-            # Define period boundaries
-            if period == 'month':
-                period_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-                period_end = now
-            elif period == 'week':
-                # Week starts on Monday
-                days_to_monday = (now.weekday() - 0) % 7
-                period_start = (now - timedelta(days=days_to_monday)).replace(hour=0, minute=0, second=0, microsecond=0)
-                period_end = now
-            elif period == 'year':
-                period_start = now.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
-                period_end = now
-            elif period == 'custom':
-                if not start_date or not end_date:
-                    return {"message": "start_date and end_date are required for custom period"}, 400
+            try:
+                period, period_start, period_end = _period_bounds(request.args)
+            except ValueError as e:
+                return {"message": str(e)}, 400
+
+            limit = page_size(
+                request.args.get('limit'),
+                current_app.config['TRANSACTIONS_PAGE_SIZE'],
+                current_app.config['TRANSACTIONS_PAGE_SIZE_MAX']
+            )
+            period_filter = _period_filter(customer, period_start, period_end)
+
+            # Keyset pagination on (deposit_at, id), newest first
+            query = db.session.query(Transaction).filter(*period_filter)
+            cursor = request.args.get('cursor')
+            if cursor:
                 try:
-                    period_start = datetime.strptime(start_date, '%Y-%m-%d')
-                    period_end = datetime.strptime(end_date, '%Y-%m-%d').replace(hour=23, minute=59, second=59)
-                    if period_end < period_start:
-                        return {"message": "end_date must be after start_date"}, 400
-                except ValueError:
-                    return {"message": "Invalid date format, use YYYY-MM-DD"}, 400
-            else:
-                return {"message": "Invalid period, use 'month', 'week', 'year', or 'custom'"}, 400
-
-            # Convert period boundaries to strings for SQL comparison
-            period_start_str = period_start.strftime('%Y-%m-%d %H:%M:%S')
-            period_end_str = period_end.strftime('%Y-%m-%d %H:%M:%S')
-
-            # Fetch transactions within the period
-            transactions = db.session.query(Transaction).filter(
-                Transaction.customer_id == customer.id,
-                Transaction.deposit_date >= period_start_str,
-                Transaction.deposit_date <= period_end_str
-            ).order_by(Transaction.deposit_date.desc()).all()
+                    cursor_at, cursor_id = decode_cursor(cursor, (datetime.fromisoformat, int))
+                except ValueError as e:
+                    return {"message": str(e)}, 400
+                query = query.filter(keyset_before((Transaction.deposit_at, Transaction.id), (cursor_at, cursor_id)))
+            transactions = query.order_by(Transaction.deposit_at.desc(), Transaction.id.desc()).limit(limit + 1).all()
+
+            has_more = len(transactions) > limit
+            transactions = transactions[:limit]
+            next_cursor = encode_cursor(transactions[-1].deposit_at, transactions[-1].id) if has_more else None
 
             transactions_list = [
                 {
@@ -228,25 +342,22 @@ class CustomerTransactions(Resource):
                 for t in transactions
             ]
 
-            # Calculate trends
-            total_transactions = len(transactions)
-            deposit_count = sum(1 for t in transactions if t.sens == 'DEPOSIT')
-            withdrawal_count = sum(1 for t in transactions if t.sens == 'WITHDRAWAL')
-
-            deposit_percentage = (deposit_count / total_transactions * 100) if total_transactions > 0 else 0
-            withdrawal_percentage = (withdrawal_count / total_transactions * 100) if total_transactions > 0 else 0
-
-            trends = {
-                "deposit_percentage": round(deposit_percentage, 2),
-                "withdrawal_percentage": round(withdrawal_percentage, 2)
-            }
+            # Calculate trends over the whole period from the monthly summaries plus the raw edges and tail
+            totals = period_totals(customer.customer_code, period_start, period_end)
+            total_transactions, trends = trends_from_counts(
+                {DEPOSIT: totals['deposit_count'], WITHDRAWAL: totals['withdrawal_count']},
+                total=totals['transaction_count']
+            )
 
             response = {
                 "transactions": transactions_list,
                 "total_transactions": total_transactions,
-                "period_start": period_start_str,
-                "period_end": period_end_str,
-                "trends": trends
+                "period_start": period_start.strftime('%Y-%m-%d %H:%M:%S'),
+                "period_end": period_end.strftime('%Y-%m-%d %H:%M:%S'),
+                "trends": trends,
+                "limit": limit,
+                "has_more": has_more,
+                "next_cursor": next_cursor
             }
 
             current_app.logger.info(f"Transactions retrieved for customer_code: {customer_code}, period: {period}, trends: {trends}")
@@ -256,6 +367,89 @@ class CustomerTransactions(Resource):
             current_app.logger.error(f"Error fetching transactions: {str(e)}")
             return {"error": str(e)}, 500
 
+@api.route('/<string:customer_code>/transactions/series')
+class CustomerTransactionsSeries(Resource):
+    @jwt_required()
+    @api.marshal_with(series_response_model)
+    def get(self, customer_code):
+        identifiant = get_jwt_identity()
+        if customer_code != identifiant:
+            current_app.logger.warning(f"Access denied: {customer_code} does not match {identifiant}")
+            return {"message": "Access denied: You can only access your own transactions"}, 403
+
+        _, customer = resolve_identity(identifiant)
+        if not customer:
+            return {"message": "Customer not found"}, 404
+
+        bucket = request.args.get('bucket', 'day').lower()
+        if bucket not in BUCKETS:
+            return {"message": "Invalid bucket, use 'day', 'week' or 'month'"}, 400
+        try:
+            period, period_start, period_end = _period_bounds(request.args)
+        except ValueError as e:
+            return {"message": str(e)}, 400
+        if (period_end - period_start).days // BUCKET_DAYS[bucket] > MAX_SERIES_POINTS:
+            return {"message": f"Too many points, use a larger bucket (max {MAX_SERIES_POINTS})"}, 400
+
+        if bucket == 'month':
+            series = monthly_series(customer.customer_code, period_start, period_end)
+        else:
+            series = bucketed_series(_period_filter(customer, period_start, period_end), bucket, period_start, period_end)
+        return {
+            "bucket": bucket,
+            "period_start": period_start.strftime('%Y-%m-%d %H:%M:%S'),
+            "period_end": period_end.strftime('%Y-%m-%d %H:%M:%S'),
+            "series": series
+        }, 200
+
+@api.route('/<string:customer_code>/transactions/export')
+class CustomerTransactionsExport(Resource):
+    @jwt_required()
+    def get(self, customer_code):
+        identifiant = get_jwt_identity()
+        if customer_code != identifiant:
+            current_app.logger.warning(f"Access denied: {customer_code} does not match {identifiant}")
+            return {"message": "Access denied: You can only export your own transactions"}, 403
+
+        _, customer = resolve_identity(identifiant)
+        if not customer:
+            return {"message": "Customer not found"}, 404
+
+        export_format = request.args.get('format', 'csv').lower()
+        if export_format not in EXPORT_FORMATS:
+            return {"message": "Invalid format, use 'csv' or 'ndjson'"}, 400
+        try:
+            period, period_start, period_end = _period_bounds(request.args)
+        except ValueError as e:
+            return {"message": str(e)}, 400
+
+        # Server-side cursor (stream_results): rows are fetched yield_per at a time, memory stays flat
+        rows = db.session.query(
+            Transaction.id, Transaction.deposit_date, Transaction.deposit_at,
+            Transaction.montant, Transaction.sens, Transaction.libelle
+        ).filter(*_period_filter(customer, period_start, period_end)) \
+            .order_by(Transaction.deposit_at.desc(), Transaction.id.desc()) \
+            .execution_options(yield_per=current_app.config['TRANSACTIONS_EXPORT_YIELD_PER'])
+
+        def generate():
+            if export_format == 'csv':
+                yield _csv_line(EXPORT_COLUMNS)
+            for transaction_id, deposit_date, deposit_at, montant, sens, libelle in rows:
+                values = (transaction_id, deposit_date, deposit_at.isoformat() if deposit_at else None,
+                          str(montant) if montant is not None else "0", sens, libelle)
+                if export_format == 'csv':
+                    yield _csv_line(values)
+                else:
+                    yield json.dumps(dict(zip(EXPORT_COLUMNS, values)), ensure_ascii=False) + '\n'
+
+        filename = f"transactions_{customer_code}_{period}_{period_start:%Y%m%d}_{period_end:%Y%m%d}.{export_format}"
+        current_app.logger.info(f"Streaming {export_format} export for customer_code: {customer_code}, period: {period}")
+        return Response(
+            stream_with_context(generate()),
+            mimetype=EXPORT_FORMATS[export_format],
+            headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+        )
+
 @api.route('/<string:customer_code>/notifications')
 class CustomerNotifications(Resource):
     @jwt_required()
@@ -269,29 +463,116 @@ class CustomerNotifications(Resource):
                 current_app.logger.warning(f"Access denied: {customer_code} does not match {identifiant}")
                 return {"message": "Access denied: You can only access your own notifications"}, 403
 
-            customer = db.session.query(Customer).filter_by(customer_code=identifiant).first()
+            user, customer = resolve_identity(identifiant)
             if not customer:
                 current_app.logger.warning(f"No customer found for identifiant/customer_code: {identifiant}")
                 return {"message": "Customer not found"}, 404
 
-            # Récupérer les notifications de l'utilisateur
-            notifications = Notification.query.filter_by(user_id=customer.account_id).order_by(Notification.created_at.desc()).all()
-
-            notifications_data = [{
-                'id': notification.id,
-                'message': notification.message,
-                'created_at': str(notification.created_at) if notification.created_at else "Unknown"
-            } for notification in notifications]
+            # Récupérer une page de notifications de l'utilisateur (curseur sur created_at, id)
+            limit = page_size(
+                request.args.get('limit'),
+                current_app.config['NOTIFICATIONS_PAGE_SIZE'],
+                current_app.config['NOTIFICATIONS_PAGE_SIZE_MAX']
+            )
+            try:
+                notifications, next_cursor = notifications_page(user.id, request.args.get('cursor'), limit)
+            except ValueError as e:
+                return {"message": str(e)}, 400
 
             return {
                 'msg': 'Notifications récupérées avec succès',
-                'notifications': notifications_data
+                'notifications': [serialize_notification(notification) for notification in notifications],
+                'unread_count': unread_count(user.id),
+                'limit': limit,
+                'has_more': next_cursor is not None,
+                'next_cursor': next_cursor
             }, 200
 
         except Exception as e:
             current_app.logger.error(f"Error fetching notifications: {str(e)}")
             return {"error": str(e)}, 500
 
+@api.route('/<string:customer_code>/events')
+class CustomerEvents(Resource):
+    @jwt_required()
+    def get(self, customer_code):
+        """Server-Sent Events: new notifications, order status changes and notification broadcasts."""
+        identifiant = get_jwt_identity()
+        if customer_code != identifiant:
+            current_app.logger.warning(f"Access denied: {customer_code} does not match {identifiant}")
+            return {"message": "Access denied: You can only access your own events"}, 403
+
+        user, _ = resolve_identity(identifiant)
+        if not user:
+            return {"message": "Customer not found"}, 404
+        subscription = event_broker.subscribe([user_channel(user.id), CUSTOMERS_CHANNEL])
+        return sse_response(
+            subscription,
+            heartbeat=current_app.config['EVENTS_HEARTBEAT_SECONDS'],
+            max_seconds=current_app.config['EVENTS_STREAM_MAX_SECONDS']
+        )
+
+@api.route('/<string:customer_code>/notifications/unread-count')
+class CustomerUnreadNotifications(Resource):
+    @jwt_required()
+    @api.marshal_with(unread_count_model)
+    def get(self, customer_code):
+        identifiant = get_jwt_identity()
+        if customer_code != identifiant:
+            current_app.logger.warning(f"Access denied: {customer_code} does not match {identifiant}")
+            return {"message": "Access denied: You can only access your own notifications"}, 403
+
+        user, _ = resolve_identity(identifiant)
+        if not user:
+            return {"message": "Customer not found"}, 404
+        # Compteur maintenu à l'écriture : une lecture par clé primaire pour le badge de l'application
+        return {"unread_count": unread_count(user.id)}, 200
+
+@api.route('/<string:customer_code>/notifications/read')
+class CustomerReadNotifications(Resource):
+    @jwt_required()
+    @api.expect(mark_read_model)
+    @api.marshal_with(mark_read_response_model)
+    def post(self, customer_code):
+        identifiant = get_jwt_identity()
+        if customer_code != identifiant:
+            current_app.logger.warning(f"Access denied: {customer_code} does not match {identifiant}")
+            return {"message": "Access denied: You can only access your own notifications"}, 403
+
+        user, _ = resolve_identity(identifiant)
+        if not user:
+            return {"message": "Customer not found"}, 404
+
+        ids = (request.get_json(silent=True) or {}).get('ids')
+        if ids is not None and (not isinstance(ids, list) or not all(isinstance(i, int) for i in ids)):
+            return {"message": "ids must be a list of notification ids"}, 400
+        marked = mark_read(user.id, ids)
+        db.session.commit()
+        return {
+            "msg": "Notifications marquées comme lues",
+            "marked": marked,
+            "unread_count": unread_count(user.id)
+        }, 200
+
+def _profile_payload(customer):
+    """Contenu du profil, mis en cache par client comme le tableau de bord."""
+    # Calculer les informations de catégorie et pourcentage
+    jetons = customer.solde or 0
+    tier, percentage, tokens_to_next_tier = tier_table().position(jetons)
+    category_name = tier or customer.category or "Unknown"
+
+    profile = {
+        "first_name": customer.first_name,
+        "short_name": customer.short_name,
+        "agency": "RGK",
+        "jetons": jetons,
+        "category": category_name,
+        "percentage": round(percentage, 2),
+        "tokens_to_next_tier": tokens_to_next_tier
+    }
+    return profile
+
+
 @api.route('/<string:customer_code>/profile')
 class CustomerProfile(Resource):
     @jwt_required()
@@ -305,58 +586,129 @@ class CustomerProfile(Resource):
                 current_app.logger.warning(f"Access denied: {customer_code} does not match {identifiant}")
                 return {"message": "Access denied: You can only access your own profile"}, 403
 
-            customer = db.session.query(Customer).filter_by(customer_code=identifiant).first()
+            _, customer = resolve_identity(identifiant)
             if not customer:
                 current_app.logger.warning(f"No customer found for identifiant/customer_code: {identifiant}")
                 return {"message": "Customer not found"}, 404
 
-            # Calculer les informations de catégorie et pourcentage
-            category = customer.category
-            jetons = customer.solde or 0
-            category_name = category.category_name if category else "Unknown"
-
-            percentage = 0
-            tokens_to_next_tier = 0
-            for i, cat in enumerate(CATEGORIES):
-                if cat['min'] <= jetons < cat['max']:
-                    range_width = cat['max'] - cat['min']
-                    position_in_range = jetons - cat['min']
-                    percentage = (position_in_range / range_width) * 100 if range_width > 0 else 0
-                    if i + 1 < len(CATEGORIES):
-                        tokens_to_next_tier = CATEGORIES[i + 1]['min'] - jetons
-                    break
-            if not tokens_to_next_tier:
-                tokens_to_next_tier = 0
-
-            profile = {
-                "first_name": customer.first_name,
-                "short_name": customer.short_name,
-                "agency": "RGK",
-                "jetons": jetons,
-                "category": category_name,
-                "percentage": round(percentage, 2),
-                "tokens_to_next_tier": tokens_to_next_tier
-            }
+            entry = response_cache.get('profile', customer.customer_code)
+            if entry is None:
+                entry = response_cache.store('profile', customer.customer_code, _profile_payload(customer))
 
             current_app.logger.info(f"Profile retrieved for customer_code: {customer_code}")
-            return profile, 200
+            return conditional_response(entry)
 
         except Exception as e:
             current_app.logger.error(f"Error fetching profile: {str(e)}")
             return {"error": str(e)}, 500
 
+def _id_list(column):
+    """Agrégat des identifiants en une chaîne séparée par des virgules (ordre non garanti)."""
+    if db.session.get_bind().dialect.name == 'postgresql':
+        return func.string_agg(cast(column, String), ',')
+    return func.group_concat(column)
+
+
+def _me_counters(user_id, sections):
+    """Compteur de non-lues, résumé du panier et favoris en un seul aller-retour (sous-requêtes scalaires)."""
+    columns = []
+    cart = None
+    if 'unread_count' in sections:
+        columns.append(
+            select(NotificationCounter.unread).where(NotificationCounter.user_id == user_id)
+            .scalar_subquery().label('unread_count')
+        )
+    if 'favorite_ids' in sections:
+        columns.append(
+            select(_id_list(Favorite.reward_id)).where(Favorite.user_id == user_id)
+            .scalar_subquery().label('favorite_ids')
+        )
+    if 'cart' in sections:
+        # Agrégat sans GROUP BY : toujours une ligne, même panier vide
+        cart = select(
+            func.count(CartItem.id).label('cart_lines'),
+            func.coalesce(func.sum(CartItem.quantity), 0).label('cart_quantity'),
+            func.coalesce(func.sum(CartItem.quantity * Recompense.jeton), 0).label('cart_tokens')
+        ).join(Recompense, Recompense.id == CartItem.reward_id).where(CartItem.user_id == user_id).subquery()
+        columns.extend([cart.c.cart_lines, cart.c.cart_quantity, cart.c.cart_tokens])
+    if not columns:
+        return {}
+    statement = select(*columns)
+    if cart is not None:
+        statement = statement.select_from(cart)
+    return db.session.execute(statement).mappings().one()
+
+
+def _me_payload(customer, user, sections):
+    payload = {}
+    if 'profile' in sections or 'tier' in sections:
+        profile = response_cache.get('profile', customer.customer_code)
+        if profile is None:
+            profile = response_cache.store('profile', customer.customer_code, _profile_payload(customer))
+        if 'profile' in sections:
+            payload['profile'] = profile['payload']
+        if 'tier' in sections:
+            payload['tier'] = {name: profile['payload'][name] for name in TIER_FIELDS}
+    if 'last_transactions' in sections:
+        dashboard = response_cache.get('dashboard', customer.customer_code)
+        if dashboard is None:
+            dashboard = response_cache.store('dashboard', customer.customer_code, _dashboard_payload(customer))
+        payload['last_transactions'] = dashboard['payload']['last_transactions']
+
+    counters = _me_counters(user.id, sections)
+    if 'unread_count' in sections:
+        payload['unread_count'] = counters['unread_count'] or 0
+    if 'favorite_ids' in sections:
+        ids = counters['favorite_ids']
+        payload['favorite_ids'] = sorted(int(i) for i in ids.split(',')) if ids else []
+    if 'cart' in sections:
+        payload['cart'] = {
+            'items': counters['cart_lines'],
+            'quantity': int(counters['cart_quantity']),
+            'total_tokens': int(counters['cart_tokens']),
+            'purchase_possible': (customer.solde or 0) >= counters['cart_tokens']
+        }
+    return payload
+
+
+@api.route('/me')
+class CustomerMe(Resource):
+    @query_budget(6)
+    @jwt_required()
+    @api.doc(params={'fields': f"Comma-separated sections among {', '.join(ME_SECTIONS)} (all by default)"})
+    @api.response(200, 'Success', me_model)
+    def get(self):
+        """Everything the app needs at start-up in one call: profile, tier, last transactions, counters, cart and favorites."""
+        identifiant = get_jwt_identity()
+        requested = request.args.get('fields')
+        if requested:
+            sections = {name.strip() for name in requested.split(',') if name.strip()}
+            unknown = sorted(sections - set(ME_SECTIONS))
+            if unknown:
+                return {"message": f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(ME_SECTIONS)}"}, 400
+        else:
+            sections = set(ME_SECTIONS)
+
+        user, customer = resolve_identity(identifiant)
+        if not user or not customer:
+            current_app.logger.warning(f"No customer found for identifiant/customer_code: {identifiant}")
+            return {"message": "Customer not found"}, 404
+
+        # Profil et dernières transactions viennent des caches de réponses, le reste d'une seule requête
+        return conditional_response(make_entry(_me_payload(customer, user, sections)))
+
 @api.route('/logout')
 class CustomerLogout(Resource):
     @jwt_required()
     @api.marshal_with(logout_response_model)
     def post(self):
         try:
-            # Récupérer le JTI du token
-            jti = get_jwt()['jti']
-            # Ajouter le token à la liste noire
-            blacklisted_token = TokenBlacklist(jti=jti)
-            db.session.add(blacklisted_token)
-            db.session.commit()
+            # Récupérer le JTI et l'expiration du token
+            claims = get_jwt()
+            jti = claims['jti']
+            expires_at = datetime.utcfromtimestamp(claims['exp']) if 'exp' in claims else None
+            # Ajouter le token à la liste noire (effet immédiat dans ce processus)
+            revoked_tokens.revoke(jti, expires_at)
 
             current_app.logger.info(f"Customer logged out successfully, token JTI {jti} blacklisted")
             return {"msg": "Déconnexion réussie"}, 200
@@ -379,7 +731,7 @@ class InviteResource(Resource):
     def post(self):
         # Récupérer l'utilisateur connecté
         identifiant = get_jwt_identity()
-        user = Account.query.filter_by(identifiant=identifiant).first()
+        user, _ = resolve_identity(identifiant)
         if not user:
             return {'message': 'Utilisateur non trouvé'}, 404
 
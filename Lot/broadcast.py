@@ -0,0 +1,132 @@
+# Lot/broadcast.py
+import threading
+from datetime import datetime
+
+from sqlalchemy import func, select
+
+from extensions import db
+from Account.models import Account
+from Customer.models import Customer
+from Lot.models import NotificationBroadcast
+from Lot.notifications import insert_notifications
+from pubsub import CUSTOMERS_CHANNEL, queue_event
+
+
+def _recipients(categories=None):
+    """(Customer.id, Account.id) des clients destinataires, dans l'ordre des id clients."""
+    query = select(Customer.id, Account.id).join(Account, Account.identifiant == Customer.customer_code)
+    if categories is not None:
+        query = query.where(Customer.category.in_(categories))
+    return query
+
+
+def count_recipients(categories=None):
+    return db.session.execute(select(func.count()).select_from(_recipients(categories).subquery())).scalar()
+
+
+def create_broadcast(message, categories=None, created_by=None):
+    """Enregistre un envoi en attente (à valider par l'appelant) ; total est compté à la création."""
+    broadcast = NotificationBroadcast(
+        message=message,
+        categories=categories,
+        created_by=created_by,
+        total=count_recipients(categories)
+    )
+    db.session.add(broadcast)
+    db.session.flush()
+    return broadcast
+
+
+def claim_broadcast(broadcast_id, statuses=('pending',)):
+    """Passe l'envoi à running s'il est dans l'un des statuts donnés ; False si un autre processus l'a déjà pris."""
+    claimed = db.session.query(NotificationBroadcast) \
+        .filter(NotificationBroadcast.id == broadcast_id, NotificationBroadcast.status.in_(statuses)) \
+        .update({
+            NotificationBroadcast.status: 'running',
+            NotificationBroadcast.started_at: func.coalesce(NotificationBroadcast.started_at, datetime.utcnow()),
+            NotificationBroadcast.error: None
+        }, synchronize_session=False)
+    db.session.commit()
+    return claimed == 1
+
+
+def run_broadcast(broadcast_id, batch_size=5000, progress=None):
+    """Insère les notifications d'un envoi déjà réservé (claim_broadcast), une transaction par tranche.
+
+    Chaque tranche lit batch_size destinataires après last_customer_id, les insère par un INSERT
+    multi-lignes (compteurs de non-lues compris) et avance la progression dans la même transaction :
+    un envoi interrompu reprend sans doublon. Aucun événement SSE par destinataire (des centaines de
+    milliers de NOTIFY relus par chaque worker) : un seul événement broadcast est publié sur le canal
+    des clients une fois toutes les notifications insérées. Retourne le nombre de notifications envoyées.
+    """
+    broadcast = db.session.get(NotificationBroadcast, broadcast_id)
+    try:
+        while True:
+            rows = db.session.execute(
+                _recipients(broadcast.categories)
+                .where(Customer.id > broadcast.last_customer_id)
+                .order_by(Customer.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            now = datetime.utcnow()
+            insert_notifications([
+                {'user_id': account_id, 'message': broadcast.message, 'created_at': now} for _, account_id in rows
+            ], publish=False)
+            broadcast.sent += len(rows)
+            broadcast.last_customer_id = rows[-1][0]
+            db.session.commit()
+            if progress:
+                progress(broadcast.sent, broadcast.total)
+    except Exception as e:
+        db.session.rollback()
+        broadcast.status = 'failed'
+        broadcast.error = str(e)
+        broadcast.finished_at = datetime.utcnow()
+        db.session.commit()
+        raise
+    broadcast.status = 'completed'
+    broadcast.finished_at = datetime.utcnow()
+    # Des clients ont pu être créés depuis le comptage initial
+    broadcast.total = max(broadcast.total, broadcast.sent)
+    # Les clients connectés concernés (categories) rechargent leur compteur et leur liste
+    queue_event(db.session, CUSTOMERS_CHANNEL, 'broadcast', {
+        'broadcast_id': broadcast.id,
+        'message': broadcast.message,
+        'categories': broadcast.categories
+    })
+    db.session.commit()
+    return broadcast.sent
+
+
+def start_broadcast(app, broadcast_id):
+    """Traite l'envoi dans un thread du processus : la requête qui l'a créé répond sans attendre."""
+    def run():
+        with app.app_context():
+            try:
+                if claim_broadcast(broadcast_id):
+                    sent = run_broadcast(broadcast_id, batch_size=app.config['NOTIFICATION_BROADCAST_BATCH_SIZE'])
+                    app.logger.info(f"Envoi {broadcast_id} terminé : {sent} notifications")
+            except Exception as e:
+                app.logger.error(f"Envoi {broadcast_id} interrompu : {e}")
+            finally:
+                db.session.remove()
+
+    threading.Thread(target=run, name=f'notification-broadcast-{broadcast_id}', daemon=True).start()
+
+
+def serialize_broadcast(broadcast):
+    return {
+        'id': broadcast.id,
+        'message': broadcast.message,
+        'categories': broadcast.categories,
+        'status': broadcast.status,
+        'total': broadcast.total,
+        'sent': broadcast.sent,
+        'progress': round(broadcast.sent / broadcast.total * 100, 1) if broadcast.total else (100.0 if broadcast.status == 'completed' else 0.0),
+        'error': broadcast.error,
+        'created_at': str(broadcast.created_at) if broadcast.created_at else None,
+        'started_at': str(broadcast.started_at) if broadcast.started_at else None,
+        'finished_at': str(broadcast.finished_at) if broadcast.finished_at else None
+    }
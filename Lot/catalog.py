@@ -0,0 +1,121 @@
+# Lot/catalog.py
+import hashlib
+import json
+import threading
+from collections import namedtuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from Category.tiers import tier_table, tier_version
+from extensions import db
+from Lot.models import Recompense
+from Models.upsert import dialect_insert
+from Models.version_counter import CachedVersion, VersionCounter
+
+# Corps JSON déjà sérialisé d'une liste de récompenses et son ETag (empreinte du corps)
+CatalogEntry = namedtuple('CatalogEntry', ['etag', 'body', 'count'])
+
+# Incrémenté dans la transaction qui modifie lot_recompenses (ou par `flask bump-reward-catalog`)
+reward_catalog_version = CachedVersion('reward_catalog', refresh_seconds=5)
+
+
+def _entry(rewards):
+    body = json.dumps(rewards, separators=(',', ':')).encode('utf-8')
+    return CatalogEntry(hashlib.sha1(body).hexdigest(), body, len(rewards))
+
+
+EMPTY_ENTRY = _entry([])
+
+
+class RewardCatalog:
+    """Catalogue des récompenses, classé par palier et sérialisé une fois par version.
+
+    La clé est (version du catalogue, version des paliers) : une modification d'une récompense ou des
+    seuils de category_category reconstruit le catalogue au plus tard refresh_seconds après dans
+    chaque processus. Entre deux versions, servir une liste revient à une lecture de dictionnaire.
+    """
+
+    def __init__(self):
+        self._key = None
+        self._entries = None
+        self._lock = threading.Lock()
+
+    def get(self, category=None):
+        """Entrée de la catégorie demandée (toutes les récompenses si None, liste vide si inconnue)."""
+        key = (reward_catalog_version.get(), tier_version.get())
+        entries = self._entries
+        if entries is None or key != self._key:
+            with self._lock:
+                if self._entries is None or key != self._key:
+                    self._entries = self._build()
+                    self._key = key
+                entries = self._entries
+        return entries.get(category or None, EMPTY_ENTRY)
+
+    def invalidate(self):
+        with self._lock:
+            self._entries = None
+        reward_catalog_version.invalidate()
+
+    def _build(self):
+        rows = db.session.query(Recompense.id, Recompense.libelle, Recompense.jeton, Recompense.recompense_image) \
+            .order_by(Recompense.id) \
+            .all()
+        table = tier_table()
+        rewards = []
+        for (reward_id, libelle, jeton, image), index in zip(rows, table.indexes_for([row[2] for row in rows])):
+            rewards.append({
+                "id": reward_id,
+                "title": libelle,
+                "tokens_required": jeton,
+                "category": table.tiers[index].name if index >= 0 else None,
+                "image_url": image if image else None
+            })
+        # Tri par catégorie (stable : ordre des id dans une catégorie)
+        rewards.sort(key=lambda reward: reward['category'] or '')
+
+        by_category = {}
+        for reward in rewards:
+            by_category.setdefault(reward['category'], []).append(reward)
+        entries = {None: _entry(rewards)}
+        for category, items in by_category.items():
+            if category is not None:
+                entries[category] = _entry(items)
+        return entries
+
+
+reward_catalog = RewardCatalog()
+
+
+def _bump_statement(dialect):
+    """Upsert incrémentant le compteur reward_catalog (créé au besoin)."""
+    counters = VersionCounter.__table__
+    stmt = dialect_insert(counters, dialect)
+    return stmt.on_conflict_do_update(
+        index_elements=['name'],
+        set_={'version': counters.c.version + stmt.excluded.version}
+    )
+
+
+@event.listens_for(Recompense, 'after_insert')
+@event.listens_for(Recompense, 'after_update')
+@event.listens_for(Recompense, 'after_delete')
+def _reward_changed(mapper, connection, target):
+    # Même transaction que l'écriture : les autres processus voient la nouvelle version avec la récompense
+    connection.execute(_bump_statement(connection.dialect.name), {'name': reward_catalog_version.name, 'version': 1})
+    session = object_session(target)
+    if session is not None:
+        session.info['_reward_catalog_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    # Processus courant : reconstruction immédiate, sans attendre la relecture du compteur
+    if session.info.pop('_reward_catalog_changed', False):
+        reward_catalog.invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop('_reward_catalog_changed', None)
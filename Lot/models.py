@@ -92,11 +92,19 @@ class OrderItem(db.Model):
     reward = db.relationship('Recompense')
     
 class Notification(db.Model):
+    # Sous PostgreSQL : partitionnée par mois sur created_at, clé primaire (id, created_at) (Lot/partitions.py)
     __tablename__ = 'lot_notifications'
     id = db.Column(db.BigInteger, primary_key=True)
     user_id = db.Column(db.BigInteger, db.ForeignKey('accounts_account.id'), nullable=False)
     message = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    is_read = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+    read_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        # Pagination par curseur sur (created_at, id), du plus récent au plus ancien
+        db.Index('ix_lot_notifications_user_created_id', 'user_id', db.text('created_at DESC'), db.text('id DESC')),
+    )
 
     def save(self):
         db.session.add(self)
@@ -105,6 +113,35 @@ class Notification(db.Model):
     def __repr__(self):
         return f"<Notification user_id={self.user_id}>"
 
+class NotificationCounter(db.Model):
+    """Nombre de notifications non lues par utilisateur, tenu à jour à l'écriture (Lot/notifications.py)."""
+    __tablename__ = 'lot_notification_counters'
+    user_id = db.Column(db.BigInteger, db.ForeignKey('accounts_account.id'), primary_key=True)
+    unread = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<NotificationCounter user_id={self.user_id} unread={self.unread}>"
+
+class NotificationBroadcast(db.Model):
+    """Envoi d'une notification à tous les clients ou à des catégories, traité par tranches (Lot/broadcast.py)."""
+    __tablename__ = 'lot_notification_broadcasts'
+    id = db.Column(db.BigInteger, primary_key=True)
+    message = db.Column(db.Text, nullable=False)
+    categories = db.Column(db.JSON)  # None : tous les clients
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, running, completed, failed
+    total = db.Column(db.BigInteger, nullable=False, default=0)
+    sent = db.Column(db.BigInteger, nullable=False, default=0)
+    # Dernier Customer.id traité : une reprise repart de là sans doublon
+    last_customer_id = db.Column(db.BigInteger, nullable=False, default=0)
+    error = db.Column(db.Text)
+    created_by = db.Column(db.BigInteger, db.ForeignKey('accounts_account.id'))
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f"<NotificationBroadcast {self.id} {self.status} {self.sent}/{self.total}>"
+
 class ClientLot(db.Model):
     __tablename__ = 'lot_clientlot'
     id = db.Column(db.BigInteger, primary_key=True)
@@ -0,0 +1,139 @@
+# Lot/notifications.py
+from datetime import datetime
+
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+
+from extensions import db
+from Lot.models import Notification, NotificationCounter, Order
+from Models.upsert import dialect_insert
+from pagination import decode_cursor, encode_cursor, keyset_before
+from pubsub import ADMINS_CHANNEL, queue_event, user_channel
+
+_counters = NotificationCounter.__table__
+
+
+def _increment_statement(dialect=None):
+    """Upsert ajoutant `unread` au compteur de user_id (créé au besoin)."""
+    stmt = dialect_insert(_counters, dialect)
+    return stmt.on_conflict_do_update(
+        index_elements=['user_id'],
+        set_={'unread': _counters.c.unread + stmt.excluded.unread}
+    )
+
+
+def insert_notifications(rows, publish=True):
+    """INSERT multi-lignes de notifications puis mise à jour des compteurs de non-lues en une seule requête.
+
+    À utiliser pour les envois en masse (l'événement after_insert ne concerne que les objets ORM).
+    publish=False n'émet pas d'événement SSE par notification : les clients les voient au prochain
+    chargement du compteur de non-lues ou de la liste.
+    """
+    if not rows:
+        return 0
+    table = Notification.__table__
+    inserted = db.session.execute(
+        table.insert().returning(table.c.id, table.c.created_at, sort_by_parameter_order=True), rows
+    ).all()
+    unread = {}
+    for row, (notification_id, created_at) in zip(rows, inserted):
+        if not row.get('is_read'):
+            unread[row['user_id']] = unread.get(row['user_id'], 0) + 1
+            if publish:
+                queue_event(db.session, user_channel(row['user_id']), 'notification', {
+                    'id': notification_id,
+                    'message': row['message'],
+                    'created_at': str(created_at),
+                    'is_read': False,
+                    'read_at': None
+                })
+    if unread:
+        db.session.execute(_increment_statement(), [{'user_id': user_id, 'unread': count} for user_id, count in unread.items()])
+    return len(rows)
+
+
+@event.listens_for(Notification, 'after_insert')
+def _count_unread(mapper, connection, target):
+    if target.is_read is not True:
+        connection.execute(_increment_statement(connection.dialect.name), {'user_id': target.user_id, 'unread': 1})
+        # Poussée en direct (SSE) une fois la transaction validée
+        queue_event(object_session(target), user_channel(target.user_id), 'notification', serialize_notification(target))
+
+
+def _order_event(order, previous_status=None):
+    return {
+        'id': order.id,
+        'status': order.status,
+        'previous_status': previous_status,
+        'amount': order.amount,
+        'user_id': order.user_id
+    }
+
+
+@event.listens_for(Order, 'after_insert')
+def _order_created(mapper, connection, target):
+    # Nouvelle commande : signalée à la console d'administration
+    queue_event(object_session(target), ADMINS_CHANNEL, 'order', _order_event(target))
+
+
+@event.listens_for(Order, 'after_update')
+def _order_updated(mapper, connection, target):
+    history = db.inspect(target).attrs.status.history
+    if not history.has_changes():
+        return
+    previous_status = history.deleted[0] if history.deleted else None
+    session = object_session(target)
+    data = _order_event(target, previous_status)
+    queue_event(session, user_channel(target.user_id), 'order', data)
+    queue_event(session, ADMINS_CHANNEL, 'order', data)
+
+
+def unread_count(user_id):
+    """Lecture du compteur (clé primaire) : pas de parcours des notifications."""
+    return db.session.query(NotificationCounter.unread).filter(NotificationCounter.user_id == user_id).scalar() or 0
+
+
+def mark_read(user_id, ids=None):
+    """Marque comme lues les notifications ids de l'utilisateur (toutes si None), à valider par l'appelant.
+
+    Le compteur est décrémenté du nombre de lignes réellement passées à lues, ce qui reste exact
+    face à des insertions ou lectures concurrentes. Retourne ce nombre.
+    """
+    query = db.session.query(Notification).filter(Notification.user_id == user_id, Notification.is_read.is_(False))
+    if ids is not None:
+        query = query.filter(Notification.id.in_(ids))
+    marked = query.update({Notification.is_read: True, Notification.read_at: datetime.utcnow()}, synchronize_session=False)
+    if marked:
+        db.session.query(NotificationCounter) \
+            .filter(NotificationCounter.user_id == user_id) \
+            .update({NotificationCounter.unread: NotificationCounter.unread - marked}, synchronize_session=False)
+    return marked
+
+
+def notifications_page(user_id, cursor=None, limit=20):
+    """Page de notifications, de la plus récente à la plus ancienne : (notifications, curseur suivant ou None).
+
+    Parcours de l'index (user_id, created_at DESC, id DESC), des partitions récentes vers les anciennes,
+    arrêté à limit + 1 lignes. Pas de borne sur la fenêtre de rétention : la liste, le compteur de non-lues
+    et mark_read portent sur les mêmes lignes, jusqu'à leur purge par `flask prune-notifications`.
+    ValueError si le curseur est invalide.
+    """
+    query = Notification.query.filter(Notification.user_id == user_id)
+    if cursor:
+        created_at, notification_id = decode_cursor(cursor, (datetime.fromisoformat, int))
+        query = query.filter(keyset_before((Notification.created_at, Notification.id), (created_at, notification_id)))
+    notifications = query.order_by(Notification.created_at.desc(), Notification.id.desc()).limit(limit + 1).all()
+    if len(notifications) > limit:
+        notifications = notifications[:limit]
+        return notifications, encode_cursor(notifications[-1].created_at, notifications[-1].id)
+    return notifications, None
+
+
+def serialize_notification(notification):
+    return {
+        'id': notification.id,
+        'message': notification.message,
+        'created_at': str(notification.created_at) if notification.created_at else "Unknown",
+        'is_read': notification.is_read,
+        'read_at': str(notification.read_at) if notification.read_at else None
+    }
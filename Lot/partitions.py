@@ -0,0 +1,177 @@
+# Lot/partitions.py
+"""Partitions mensuelles de lot_notifications (PostgreSQL) et rétention.
+
+Sous PostgreSQL, la table est partitionnée par plage de created_at (migration c9f4b27e6a18) : une
+partition par mois, plus une partition DEFAULT pour les dates hors plage. La rétention détache ou
+supprime les partitions entières plus anciennes que l'horizon. Sur une table non partitionnée (SQLite,
+base créée par create_all), la rétention se replie sur des DELETE par tranches.
+"""
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import delete, text
+
+from extensions import db
+from Lot.models import Notification, NotificationCounter
+
+TABLE = 'lot_notifications'
+DEFAULT_PARTITION = f'{TABLE}_default'
+
+
+def month_start(value):
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def shift_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def retention_cutoff(months, now=None):
+    """Début de la fenêtre conservée : le mois courant et les `months` mois précédents."""
+    return shift_months(month_start(now or datetime.utcnow()), -months)
+
+
+def partition_name(month):
+    return f'{TABLE}_y{month.year:04d}m{month.month:02d}'
+
+
+def is_partitioned():
+    if db.session.get_bind().dialect.name != 'postgresql':
+        return False
+    return db.session.execute(
+        text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table))"),
+        {'table': TABLE}
+    ).scalar()
+
+
+def list_partitions():
+    """[(nom, début du mois)] des partitions mensuelles attachées, de la plus ancienne à la plus récente."""
+    names = db.session.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE pg_inherits.inhparent = to_regclass(:table)"
+    ), {'table': TABLE}).scalars()
+    partitions = []
+    for name in names:
+        try:
+            partitions.append((name, datetime.strptime(name[len(TABLE):], '_y%Ym%m')))
+        except ValueError:
+            continue  # partition DEFAULT
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def ensure_partitions(months_ahead=3, now=None):
+    """Crée les partitions du mois courant et des months_ahead mois suivants ; à valider par l'appelant.
+
+    Sans effet sur une table non partitionnée. Retourne les partitions créées.
+    """
+    if not is_partitioned():
+        return []
+    existing = {name for name, _ in list_partitions()}
+    created = []
+    current = month_start(now or datetime.utcnow())
+    for offset in range(months_ahead + 1):
+        month = shift_months(current, offset)
+        name = partition_name(month)
+        if name in existing:
+            continue
+        _create_partition(name, month, shift_months(month, 1))
+        created.append(name)
+    return created
+
+
+def _create_partition(name, start, end):
+    """Crée la partition [start, end) en y déplaçant les lignes déjà tombées dans la partition DEFAULT.
+
+    PostgreSQL refuse de créer une partition dont la plage a des lignes dans DEFAULT (tâche mensuelle
+    manquée) : la table est alors créée seule, remplie depuis DEFAULT puis attachée. Le verrou sur
+    DEFAULT (que la création parcourt de toute façon) empêche de nouvelles lignes d'y arriver entre la
+    vérification et l'attachement.
+    """
+    bounds = {'start': start, 'end': end}
+    values = f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+    db.session.execute(text(f"LOCK TABLE {DEFAULT_PARTITION} IN ACCESS EXCLUSIVE MODE"))
+    pending = db.session.execute(text(
+        f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE created_at >= :start AND created_at < :end)"
+    ), bounds).scalar()
+    if not pending:
+        db.session.execute(text(f"CREATE TABLE {name} PARTITION OF {TABLE} {values}"))
+        return
+    db.session.execute(text(f"CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    db.session.execute(text(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= :start AND created_at < :end RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ), bounds)
+    db.session.execute(text(f"ALTER TABLE {TABLE} ATTACH PARTITION {name} {values}"))
+
+
+def _decrement_counters(unread_by_user):
+    """Retire des compteurs de non-lues les notifications non lues purgées."""
+    if unread_by_user:
+        db.session.execute(
+            NotificationCounter.__table__.update()
+            .where(NotificationCounter.__table__.c.user_id == db.bindparam('counter_user_id'))
+            .values(unread=NotificationCounter.__table__.c.unread - db.bindparam('purged')),
+            [{'counter_user_id': user_id, 'purged': count} for user_id, count in unread_by_user]
+        )
+
+
+def apply_retention(months, archive=False, batch_size=10000, now=None, progress=None):
+    """Purge les notifications antérieures à retention_cutoff(months).
+
+    Table partitionnée : chaque partition entièrement hors fenêtre est détachée (archive=True, la table
+    reste en base pour export) ou supprimée, dans une transaction qui corrige aussi les compteurs de
+    non-lues. Sinon : DELETE par tranches de batch_size lignes (archivage non disponible).
+    progress(partitions traitées, lignes supprimées). Retourne (partitions traitées, lignes supprimées par DELETE).
+    """
+    cutoff = retention_cutoff(months, now)
+    if not is_partitioned():
+        if archive:
+            raise ValueError("L'archivage par partition nécessite une table lot_notifications partitionnée (PostgreSQL)")
+        return [], _delete_before(cutoff, batch_size, progress and (lambda deleted: progress(0, deleted)))
+
+    handled = []
+    for name, month in list_partitions():
+        if shift_months(month, 1) > cutoff:
+            break
+        # DETACH et DROP verrouillent de toute façon la table mère : la prendre avant la partition évite
+        # l'interblocage avec une écriture en cours, et aucune lecture ne peut modifier is_read d'ici la purge
+        db.session.execute(text(f"LOCK TABLE {TABLE}, {name} IN ACCESS EXCLUSIVE MODE"))
+        unread = db.session.execute(text(
+            f"SELECT user_id, count(*) FROM {name} WHERE NOT is_read GROUP BY user_id"
+        )).all()
+        _decrement_counters(unread)
+        if archive:
+            db.session.execute(text(f"ALTER TABLE {TABLE} DETACH PARTITION {name}"))
+        else:
+            db.session.execute(text(f"DROP TABLE {name}"))
+        db.session.commit()
+        handled.append(name)
+        if progress:
+            progress(len(handled), 0)
+    # Lignes hors plage tombées dans la partition DEFAULT (seule partition parcourue grâce à l'élagage)
+    return handled, 0 if archive else _delete_before(cutoff, batch_size)
+
+
+def _delete_before(cutoff, batch_size, progress=None):
+    deleted = 0
+    while True:
+        ids = db.session.query(Notification.id) \
+            .filter(Notification.created_at < cutoff) \
+            .order_by(Notification.id) \
+            .limit(batch_size) \
+            .scalar_subquery()
+        # État de is_read au moment de la suppression : une lecture validée entre-temps n'est pas décomptée deux fois
+        rows = db.session.execute(
+            delete(Notification).where(Notification.id.in_(ids)).returning(Notification.user_id, Notification.is_read)
+        ).all()
+        if not rows:
+            break
+        _decrement_counters(Counter(user_id for user_id, is_read in rows if not is_read).items())
+        db.session.commit()
+        deleted += len(rows)
+        if progress:
+            progress(deleted)
+    db.session.commit()
+    return deleted
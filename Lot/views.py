@@ -1,24 +1,19 @@
-from flask import Blueprint, current_app, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify
 from flask_restx import Api, Resource, fields
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from extensions import db
 from datetime import datetime
 from Lot.models import Recompense, Favorite, CartItem, Stock, Order, Notification
-from Account.models import Account
-from Customer.models import Customer
+from Customer.identity import resolve_identity
+from Category.tiers import tier_table
+from Lot.catalog import reward_catalog
+from Monitoring.query_counter import query_budget
 import uuid
+from werkzeug.http import quote_etag
 
 lot_bp = Blueprint('lot', __name__, url_prefix='/lot')
 api = Api(lot_bp, version='1.0', title='Lot API', description='API for lot and reward operations')
 
-# Define category ranges for rewards
-CATEGORIES = [
-    {"name": "Eco Premium", "min": 0, "max": 100},
-    {"name": "Executive", "min": 101, "max": 1000},
-    {"name": "Executive +", "min": 1001, "max": 3000},
-    {"name": "First Class", "min": 3001, "max": float('inf')}
-]
-
 # Define response models for rewards
 reward_model = api.model('Reward', {
     'id': fields.Integer(description='Reward ID'),
@@ -72,52 +67,29 @@ orders_response_model = api.model('OrdersResponse', {
 @api.route('/rewards', methods=['GET'])
 class ListRewards(Resource):
     @jwt_required()
-    @api.marshal_with(reward_model, as_list=True)
+    @api.response(200, 'Success', [reward_model])
     def get(self):
         user_id = get_jwt_identity()
-        user = Account.query.filter_by(identifiant=user_id).first()
+        user, _ = resolve_identity(user_id)
         if not user:
             api.abort(404, "Utilisateur non trouvé")
 
-        # Get all rewards
-        rewards = Recompense.query.all()
+        # Catalogue classé par palier et sérialisé une fois par version (Lot/catalog.py)
         requested_category = request.args.get('category')
+        entry = reward_catalog.get(requested_category)
+        headers = {'ETag': quote_etag(entry.etag), 'Cache-Control': 'private, no-cache'}
+        if request.if_none_match.contains(entry.etag):
+            return Response(status=304, headers=headers)
 
-        # Assign category to each reward based on tokens (jeton)
-        rewards_with_category = []
-        for r in rewards:
-            jeton = r.jeton
-            category = None
-            for cat in CATEGORIES:
-                if cat['min'] <= jeton <= cat['max']:
-                    category = cat['name']
-                    break
-            rewards_with_category.append({
-                "id": r.id,
-                "title": r.libelle,
-                "tokens_required": r.jeton,
-                "category": category,
-                "image_url": r.recompense_image if r.recompense_image else None
-            })
-
-        # Sort rewards by category
-        rewards_with_category.sort(key=lambda x: x['category'] or '')
-
-        # Filter by category if requested
-        if requested_category:
-            filtered_rewards = [r for r in rewards_with_category if r['category'] == requested_category]
-        else:
-            filtered_rewards = rewards_with_category
-
-        current_app.logger.info(f"Rewards retrieved for user {user_id}, requested category: {requested_category}, total: {len(filtered_rewards)}")
-        return filtered_rewards
+        current_app.logger.info(f"Rewards retrieved for user {user_id}, requested category: {requested_category}, total: {entry.count}")
+        return Response(entry.body, mimetype='application/json', headers=headers)
 
 @api.route('/rewards/<int:reward_id>/favorite', methods=['POST'])
 class ToggleFavorite(Resource):
     @jwt_required()
     def post(self, reward_id):
         user_id = get_jwt_identity()
-        user = Account.query.filter_by(identifiant=user_id).first()
+        user, _ = resolve_identity(user_id)
         if not user:
             api.abort(404, "Utilisateur non trouvé")
 
@@ -140,26 +112,30 @@ class ToggleFavorite(Resource):
 
 @api.route('/favorites', methods=['GET'])
 class GetFavorites(Resource):
+    @query_budget(5)
     @jwt_required()
     @api.marshal_with(favorites_response_model)
     def get(self):
         user_id = get_jwt_identity()
-        user = Account.query.filter_by(identifiant=user_id).first()
+        user, _ = resolve_identity(user_id)
         if not user:
             api.abort(404, "Utilisateur non trouvé")
 
-        favorites = Favorite.query.filter_by(user_id=user.id).all()
+        # Récompenses favorites chargées en une seule requête jointe
+        rewards = Recompense.query.join(Favorite, Favorite.reward_id == Recompense.id) \
+            .filter(Favorite.user_id == user.id) \
+            .order_by(Favorite.id) \
+            .all()
+        tiers = tier_table()
         favorite_rewards = []
-        for fav in favorites:
-            reward = Recompense.query.get(fav.reward_id)
-            if reward:
-                favorite_rewards.append({
-                    "id": reward.id,
-                    "title": reward.libelle,
-                    "tokens_required": reward.jeton,
-                    "category": next((cat['name'] for cat in CATEGORIES if cat['min'] <= reward.jeton <= cat['max']), None),
-                    "image_url": reward.recompense_image if reward.recompense_image else None
-                })
+        for reward in rewards:
+            favorite_rewards.append({
+                "id": reward.id,
+                "title": reward.libelle,
+                "tokens_required": reward.jeton,
+                "category": tiers.name_for(reward.jeton),
+                "image_url": reward.recompense_image if reward.recompense_image else None
+            })
 
         return {"count": len(favorite_rewards), "items": favorite_rewards}
 
@@ -168,7 +144,7 @@ class AddToCart(Resource):
     @jwt_required()
     def post(self):
         user_id = get_jwt_identity()
-        user = Account.query.filter_by(identifiant=user_id).first()
+        user, _ = resolve_identity(user_id)
         if not user:
             api.abort(404, "Utilisateur non trouvé")
 
@@ -209,35 +185,36 @@ class AddToCart(Resource):
 
 @api.route('/cart', methods=['GET'])
 class ViewCart(Resource):
+    @query_budget(5)
     @jwt_required()
     @api.marshal_with(cart_response_model)
     def get(self):
         user_id = get_jwt_identity()
-        user = Account.query.filter_by(identifiant=user_id).first()
+        user, customer = resolve_identity(user_id)
         if not user:
             api.abort(404, "Utilisateur non trouvé")
 
-        cart_items = CartItem.query.filter_by(user_id=user.id).all()
+        cart_items = db.session.query(CartItem, Recompense) \
+            .join(Recompense, Recompense.id == CartItem.reward_id) \
+            .filter(CartItem.user_id == user.id) \
+            .order_by(CartItem.id) \
+            .all()
         transactions = []
         total_required = 0
-        # Récupérer le client associé à l'utilisateur via customer_code
-        customer = Customer.query.filter_by(customer_code=user_id).first()
         jetons_disponibles = customer.solde if customer else 0
 
-        for item in cart_items:
-            reward = Recompense.query.get(item.reward_id)
-            if reward:
-                transaction = {
-                    "id": item.id,
-                    "title": reward.libelle,
-                    "quantity": item.quantity,
-                    "tokens_required_per_item": reward.jeton,
-                    "total_tokens": item.quantity * reward.jeton,
-                    "image_url": reward.recompense_image if reward.recompense_image else None,
-                    "transaction_id": str(uuid.uuid4())
-                }
-                transactions.append(transaction)
-                total_required += item.quantity * reward.jeton
+        for item, reward in cart_items:
+            transaction = {
+                "id": item.id,
+                "title": reward.libelle,
+                "quantity": item.quantity,
+                "tokens_required_per_item": reward.jeton,
+                "total_tokens": item.quantity * reward.jeton,
+                "image_url": reward.recompense_image if reward.recompense_image else None,
+                "transaction_id": str(uuid.uuid4())
+            }
+            transactions.append(transaction)
+            total_required += item.quantity * reward.jeton
 
         achat_possible = jetons_disponibles >= total_required
         notifications = ["Vérifiez vos jetons disponibles avant l'achat."] if not achat_possible else []
@@ -252,27 +229,27 @@ class ViewCart(Resource):
 
 @api.route('/place-order', methods=['POST'])
 class PlaceOrder(Resource):
+    @query_budget(10)
     @jwt_required()
     def post(self):
         user_id = get_jwt_identity()
-        user = Account.query.filter_by(identifiant=user_id).first()
+        user, customer = resolve_identity(user_id)
         if not user:
             api.abort(404, "Utilisateur non trouvé")
 
-        # Récupérer le client associé à l'utilisateur via customer_code
-        customer = Customer.query.filter_by(customer_code=user_id).first()
+        # Client associé à l'utilisateur via customer_code (résolu avec le compte)
         if not customer:
             api.abort(404, "Client non trouvé")
 
-        cart_items = CartItem.query.filter_by(user_id=user.id).all()
-        if not cart_items:
+        cart_rows = db.session.query(CartItem, Recompense) \
+            .outerjoin(Recompense, Recompense.id == CartItem.reward_id) \
+            .filter(CartItem.user_id == user.id) \
+            .all()
+        if not cart_rows:
             api.abort(400, "Panier vide")
 
-        total_amount = 0
-        for item in cart_items:
-            reward = Recompense.query.get(item.reward_id)
-            if reward:
-                total_amount += item.quantity * reward.jeton
+        cart_items = [item for item, _ in cart_rows]
+        total_amount = sum(item.quantity * reward.jeton for item, reward in cart_rows if reward)
 
         # Create order without debiting tokens
         order = Order(user_id=user.id, customer_id=customer.id, amount=total_amount, contact="N/A")
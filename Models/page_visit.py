@@ -6,6 +6,7 @@ class PageVisit(db.Model):
     __tablename__ = 'page_visits'
     id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
     path = db.Column(db.String(255), nullable=False)
+    route = db.Column(db.String(255), nullable=True)  # Règle d'URL Flask (request.url_rule)
     user_id = db.Column(db.BigInteger, db.ForeignKey('accounts_account.id'), nullable=True)
     timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     user = db.relationship('Account', backref='page_visits')
@@ -0,0 +1,20 @@
+# models/page_visit_rollup.py
+from extensions import db
+
+
+class PageVisitRollup(db.Model):
+    __tablename__ = 'page_visit_rollups'
+    id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    granularity = db.Column(db.String(5), nullable=False)  # hour, day
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    route = db.Column(db.String(255), nullable=False)  # Règle d'URL Flask (ex: /customer/<string:customer_code>/dashboard)
+    hits = db.Column(db.BigInteger, nullable=False, default=0)
+    distinct_users = db.Column(db.Integer, nullable=False, default=0)  # Estimation issue de users_hll
+    users_hll = db.Column(db.LargeBinary)  # Sketch HyperLogLog compressé des utilisateurs distincts
+
+    __table_args__ = (
+        db.UniqueConstraint('granularity', 'bucket_start', 'route', name='uq_page_visit_rollups_bucket_route'),
+    )
+
+    def __repr__(self):
+        return f"<PageVisitRollup {self.granularity} {self.bucket_start} route={self.route} hits={self.hits}>"
@@ -0,0 +1,41 @@
+# models/upsert.py
+from extensions import db
+
+
+def dialect_insert(table, dialect=None):
+    """Retourne un INSERT supportant ON CONFLICT pour le dialecte courant (PostgreSQL ou SQLite).
+
+    dialect permet de l'utiliser hors session (connexion d'un événement de mapper, migration).
+    """
+    dialect = dialect or db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Upsert non supporté pour le dialecte {dialect}")
+    return insert(table)
+
+
+def upsert_add(table, rows, index_elements, add_columns):
+    """Insère les lignes ou, en cas de conflit sur index_elements, ajoute les valeurs de add_columns."""
+    if not rows:
+        return
+    stmt = dialect_insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=index_elements,
+        set_={column: table.c[column] + stmt.excluded[column] for column in add_columns}
+    )
+    db.session.execute(stmt, rows)
+
+
+def upsert_replace(table, rows, index_elements, set_columns):
+    """Insère les lignes ou, en cas de conflit sur index_elements, remplace les valeurs de set_columns."""
+    if not rows:
+        return
+    stmt = dialect_insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=index_elements,
+        set_={column: stmt.excluded[column] for column in set_columns}
+    )
+    db.session.execute(stmt, rows)
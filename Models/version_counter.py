@@ -0,0 +1,70 @@
+# models/version_counter.py
+import threading
+import time
+
+from extensions import db
+from Models.upsert import dialect_insert, upsert_add
+
+
+class VersionCounter(db.Model):
+    __tablename__ = 'version_counters'
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+
+    @classmethod
+    def current(cls, name):
+        counter = db.session.get(cls, name)
+        return counter.version if counter else 0
+
+    @classmethod
+    def bump(cls, name):
+        """Incrémente le compteur de manière atomique (à valider par l'appelant)."""
+        upsert_add(cls.__table__, [{'name': name, 'version': 1}], index_elements=['name'], add_columns=['version'])
+        db.session.flush()
+
+    @classmethod
+    def set(cls, name, value):
+        """Fixe la valeur du compteur (filigranes) ; à valider par l'appelant."""
+        stmt = dialect_insert(cls.__table__).values(name=name, version=value)
+        db.session.execute(stmt.on_conflict_do_update(index_elements=['name'], set_={'version': stmt.excluded.version}))
+        db.session.flush()
+
+    @classmethod
+    def lock(cls, name):
+        """Crée le compteur au besoin puis le verrouille jusqu'à la fin de la transaction ; retourne sa valeur."""
+        upsert_add(cls.__table__, [{'name': name, 'version': 0}], index_elements=['name'], add_columns=['version'])
+        return db.session.query(cls.version).filter(cls.name == name).with_for_update().scalar()
+
+    def __repr__(self):
+        return f"<VersionCounter {self.name}={self.version}>"
+
+
+class CachedVersion:
+    """Lecture d'un VersionCounter mise en cache dans le processus, relue au plus toutes les refresh_seconds."""
+
+    def __init__(self, name, refresh_seconds=5):
+        self.name = name
+        self.refresh_seconds = refresh_seconds
+        self._version = None
+        self._read_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._version is None or time.monotonic() - self._read_at >= self.refresh_seconds:
+            version = VersionCounter.current(self.name)
+            with self._lock:
+                self._version = version
+                self._read_at = time.monotonic()
+        return self._version
+
+    def bump(self):
+        VersionCounter.bump(self.name)
+        db.session.commit()
+        self.invalidate()
+
+    def invalidate(self):
+        with self._lock:
+            self._version = None
+
+    def __repr__(self):
+        return f"<CachedVersion {self.name}={self._version}>"
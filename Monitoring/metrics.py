@@ -0,0 +1,241 @@
+# Monitoring/metrics.py
+import hmac
+import threading
+import time
+from bisect import bisect_left
+
+from flask import Response, abort, current_app, g, request
+from flask_jwt_extended import verify_jwt_in_request
+from sqlalchemy import event
+from sqlalchemy.pool import Pool
+
+from extensions import db
+from Account.roles import ROLE_ADMIN, ROLE_SUPER_ADMIN, current_role
+from Analytics.rollup import UNMATCHED_ROUTE
+
+# Bornes (secondes) des histogrammes de latence : de 5 ms à 10 s
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def header(self):
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+
+
+class Counter(_Metric):
+    type = 'counter'
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = self.header()
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}')
+        return lines
+
+
+class Gauge(Counter):
+    type = 'gauge'
+
+    def dec(self, labels=(), amount=1):
+        self.inc(labels, -amount)
+
+    def set(self, labels=(), value=0):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, labels=()):
+        # Un seul compteur incrémenté par observation ; les cumuls sont calculés à l'export
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = self.header()
+        with self._lock:
+            items = sorted((labels, ([*counts], total, count)) for labels, (counts, total, count) in self._values.items())
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = (('le', _format_value(float(bound))),)
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}')
+            lines.append(f'{self.name}_count{_format_labels(self.labelnames, labels)} {count}')
+        return lines
+
+
+class MetricsRegistry:
+    """Registre en mémoire (par processus) exporté au format texte Prometheus."""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector):
+        """Fonction appelée à chaque export pour mettre à jour des jauges (ex : état du pool)."""
+        self._collectors.append(collector)
+
+    def render(self):
+        for collector in self._collectors:
+            collector()
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+
+registry = MetricsRegistry()
+
+REQUEST_LATENCY = registry.histogram(
+    'witti_http_request_duration_seconds', 'Durée des requêtes HTTP', ('method', 'route', 'blueprint')
+)
+REQUESTS_TOTAL = registry.counter(
+    'witti_http_requests_total', 'Requêtes HTTP par code de statut', ('method', 'route', 'blueprint', 'status')
+)
+REQUESTS_IN_FLIGHT = registry.gauge('witti_http_requests_in_flight', 'Requêtes HTTP en cours de traitement')
+DB_POOL_CHECKOUTS = registry.counter('witti_db_pool_checkouts_total', 'Connexions empruntées au pool')
+DB_POOL_CONNECTIONS = registry.counter('witti_db_pool_connections_created_total', 'Connexions ouvertes par le pool')
+DB_POOL_CHECKED_OUT = registry.gauge('witti_db_pool_checked_out', 'Connexions actuellement empruntées')
+DB_POOL_SIZE = registry.gauge('witti_db_pool_size', 'Taille configurée du pool')
+DB_POOL_OVERFLOW = registry.gauge('witti_db_pool_overflow', 'Connexions ouvertes au-delà de la taille du pool')
+
+
+@event.listens_for(Pool, 'checkout')
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    DB_POOL_CHECKOUTS.inc()
+
+
+@event.listens_for(Pool, 'connect')
+def _on_connect(dbapi_connection, connection_record):
+    DB_POOL_CONNECTIONS.inc()
+
+
+class RequestMetrics:
+    """Mesure durée, statut et requêtes en cours pour chaque requête, étiquetées par règle d'URL.
+
+    Le coût par requête se limite à deux lectures d'horloge et quelques incréments sous verrou.
+    """
+
+    def __init__(self):
+        self.app = None
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['metrics'] = self
+        if not app.config['METRICS_ENABLED']:
+            return
+        app.before_request(self._start)
+        app.after_request(self._record)
+        app.teardown_request(self._teardown)
+        registry.add_collector(self._collect_pool)
+        app.add_url_rule(app.config['METRICS_PATH'], 'metrics', self.metrics_view)
+
+    def metrics_view(self):
+        self._authorize()
+        return Response(registry.render(), content_type=CONTENT_TYPE)
+
+    def _authorize(self):
+        # Jeton dédié au collecteur (Authorization: Bearer <METRICS_TOKEN>) ou JWT administrateur
+        token = current_app.config.get('METRICS_TOKEN')
+        authorization = request.headers.get('Authorization', '')
+        if token and hmac.compare_digest(authorization, f'Bearer {token}'):
+            return
+        try:
+            verify_jwt_in_request()
+        except Exception:
+            abort(401)
+        if current_role() not in (ROLE_ADMIN, ROLE_SUPER_ADMIN):
+            abort(403)
+
+    def _start(self):
+        g._metrics_start = time.perf_counter()
+        REQUESTS_IN_FLIGHT.inc()
+
+    def _record(self, response):
+        self._observe(response.status_code)
+        return response
+
+    def _teardown(self, exc):
+        # after_request n'est pas appelé lorsqu'une exception n'a pas été gérée
+        if g.get('_metrics_start') is not None:
+            self._observe(500)
+
+    def _observe(self, status):
+        start = g.pop('_metrics_start', None)
+        if start is None:
+            return
+        REQUESTS_IN_FLIGHT.dec()
+        route = request.url_rule.rule if request.url_rule else UNMATCHED_ROUTE
+        blueprint = request.blueprint or ''
+        REQUEST_LATENCY.observe(time.perf_counter() - start, (request.method, route, blueprint))
+        REQUESTS_TOTAL.inc((request.method, route, blueprint, str(status)))
+
+    def _collect_pool(self):
+        with self.app.app_context():
+            pool = db.engine.pool
+        for gauge, method in ((DB_POOL_CHECKED_OUT, 'checkedout'), (DB_POOL_SIZE, 'size'), (DB_POOL_OVERFLOW, 'overflow')):
+            # Certains pools (SQLite, NullPool) n'exposent pas ces compteurs
+            if hasattr(pool, method):
+                gauge.set(value=getattr(pool, method)())
+
+
+request_metrics = RequestMetrics()
@@ -0,0 +1,158 @@
+# Monitoring/query_counter.py
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Levée lorsqu'un endpoint (ou un bloc de test) dépasse son budget de requêtes SQL."""
+
+    def __init__(self, label, budget, stats):
+        self.label = label
+        self.budget = budget
+        self.stats = stats
+        lines = [f"{label} : {stats.count} requêtes SQL exécutées (budget : {budget})"]
+        for statement, count in stats.repeated(2):
+            lines.append(f"  {count} x {_shorten(statement)}")
+        super().__init__("\n".join(lines))
+
+
+class QueryStats:
+    """Compteurs SQL d'une requête HTTP ou d'un bloc assert_max_queries."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def record(self, statement, duration):
+        self.count += 1
+        self.duration += duration
+        self.statements[statement] += 1
+
+    @property
+    def duration_ms(self):
+        return round(self.duration * 1000, 2)
+
+    def repeated(self, threshold):
+        """Requêtes identiques (même SQL, paramètres différents) exécutées au moins threshold fois : signe d'un N+1."""
+        return [(statement, count) for statement, count in self.statements.most_common() if count >= threshold]
+
+
+# Collecteurs actifs hors requête HTTP (assert_max_queries), par thread
+_local = threading.local()
+
+
+def _active_collectors():
+    collectors = list(getattr(_local, 'collectors', ()))
+    if has_app_context():
+        stats = g.get('_query_stats')
+        if stats is not None:
+            collectors.append(stats)
+    return collectors
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('_query_start')
+    duration = time.perf_counter() - starts.pop() if starts else 0.0
+    for stats in _active_collectors():
+        stats.record(statement, duration)
+
+
+def _shorten(statement, length=200):
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= length else statement[:length] + "..."
+
+
+class QueryCounter:
+    """Compte les requêtes SQL et le temps passé en base pour chaque requête HTTP.
+
+    Les totaux sont renvoyés dans les en-têtes X-DB-Query-Count / X-DB-Time-Ms et journalisés ;
+    les requêtes répétées au-delà de SQL_N_PLUS_ONE_THRESHOLD sont signalées comme N+1 probables.
+    """
+
+    def __init__(self):
+        self.app = None
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config['SQL_QUERY_STATS_ENABLED']
+        self.strict = app.config['SQL_QUERY_BUDGET_STRICT']
+        self.n_plus_one_threshold = app.config['SQL_N_PLUS_ONE_THRESHOLD']
+        app.extensions['query_counter'] = self
+        if not self.enabled:
+            return
+        app.before_request(self._start)
+        app.after_request(self._report)
+
+    def _start(self):
+        g._query_stats = QueryStats()
+
+    def _report(self, response):
+        stats = g.pop('_query_stats', None)
+        if stats is None:
+            return response
+        response.headers['X-DB-Query-Count'] = str(stats.count)
+        response.headers['X-DB-Time-Ms'] = str(stats.duration_ms)
+        route = request.url_rule.rule if request.url_rule else request.path
+        current_app.logger.info(
+            f"{request.method} {route} : {stats.count} requêtes SQL en {stats.duration_ms} ms"
+        )
+        for statement, count in stats.repeated(self.n_plus_one_threshold):
+            current_app.logger.warning(
+                f"N+1 probable sur {request.method} {route} : {count} x {_shorten(statement)}"
+            )
+        return response
+
+
+def query_budget(max_queries):
+    """Déclare le nombre maximal de requêtes SQL d'un endpoint (authentification JWT comprise).
+
+    En mode strict (SQL_QUERY_BUDGET_STRICT, typiquement en test), un dépassement lève
+    QueryBudgetExceeded ; sinon il est seulement journalisé.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            result = fn(*args, **kwargs)
+            stats = g.get('_query_stats')
+            if stats is not None and stats.count > max_queries:
+                error = QueryBudgetExceeded(f"{request.method} {request.path}", max_queries, stats)
+                if current_app.config['SQL_QUERY_BUDGET_STRICT']:
+                    raise error
+                current_app.logger.warning(str(error))
+            return result
+        wrapper.query_budget = max_queries
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def assert_max_queries(max_queries, label="Bloc"):
+    """Échoue si le bloc exécute plus de max_queries requêtes SQL (tests, benchmarks)."""
+    stats = QueryStats()
+    collectors = getattr(_local, 'collectors', None)
+    if collectors is None:
+        collectors = _local.collectors = []
+    collectors.append(stats)
+    try:
+        yield stats
+    finally:
+        collectors.remove(stats)
+    if stats.count > max_queries:
+        raise QueryBudgetExceeded(label, max_queries, stats)
+
+
+query_counter = QueryCounter()
@@ -3,8 +3,7 @@ from flask_restx import Api, Resource, fields
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from extensions import db
 from Survey.models import Survey, SurveyOption, SurveyResponse
-from Account.models import Account
-from Customer.models import Customer
+from Customer.identity import resolve_identity
 
 survey_bp = Blueprint('survey', __name__, url_prefix='/survey')
 api = Api(survey_bp, version='1.0', title='Survey API', description='API for survey operations')
@@ -37,7 +36,7 @@ class ListSurveys(Resource):
     @api.marshal_with(survey_model, as_list=True)
     def get(self):
         user_id = get_jwt_identity()
-        user = Account.query.filter_by(identifiant=user_id).first()
+        user, _ = resolve_identity(user_id)
         if not user:
             api.abort(404, "Utilisateur non trouvé")
 
@@ -61,12 +60,11 @@ class RespondToSurvey(Resource):
     @api.marshal_with(survey_response_model, code=201)
     def post(self, survey_id):
         user_identifiant = get_jwt_identity()
-        user = Account.query.filter_by(identifiant=user_identifiant).first()
+        user, customer = resolve_identity(user_identifiant)
         if not user:
             current_app.logger.error(f"Utilisateur non trouvé pour identifiant {user_identifiant}")
             api.abort(404, "Utilisateur non trouvé")
 
-        customer = Customer.query.filter_by(customer_code=user_identifiant).first()
         if not customer:
             current_app.logger.error(f"Client non trouvé pour identifiant {user_identifiant}")
             api.abort(404, "Client non trouvé")
@@ -1,12 +1,22 @@
 # app.py
 import logging
-from flask import Flask, request, send_from_directory
+import time
+from flask import Flask, g, request, send_from_directory
 from flask_cors import CORS
 from flask_jwt_extended import get_jwt_identity
 from Models.page_visit import PageVisit  # Corrigé de Models à models
+from Models.page_visit_rollup import PageVisitRollup
 from Models.referral import Referral  # Corrigé de Models à models
 from config import Config
 from extensions import db, ma, jwt, migrate
+from Analytics.visit_buffer import visit_buffer
+from Analytics.rollup import UNMATCHED_ROUTE
+from Account.revocation import revoked_tokens
+import Customer.identity as customer_identity
+from Customer.response_cache import response_cache
+from Monitoring.query_counter import query_counter
+from Monitoring.metrics import request_metrics
+from pubsub import event_broker
 
 # Importation des modèles
 from Account.models import Account
@@ -17,17 +27,26 @@ from Category.models import Category
 from Lot.models import Recompense, Favorite, CartItem, Stock, Order, Notification, OrderItem
 from Resultat.models import ResultatCriteria, ResultatTotal, ResultatPoint, ClientRecompense
 from Models.token_blacklist import TokenBlacklist  # Corrigé de Models à models
+from Models.version_counter import VersionCounter
 from Support.models import SupportRequest
 
 @jwt.token_in_blocklist_loader
 def check_if_token_is_revoked(jwt_header, jwt_payload):
+    # Un token expiré ne peut plus être validé : inutile de consulter la liste noire
+    exp = jwt_payload.get('exp')
+    if exp is not None and exp < time.time():
+        return False
+    # Cache local des JTI révoqués : la table token_blacklist n'est relue que périodiquement.
+    # Résultat mémorisé dans g : les sous-requêtes de /batch partagent le contexte d'application du lot
+    checked = g.setdefault('_revocation_checks', {})
     jti = jwt_payload['jti']
-    token = db.session.query(TokenBlacklist).filter_by(jti=jti).first()
-    return token is not None
+    if jti not in checked:
+        checked[jti] = revoked_tokens.is_revoked(jti)
+    return checked[jti]
 
-def create_app():
+def create_app(config_class=Config):
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.config.from_object(config_class)
     CORS(app)
 
     # Configure logging
@@ -41,6 +60,16 @@ def create_app():
     ma.init_app(app)
     jwt.init_app(app)
     migrate.init_app(app, db)
+    revoked_tokens.init_app(app)
+    customer_identity.init_app(app)
+    response_cache.init_app(app)
+    query_counter.init_app(app)
+    request_metrics.init_app(app)
+    event_broker.init_app(app)
+
+    # Commandes CLI (flask <commande>)
+    from commands import register_commands
+    register_commands(app)
 
     # Importation des blueprints après l'initialisation
     from Account.views import accounts_bp
@@ -50,6 +79,7 @@ def create_app():
     from Faq.views import faq_bp
     from Support.views import support_bp
     from Survey.views import survey_bp
+    from Batch.views import batch_bp
 
     # Enregistrement des blueprints
     app.register_blueprint(accounts_bp, url_prefix='/accounts')
@@ -59,31 +89,27 @@ def create_app():
     app.register_blueprint(faq_bp, url_prefix='/faq')
     app.register_blueprint(support_bp, url_prefix='/support')
     app.register_blueprint(survey_bp, url_prefix='/survey')
+    app.register_blueprint(batch_bp, url_prefix='/batch')
 
     # Route pour servir les images
     @app.route('/media/<path:filename>')
     def serve_media(filename):
         return send_from_directory('media', filename)
 
-    # Enregistrer les visites de pages
-    @app.before_request
-    def track_page_visit():
-        path = request.path
-        user_id = None
+    # Enregistrer les visites de pages (mise en file, écriture en lots par un thread dédié)
+    visit_buffer.init_app(app)
+
+    @app.after_request
+    def track_page_visit(response):
         try:
             identifiant = get_jwt_identity()
-            if identifiant:
-                user = Account.query.filter_by(identifiant=identifiant).first()
-                user_id = user.id if user else None
-        except Exception as e:
-            app.logger.warning(f"Erreur lors de la récupération de l'identité : {e}")
-        try:
-            page_visit = PageVisit(path=path, user_id=user_id)
-            db.session.add(page_visit)
-            db.session.flush()
-        except Exception as e:
-            app.logger.error(f"Erreur lors de l'enregistrement de la visite : {e}")
-            db.session.rollback()
+        except RuntimeError:
+            # Aucun JWT vérifié pour cette requête
+            identifiant = None
+        # La règle d'URL (ex: /customer/<string:customer_code>/dashboard) évite une clé par client
+        route = request.url_rule.rule if request.url_rule else UNMATCHED_ROUTE
+        visit_buffer.record(request.path, route, identifiant)
+        return response
 
     return app
 
@@ -0,0 +1,38 @@
+# benchmarks/bench_endpoints.py
+
+
+def bench_customer_dashboard(bench_endpoint, customer_code, customer_headers):
+    bench_endpoint(f'/customer/{customer_code}/dashboard', customer_headers)
+
+
+def bench_customer_transactions(bench_endpoint, customer_code, customer_headers, transactions_period):
+    bench_endpoint(f'/customer/{customer_code}/transactions', customer_headers, query_string=transactions_period)
+
+
+def bench_rewards(bench_endpoint, customer_headers):
+    bench_endpoint('/lot/rewards', customer_headers)
+
+
+def bench_cart(bench_endpoint, customer_headers):
+    bench_endpoint('/lot/cart', customer_headers)
+
+
+def bench_admin_orders(bench_endpoint, admin_headers):
+    bench_endpoint('/admin/orders', admin_headers)
+
+
+def bench_admin_stats(bench_endpoint, admin_headers):
+    bench_endpoint('/admin/stats', admin_headers)
+
+
+def bench_customer_me(bench_endpoint, customer_headers):
+    bench_endpoint('/customer/me', customer_headers)
+
+
+def bench_batch_startup(bench_endpoint, customer_code, customer_headers):
+    bench_endpoint('/batch', customer_headers, method='POST', json={'requests': [
+        {'path': f'/customer/{customer_code}/profile'},
+        {'path': f'/customer/{customer_code}/dashboard'},
+        {'path': f'/customer/{customer_code}/notifications/unread-count'},
+        {'path': '/lot/cart'}
+    ]})
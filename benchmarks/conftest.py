@@ -0,0 +1,119 @@
+# benchmarks/conftest.py
+"""Environnement des benchmarks d'endpoints.
+
+Lancement : pip install -r benchmarks/requirements.txt && pytest benchmarks/
+
+Variables d'environnement :
+    BENCH_DATABASE_URL  base cible (PostgreSQL local ou sqlite:///...) ; SQLite temporaire par défaut.
+                        DATABASE_URL est volontairement ignorée pour ne jamais écrire sur la base configurée.
+    BENCH_CUSTOMERS     nombre de clients générés (2000 par défaut)
+    BENCH_SKIP_SEED     1 pour réutiliser une base déjà alimentée par `flask seed-synthetic`
+"""
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+import pytest
+
+_database_url = os.environ.get('BENCH_DATABASE_URL')
+if not _database_url:
+    _database_url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='witti-bench-'), 'bench.db')
+# Doit précéder l'import de config.py
+os.environ['DATABASE_URL'] = _database_url
+# Un dépassement de @query_budget fait échouer le benchmark concerné
+os.environ.setdefault('SQL_QUERY_BUDGET_STRICT', '1')
+
+from flask_jwt_extended import create_access_token  # noqa: E402
+
+from app import app as flask_app  # noqa: E402
+from extensions import db  # noqa: E402
+from Account.models import Account  # noqa: E402
+from Account.roles import role_claims  # noqa: E402
+from Customer.models import Customer, Transaction  # noqa: E402
+from synthetic import SyntheticDataGenerator  # noqa: E402
+
+BENCH_PREFIX = 'SYN'
+# Super admin créé par le générateur
+BENCH_ADMIN = f'{BENCH_PREFIX}ADMIN'
+# Fin de l'historique généré : aligné sur la date de référence des vues transactions
+BENCH_END = datetime(2025, 5, 24, 23, 0)
+
+
+@pytest.fixture(scope='session')
+def bench_app():
+    with flask_app.app_context():
+        if os.environ.get('BENCH_SKIP_SEED') != '1':
+            db.create_all()
+            SyntheticDataGenerator(
+                customers=int(os.environ.get('BENCH_CUSTOMERS', 2000)),
+                end=BENCH_END,
+                prefix=BENCH_PREFIX
+            ).run()
+    return flask_app
+
+
+@pytest.fixture(scope='session')
+def client(bench_app):
+    return bench_app.test_client()
+
+
+@pytest.fixture(scope='session')
+def customer_code(bench_app):
+    # Client synthétique ayant le plus de transactions : pire cas des endpoints par client
+    with bench_app.app_context():
+        row = db.session.query(Transaction.client, db.func.count(Transaction.id)) \
+            .filter(Transaction.client.like(f'{BENCH_PREFIX}%')) \
+            .group_by(Transaction.client) \
+            .order_by(db.func.count(Transaction.id).desc()) \
+            .first()
+        return row[0] if row else Customer.query.first().customer_code
+
+
+@pytest.fixture(scope='session')
+def customer_headers(bench_app, customer_code):
+    with bench_app.app_context():
+        return {'Authorization': f'Bearer {create_access_token(identity=customer_code)}'}
+
+
+@pytest.fixture(scope='session')
+def admin_headers(bench_app):
+    with bench_app.app_context():
+        admin = Account.query.filter_by(identifiant=BENCH_ADMIN).one()
+        token = create_access_token(identity=admin.identifiant, additional_claims=role_claims(admin))
+        return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.fixture(scope='session')
+def transactions_period():
+    start = BENCH_END - timedelta(days=30)
+    return {'period': 'custom', 'start_date': start.strftime('%Y-%m-%d'), 'end_date': BENCH_END.strftime('%Y-%m-%d')}
+
+
+def _percentile(sorted_values, percent):
+    # Rang le plus proche
+    index = max(0, min(len(sorted_values) - 1, int(round(percent / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+@pytest.fixture
+def bench_endpoint(benchmark, client):
+    """Mesure un endpoint ; p50/p95 et nombre de requêtes SQL sont ajoutés à extra_info."""
+    def run(url, headers=None, method='GET', **kwargs):
+        query_counts = []
+
+        def call():
+            response = client.open(url, method=method, headers=headers, **kwargs)
+            query_counts.append(int(response.headers.get('X-DB-Query-Count', 0)))
+            return response
+
+        response = benchmark(call)
+        assert response.status_code == 200, response.get_data(as_text=True)
+        durations = sorted(benchmark.stats.stats.data)
+        benchmark.extra_info.update({
+            'p50_ms': round(_percentile(durations, 50) * 1000, 3),
+            'p95_ms': round(_percentile(durations, 95) * 1000, 3),
+            'queries': max(query_counts),
+            'db_time_ms': float(response.headers.get('X-DB-Time-Ms', 0))
+        })
+        return response
+    return run
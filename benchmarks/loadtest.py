@@ -0,0 +1,272 @@
+# benchmarks/loadtest.py
+"""Test de charge rejouant des sessions de l'application mobile contre une instance locale.
+
+Session client : connexion, tableau de bord, récompenses, favori, ajout au panier, panier,
+commande, notifications. En parallèle, des administrateurs valident les commandes passées.
+
+Exemple (base alimentée par `flask seed-synthetic`, serveur lancé sur le port 5000) :
+    python benchmarks/loadtest.py --base-url http://127.0.0.1:5000 --stages 1,4,8,16 --duration 30
+
+Chaque palier de concurrence affiche débit, taux d'erreur et latences p50/p95/p99 par étape :
+le palier où le débit cesse de croître alors que p95 s'envole est le point de saturation.
+Uniquement la bibliothèque standard (urllib + threads).
+"""
+import argparse
+import json
+import queue
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+
+CUSTOMER_STEPS = ['login', 'dashboard', 'rewards', 'favorite', 'add_to_cart', 'view_cart', 'place_order', 'notifications']
+ADMIN_STEPS = ['admin_login', 'admin_orders', 'validate_order']
+
+
+class StepStats:
+    def __init__(self):
+        self.durations = []
+        self.ok = 0
+        self.rejected = 0  # 4xx : refus métier (stock insuffisant, panier vide, ...)
+        self.errors = 0  # 5xx, délai dépassé, connexion refusée
+        self.statuses = defaultdict(int)
+
+
+class Recorder:
+    """Mesures par étape, partagées entre les threads d'un palier."""
+
+    def __init__(self):
+        self.steps = defaultdict(StepStats)
+        self.sessions = 0
+        self._lock = threading.Lock()
+
+    def record(self, step, duration, status):
+        with self._lock:
+            stats = self.steps[step]
+            stats.durations.append(duration)
+            stats.statuses[status] += 1
+            if status is not None and 200 <= status < 400:
+                stats.ok += 1
+            elif status is not None and 400 <= status < 500:
+                stats.rejected += 1
+            else:
+                stats.errors += 1
+
+    def session_done(self):
+        with self._lock:
+            self.sessions += 1
+
+
+def percentile(sorted_values, percent):
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(percent / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class Client:
+    def __init__(self, base_url, recorder, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.recorder = recorder
+        self.timeout = timeout
+        self.token = None
+
+    def request(self, step, method, path, payload=None):
+        data = json.dumps(payload).encode('utf-8') if payload is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method)
+        req.add_header('Accept', 'application/json')
+        if data is not None:
+            req.add_header('Content-Type', 'application/json')
+        if self.token:
+            req.add_header('Authorization', f'Bearer {self.token}')
+        start = time.perf_counter()
+        status, body = None, None
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                status, body = response.status, response.read()
+        except urllib.error.HTTPError as e:
+            status, body = e.code, e.read()
+        except (urllib.error.URLError, OSError):
+            pass
+        self.recorder.record(step, time.perf_counter() - start, status)
+        if status is None or status >= 400 or not body:
+            return status, None
+        try:
+            return status, json.loads(body)
+        except ValueError:
+            return status, None
+
+
+def think(args, rng):
+    if args.think_max_ms > 0:
+        time.sleep(rng.uniform(args.think_min_ms, args.think_max_ms) / 1000.0)
+
+
+def customer_session(client, identifiant, args, rng, placed_orders):
+    client.token = None
+    _, body = client.request('login', 'POST', '/accounts/login', {'identifiant': identifiant, 'password': args.password})
+    if not body or 'access_token' not in body:
+        return False
+    client.token = body['access_token']
+    think(args, rng)
+    client.request('dashboard', 'GET', f'/customer/{identifiant}/dashboard')
+    think(args, rng)
+    _, rewards = client.request('rewards', 'GET', '/lot/rewards')
+    if not rewards:
+        return False
+    reward = rng.choice(rewards)
+    think(args, rng)
+    client.request('favorite', 'POST', f"/lot/rewards/{reward['id']}/favorite")
+    think(args, rng)
+    client.request('add_to_cart', 'POST', '/lot/cart', {'reward_id': reward['id'], 'quantity': 1})
+    think(args, rng)
+    client.request('view_cart', 'GET', '/lot/cart')
+    think(args, rng)
+    _, order = client.request('place_order', 'POST', '/lot/place-order')
+    if order and order.get('order_id'):
+        placed_orders.put(order['order_id'])
+    think(args, rng)
+    client.request('notifications', 'GET', f'/customer/{identifiant}/notifications')
+    return True
+
+
+def customer_worker(worker_id, args, recorder, placed_orders, stop):
+    rng = random.Random(args.seed + worker_id)
+    client = Client(args.base_url, recorder, args.timeout)
+    while not stop.is_set():
+        identifiant = f'{args.prefix}{rng.randrange(args.customer_count):08d}'
+        if customer_session(client, identifiant, args, rng, placed_orders):
+            recorder.session_done()
+        think(args, rng)
+
+
+def admin_worker(worker_id, args, recorder, placed_orders, stop):
+    rng = random.Random(args.seed + 10000 + worker_id)
+    client = Client(args.base_url, recorder, args.timeout)
+    _, body = client.request('admin_login', 'POST', '/accounts/admin/login',
+                             {'email': args.admin_email, 'password': args.admin_password})
+    if not body or 'access_token' not in body:
+        print(f"Connexion admin impossible ({args.admin_email}) : validation des commandes désactivée", file=sys.stderr)
+        return
+    client.token = body['access_token']
+    validated = 0
+    while not stop.is_set():
+        try:
+            order_id = placed_orders.get(timeout=0.5)
+        except queue.Empty:
+            continue
+        if args.admin_list_every and validated % args.admin_list_every == 0:
+            client.request('admin_orders', 'GET', '/admin/orders')
+        client.request('validate_order', 'PUT', f'/admin/orders/{order_id}/validate')
+        validated += 1
+        think(args, rng)
+
+
+def run_stage(concurrency, args):
+    recorder = Recorder()
+    placed_orders = queue.Queue()
+    stop = threading.Event()
+    threads = []
+    for worker_id in range(args.admins):
+        threads.append(threading.Thread(target=admin_worker, args=(worker_id, args, recorder, placed_orders, stop), daemon=True))
+    for worker_id in range(concurrency):
+        threads.append(threading.Thread(target=customer_worker, args=(worker_id, args, recorder, placed_orders, stop), daemon=True))
+    start = time.perf_counter()
+    for n, thread in enumerate(threads):
+        thread.start()
+        # Montée en charge progressive sur ramp_up secondes
+        if args.ramp_up and concurrency:
+            time.sleep(args.ramp_up / len(threads))
+    time.sleep(max(0.0, args.duration - (time.perf_counter() - start)))
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=args.timeout + 1)
+    return recorder, time.perf_counter() - start
+
+
+def summarize(concurrency, recorder, elapsed):
+    steps = {}
+    total_requests = 0
+    total_errors = 0
+    for step in CUSTOMER_STEPS + ADMIN_STEPS:
+        stats = recorder.steps.get(step)
+        if stats is None:
+            continue
+        durations = sorted(stats.durations)
+        count = len(durations)
+        total_requests += count
+        total_errors += stats.errors
+        steps[step] = {
+            'count': count,
+            'throughput_rps': round(count / elapsed, 2),
+            'ok': stats.ok,
+            'rejected': stats.rejected,
+            'errors': stats.errors,
+            'error_rate': round(stats.errors / count, 4) if count else 0.0,
+            'p50_ms': round(percentile(durations, 50) * 1000, 1),
+            'p95_ms': round(percentile(durations, 95) * 1000, 1),
+            'p99_ms': round(percentile(durations, 99) * 1000, 1),
+            'max_ms': round(durations[-1] * 1000, 1) if durations else 0.0,
+            'statuses': {str(status): n for status, n in sorted(stats.statuses.items(), key=lambda item: str(item[0]))}
+        }
+    return {
+        'concurrency': concurrency,
+        'elapsed_s': round(elapsed, 2),
+        'sessions': recorder.sessions,
+        'sessions_per_s': round(recorder.sessions / elapsed, 2),
+        'requests_per_s': round(total_requests / elapsed, 2),
+        'error_rate': round(total_errors / total_requests, 4) if total_requests else 0.0,
+        'steps': steps
+    }
+
+
+def print_summary(summary):
+    print(f"\n=== Concurrence {summary['concurrency']} : {summary['sessions']} sessions en {summary['elapsed_s']} s "
+          f"({summary['sessions_per_s']} sessions/s, {summary['requests_per_s']} req/s, "
+          f"erreurs {summary['error_rate'] * 100:.2f} %) ===")
+    print(f"{'étape':<16}{'req':>7}{'req/s':>9}{'4xx':>6}{'err':>6}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for step, stats in summary['steps'].items():
+        print(f"{step:<16}{stats['count']:>7}{stats['throughput_rps']:>9}{stats['rejected']:>6}{stats['errors']:>6}"
+              f"{stats['p50_ms']:>9}{stats['p95_ms']:>9}{stats['p99_ms']:>9}{stats['max_ms']:>9}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Test de charge par sessions (application mobile + validation admin)")
+    parser.add_argument('--base-url', default='http://127.0.0.1:5000')
+    parser.add_argument('--stages', default='1,2,4,8', help='Paliers de sessions clients simultanées, ex : 1,4,16')
+    parser.add_argument('--duration', type=float, default=30, help='Durée de chaque palier, en secondes')
+    parser.add_argument('--ramp-up', type=float, default=0, help='Démarrage progressif des threads, en secondes')
+    parser.add_argument('--admins', type=int, default=1, help='Administrateurs validant les commandes en parallèle')
+    parser.add_argument('--admin-list-every', type=int, default=10, help='Consultation de /admin/orders toutes les N validations (0 = jamais)')
+    parser.add_argument('--think-min-ms', type=float, default=200)
+    parser.add_argument('--think-max-ms', type=float, default=1000, help='0 pour enchaîner sans pause')
+    parser.add_argument('--prefix', default='SYN', help='Préfixe des identifiants générés par `flask seed-synthetic`')
+    parser.add_argument('--customer-count', type=int, default=1000, help='Nombre de clients synthétiques utilisables')
+    parser.add_argument('--password', default='synthetic')
+    parser.add_argument('--admin-email', default='synadmin@example.com')
+    parser.add_argument('--admin-password', default='synthetic')
+    parser.add_argument('--timeout', type=float, default=30, help='Délai maximal par requête, en secondes')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', dest='json_path', default=None, help='Écrit le rapport complet dans ce fichier')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    summaries = []
+    for concurrency in [int(value) for value in args.stages.split(',') if value.strip()]:
+        recorder, elapsed = run_stage(concurrency, args)
+        summary = summarize(concurrency, recorder, elapsed)
+        print_summary(summary)
+        summaries.append(summary)
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(summaries, f, indent=2, ensure_ascii=False)
+    return summaries
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+# commands.py
+from datetime import datetime
+
+import click
+
+from Analytics.rollup import rebuild_rollups
+from Account.revocation import revoked_tokens
+from Account.roles import bump_role_version
+from extensions import db
+from synthetic import SyntheticDataGenerator
+from Customer.deposit_dates import backfill_deposit_at
+from Customer.monthly_summary import rebuild_summaries, refresh_summaries, resummarise
+from Category.tiers import recompute_customer_tiers, tier_version
+from Lot.broadcast import claim_broadcast, run_broadcast
+from Lot.catalog import reward_catalog, reward_catalog_version
+from Lot.partitions import apply_retention, ensure_partitions
+
+
+def register_commands(app):
+    @app.cli.command('rollup-page-visits')
+    @click.option('--since', default=None, help='Date de début (YYYY-MM-DD), toute la table par défaut')
+    @click.option('--chunk-size', default=10000, show_default=True, help='Nombre de visites traitées par lot')
+    def rollup_page_visits(since, chunk_size):
+        """Recalcule les agrégats horaires/journaliers des visites depuis page_visits."""
+        since_date = datetime.strptime(since, '%Y-%m-%d') if since else None
+        processed = rebuild_rollups(since=since_date, chunk_size=chunk_size)
+        click.echo(f"{processed} visites agrégées")
+
+    @app.cli.command('prune-token-blacklist')
+    @click.option('--batch-size', default=None, type=int, help='Lignes supprimées par transaction (TOKEN_BLACKLIST_PRUNE_BATCH_SIZE par défaut)')
+    @click.option('--max-batches', default=None, type=int, help='Nombre maximal de lots (illimité par défaut)')
+    def prune_token_blacklist(batch_size, max_batches):
+        """Supprime les tokens révoqués déjà expirés de token_blacklist."""
+        deleted = revoked_tokens.prune(batch_size=batch_size, max_batches=max_batches)
+        click.echo(f"{deleted} tokens expirés supprimés")
+
+    @app.cli.command('bump-role-version')
+    def bump_role_version_command():
+        """À lancer après une modification de is_admin/is_superuser : les claims de rôle des tokens émis sont revérifiés en base."""
+        bump_role_version()
+        click.echo("Version des rôles incrémentée")
+
+    @app.cli.command('bump-reward-catalog')
+    def bump_reward_catalog():
+        """À lancer après une modification de lot_recompenses hors de l'application (admin Django, SQL)."""
+        reward_catalog.invalidate()
+        reward_catalog_version.bump()
+        click.echo("Version du catalogue des récompenses incrémentée")
+
+    @app.cli.command('backfill-deposit-at')
+    @click.option('--batch-size', default=5000, show_default=True, help='Lignes mises à jour par transaction')
+    def backfill_deposit_at_command(batch_size):
+        """Renseigne customer_deposit_withdrawal.deposit_at à partir de deposit_date pour les lignes qui n'en ont pas."""
+        # Les mouvements déjà passés sous le filigrane des résumés mensuels y sont ajoutés dans la même transaction
+        updated, unparseable = backfill_deposit_at(
+            db.session, batch_size=batch_size, commit=db.session.commit, on_update=resummarise,
+            progress=lambda done, skipped: click.echo(f"{done} lignes mises à jour, {skipped} dates illisibles")
+        )
+        click.echo(f"{updated} lignes mises à jour, {unparseable} dates illisibles laissées à NULL")
+
+    @app.cli.command('recompute-tiers')
+    @click.option('--batch-size', default=5000, show_default=True, help='Clients traités par transaction')
+    @click.option('--no-notify', is_flag=True, help='Ne notifie pas les promotions et rétrogradations')
+    def recompute_tiers(batch_size, no_notify):
+        """Recalcule la catégorie des clients depuis leur solde et les seuils de category_category (et categ_client)."""
+        # Les autres processus relisent les seuils au plus tard 30 secondes après
+        tier_version.bump()
+        updated, notified, synced = recompute_customer_tiers(
+            batch_size=batch_size, notify=not no_notify,
+            progress=lambda done, last_id: click.echo(f"{done} catégories modifiées (jusqu'à l'id {last_id})")
+        )
+        click.echo(f"{updated} clients changent de catégorie, {notified} notifications, {synced} lignes categ_client alignées")
+
+    @app.cli.command('resume-broadcast')
+    @click.argument('broadcast_id', type=int)
+    @click.option('--batch-size', default=None, type=int, help='Destinataires par transaction (NOTIFICATION_BROADCAST_BATCH_SIZE par défaut)')
+    def resume_broadcast(broadcast_id, batch_size):
+        """Reprend un envoi groupé interrompu (redémarrage du processus, erreur) là où il s'était arrêté."""
+        if not claim_broadcast(broadcast_id, statuses=('pending', 'running', 'failed')):
+            raise click.ClickException(f"Envoi {broadcast_id} introuvable ou déjà terminé")
+        sent = run_broadcast(
+            broadcast_id, batch_size=batch_size or app.config['NOTIFICATION_BROADCAST_BATCH_SIZE'],
+            progress=lambda done, total: click.echo(f"{done}/{total} notifications envoyées")
+        )
+        click.echo(f"Envoi {broadcast_id} terminé : {sent} notifications")
+
+    @app.cli.command('create-notification-partitions')
+    @click.option('--months-ahead', default=None, type=int, help='Mois à venir préparés (NOTIFICATIONS_PARTITIONS_AHEAD par défaut)')
+    def create_notification_partitions(months_ahead):
+        """Crée les partitions mensuelles à venir de lot_notifications (sans effet hors PostgreSQL partitionné)."""
+        created = ensure_partitions(months_ahead if months_ahead is not None else app.config['NOTIFICATIONS_PARTITIONS_AHEAD'])
+        db.session.commit()
+        click.echo(f"{len(created)} partitions créées" + (f" : {', '.join(created)}" if created else ""))
+
+    @app.cli.command('prune-notifications')
+    @click.option('--months', default=None, type=int, help='Mois conservés en plus du mois courant (NOTIFICATIONS_RETENTION_MONTHS par défaut)')
+    @click.option('--archive', is_flag=True, help='Détache les partitions au lieu de les supprimer (PostgreSQL)')
+    @click.option('--batch-size', default=10000, show_default=True, help='Lignes supprimées par transaction (table non partitionnée)')
+    def prune_notifications(months, archive, batch_size):
+        """Applique la rétention des notifications et prépare les partitions à venir (à planifier chaque mois)."""
+        months = months if months is not None else app.config['NOTIFICATIONS_RETENTION_MONTHS']
+        try:
+            handled, deleted = apply_retention(
+                months, archive=archive, batch_size=batch_size,
+                progress=lambda partitions, deleted: click.echo(f"{partitions} partitions traitées, {deleted} notifications supprimées")
+            )
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        created = ensure_partitions(app.config['NOTIFICATIONS_PARTITIONS_AHEAD'])
+        db.session.commit()
+        action = 'détachées' if archive else 'supprimées'
+        click.echo(f"{len(handled)} partitions {action}, {deleted} notifications supprimées, {len(created)} partitions créées")
+
+    @app.cli.command('refresh-monthly-summaries')
+    @click.option('--batch-size', default=50000, show_default=True, help='Mouvements intégrés par transaction')
+    def refresh_monthly_summaries(batch_size):
+        """Intègre aux résumés mensuels les mouvements ajoutés depuis le dernier rafraîchissement."""
+        processed = refresh_summaries(
+            batch_size=batch_size,
+            progress=lambda done, watermark: click.echo(f"{done} mouvements intégrés (filigrane {watermark})")
+        )
+        click.echo(f"{processed} mouvements intégrés aux résumés mensuels")
+
+    @app.cli.command('rebuild-monthly-summaries')
+    @click.option('--since', default=None, help='Premier mois recalculé (YYYY-MM), toute la table par défaut')
+    @click.option('--batch-size', default=50000, show_default=True, help='Mouvements intégrés par transaction')
+    def rebuild_monthly_summaries(since, batch_size):
+        """Recalcule les résumés mensuels (après correction ou suppression de mouvements, ou rattrapage initial)."""
+        start = datetime.strptime(since, '%Y-%m') if since else None
+        processed = rebuild_summaries(
+            since=start, batch_size=batch_size,
+            progress=lambda done, watermark: click.echo(f"{done} mouvements intégrés (filigrane {watermark})")
+        )
+        click.echo(f"Résumés mensuels recalculés, {processed} mouvements de la queue intégrés")
+
+    @app.cli.command('seed-synthetic')
+    @click.option('--customers', default=1000, show_default=True, help='Nombre de clients (et de comptes) générés')
+    @click.option('--transactions-per-customer', default=50, show_default=True)
+    @click.option('--orders-per-customer', default=2, show_default=True)
+    @click.option('--notifications-per-customer', default=10, show_default=True)
+    @click.option('--page-visits-per-customer', default=20, show_default=True)
+    @click.option('--cart-items-per-customer', default=2, show_default=True)
+    @click.option('--rewards', default=60, show_default=True, help='Récompenses (avec leur stock)')
+    @click.option('--surveys', default=3, show_default=True)
+    @click.option('--survey-response-rate', default=0.5, show_default=True, help='Probabilité de réponse par client et par sondage')
+    @click.option('--days', default=365, show_default=True, help='Profondeur de l\'historique généré, en jours')
+    @click.option('--end-date', default=None, help='Fin de l\'historique (YYYY-MM-DD), maintenant par défaut')
+    @click.option('--prefix', default='SYN', show_default=True, help='Préfixe des codes clients et des récompenses')
+    @click.option('--chunk-size', default=2000, show_default=True, help='Clients insérés par transaction')
+    @click.option('--seed', default=42, show_default=True, help='Graine du générateur (jeu reproductible)')
+    @click.option('--create-tables', is_flag=True, help='Crée les tables manquantes (base locale vierge)')
+    @click.option('--skip-rollups', is_flag=True, help='Ne recalcule pas les agrégats de visites')
+    def seed_synthetic(create_tables, skip_rollups, end_date, **options):
+        """Génère un jeu de données synthétique pour les benchmarks (à lancer sur une base locale via DATABASE_URL)."""
+        if create_tables:
+            db.create_all()
+        end = datetime.strptime(end_date, '%Y-%m-%d') if end_date else None
+        generator = SyntheticDataGenerator(end=end, **options)
+        counts = generator.run(
+            progress=lambda done, total: click.echo(f"{done}/{total} clients générés"),
+            rollups=not skip_rollups
+        )
+        for table, count in sorted(counts.items()):
+            click.echo(f"{table} : {count} lignes")
@@ -2,8 +2,16 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_marshmallow import Marshmallow
 from flask_jwt_extended import JWTManager
 from flask_migrate import Migrate
+from sqlalchemy import BigInteger
+from sqlalchemy.ext.compiler import compiles
 
 db = SQLAlchemy()
 ma = Marshmallow()
 jwt = JWTManager()
-migrate = Migrate()
\ No newline at end of file
+migrate = Migrate()
+
+
+@compiles(BigInteger, 'sqlite')
+def _compile_big_integer_sqlite(type_, compiler, **kw):
+    # SQLite n'auto-incrémente que les clés primaires INTEGER (déjà sur 64 bits) : base locale / benchmarks
+    return 'INTEGER'
@@ -0,0 +1,36 @@
+"""page visit rollups
+
+Revision ID: 3f9a1c2d7b10
+Revises: 
+Create Date: 2026-10-18 10:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a1c2d7b10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'page_visit_rollups',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('granularity', sa.String(length=5), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(), nullable=False),
+        sa.Column('path', sa.String(length=255), nullable=False),
+        sa.Column('hits', sa.BigInteger(), nullable=False),
+        sa.Column('distinct_users', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('granularity', 'bucket_start', 'path', name='uq_page_visit_rollups_bucket_path')
+    )
+    op.create_index('ix_page_visits_path_timestamp', 'page_visits', ['path', 'timestamp'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_page_visits_path_timestamp', table_name='page_visits')
+    op.drop_table('page_visit_rollups')
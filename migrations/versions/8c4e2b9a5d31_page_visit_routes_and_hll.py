@@ -0,0 +1,42 @@
+"""page visit routes and hyperloglog sketches
+
+Revision ID: 8c4e2b9a5d31
+Revises: 3f9a1c2d7b10
+Create Date: 2026-10-18 11:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c4e2b9a5d31'
+down_revision = '3f9a1c2d7b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('page_visits', sa.Column('route', sa.String(length=255), nullable=True))
+    # Les utilisateurs distincts sont désormais estimés par HyperLogLog : plus de COUNT(DISTINCT) par chemin
+    op.drop_index('ix_page_visits_path_timestamp', table_name='page_visits')
+
+    # Les agrégats existants, indexés par chemin brut, sont reconstruits avec `flask rollup-page-visits`
+    op.execute('DELETE FROM page_visit_rollups')
+    with op.batch_alter_table('page_visit_rollups') as batch_op:
+        batch_op.drop_constraint('uq_page_visit_rollups_bucket_path', type_='unique')
+        batch_op.alter_column('path', new_column_name='route', existing_type=sa.String(length=255), existing_nullable=False)
+        batch_op.add_column(sa.Column('users_hll', sa.LargeBinary(), nullable=True))
+        batch_op.create_unique_constraint('uq_page_visit_rollups_bucket_route', ['granularity', 'bucket_start', 'route'])
+
+
+def downgrade():
+    op.execute('DELETE FROM page_visit_rollups')
+    with op.batch_alter_table('page_visit_rollups') as batch_op:
+        batch_op.drop_constraint('uq_page_visit_rollups_bucket_route', type_='unique')
+        batch_op.drop_column('users_hll')
+        batch_op.alter_column('route', new_column_name='path', existing_type=sa.String(length=255), existing_nullable=False)
+        batch_op.create_unique_constraint('uq_page_visit_rollups_bucket_path', ['granularity', 'bucket_start', 'path'])
+
+    op.create_index('ix_page_visits_path_timestamp', 'page_visits', ['path', 'timestamp'], unique=False)
+    op.drop_column('page_visits', 'route')
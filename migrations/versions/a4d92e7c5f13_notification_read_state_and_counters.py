@@ -0,0 +1,45 @@
+"""notification read state, pagination index and unread counters
+
+Revision ID: a4d92e7c5f13
+Revises: f83c1d6e4b52
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4d92e7c5f13'
+down_revision = 'f83c1d6e4b52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # L'historique existant est considéré comme lu (pas de badge de plusieurs milliers de non-lues) :
+    # la colonne est créée avec le défaut true, puis le défaut passe à false pour les nouvelles lignes
+    with op.batch_alter_table('lot_notifications') as batch_op:
+        batch_op.add_column(sa.Column('is_read', sa.Boolean(), nullable=False, server_default=sa.true()))
+        batch_op.add_column(sa.Column('read_at', sa.DateTime(), nullable=True))
+    with op.batch_alter_table('lot_notifications') as batch_op:
+        batch_op.alter_column('is_read', server_default=sa.false())
+    op.create_index(
+        'ix_lot_notifications_user_created_id', 'lot_notifications',
+        ['user_id', sa.text('created_at DESC'), sa.text('id DESC')], unique=False
+    )
+    op.create_table(
+        'lot_notification_counters',
+        sa.Column('user_id', sa.BigInteger(), nullable=False),
+        sa.Column('unread', sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['accounts_account.id']),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade():
+    op.drop_table('lot_notification_counters')
+    op.drop_index('ix_lot_notifications_user_created_id', table_name='lot_notifications')
+    with op.batch_alter_table('lot_notifications') as batch_op:
+        batch_op.drop_column('read_at')
+        batch_op.drop_column('is_read')
@@ -0,0 +1,26 @@
+"""token blacklist expires_at
+
+Revision ID: b71d0e4f2a96
+Revises: 8c4e2b9a5d31
+Create Date: 2026-10-18 11:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b71d0e4f2a96'
+down_revision = '8c4e2b9a5d31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('token_blacklist', sa.Column('expires_at', sa.DateTime(), nullable=True))
+    op.create_index(op.f('ix_token_blacklist_expires_at'), 'token_blacklist', ['expires_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_token_blacklist_expires_at'), table_name='token_blacklist')
+    op.drop_column('token_blacklist', 'expires_at')
@@ -0,0 +1,40 @@
+"""notification broadcasts
+
+Revision ID: c6e81a3f0d27
+Revises: a4d92e7c5f13
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6e81a3f0d27'
+down_revision = 'a4d92e7c5f13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'lot_notification_broadcasts',
+        sa.Column('id', sa.BigInteger(), nullable=False),
+        sa.Column('message', sa.Text(), nullable=False),
+        sa.Column('categories', sa.JSON(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('total', sa.BigInteger(), nullable=False),
+        sa.Column('sent', sa.BigInteger(), nullable=False),
+        sa.Column('last_customer_id', sa.BigInteger(), nullable=False),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_by', sa.BigInteger(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['created_by'], ['accounts_account.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('lot_notification_broadcasts')
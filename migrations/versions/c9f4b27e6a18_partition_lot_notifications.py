@@ -0,0 +1,109 @@
+"""partition lot_notifications by month (PostgreSQL)
+
+Revision ID: c9f4b27e6a18
+Revises: c6e81a3f0d27
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9f4b27e6a18'
+down_revision = 'c6e81a3f0d27'
+branch_labels = None
+depends_on = None
+
+# Mois créés à l'avance ; `flask prune-notifications` / `create-notification-partitions` prennent ensuite le relais
+MONTHS_AHEAD = 3
+
+COLUMNS = 'id, user_id, message, created_at, is_read, read_at'
+
+
+def _shift(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def _rename_legacy(bind, suffix):
+    # Séquence (serial ou identity) renommée pour libérer lot_notifications_id_seq
+    sequence = bind.execute(sa.text("SELECT pg_get_serial_sequence('lot_notifications', 'id')")).scalar()
+    op.execute(f'ALTER TABLE lot_notifications RENAME TO lot_notifications_{suffix}')
+    op.execute(f'ALTER INDEX ix_lot_notifications_user_created_id RENAME TO ix_lot_notifications_{suffix}_user_created_id')
+    if sequence:
+        op.execute(f'ALTER SEQUENCE {sequence} RENAME TO lot_notifications_{suffix}_id_seq')
+
+
+def _create_sequence(bind, source):
+    next_id = bind.execute(sa.text(f'SELECT COALESCE(MAX(id), 0) + 1 FROM {source}')).scalar()
+    op.execute(f'CREATE SEQUENCE lot_notifications_id_seq START WITH {next_id}')
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        # SQLite et autres : table simple, la rétention procède par DELETE par tranches
+        return
+    _rename_legacy(bind, 'legacy')
+    _create_sequence(bind, 'lot_notifications_legacy')
+    # La clé primaire d'une table partitionnée doit inclure la clé de partitionnement
+    op.execute("""
+        CREATE TABLE lot_notifications (
+            id BIGINT NOT NULL DEFAULT nextval('lot_notifications_id_seq'),
+            user_id BIGINT NOT NULL REFERENCES accounts_account (id),
+            message TEXT NOT NULL,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            is_read BOOLEAN NOT NULL DEFAULT false,
+            read_at TIMESTAMP WITHOUT TIME ZONE,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute('ALTER SEQUENCE lot_notifications_id_seq OWNED BY lot_notifications.id')
+
+    current = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    oldest = bind.execute(sa.text('SELECT MIN(created_at) FROM lot_notifications_legacy')).scalar()
+    month = min(oldest.replace(day=1, hour=0, minute=0, second=0, microsecond=0), current) if oldest else current
+    while month <= _shift(current, MONTHS_AHEAD):
+        following = _shift(month, 1)
+        op.execute(
+            f"CREATE TABLE lot_notifications_y{month.year:04d}m{month.month:02d} PARTITION OF lot_notifications "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{following:%Y-%m-%d}')"
+        )
+        month = following
+    op.execute('CREATE TABLE lot_notifications_default PARTITION OF lot_notifications DEFAULT')
+
+    op.execute(f'INSERT INTO lot_notifications ({COLUMNS}) SELECT {COLUMNS} FROM lot_notifications_legacy')
+    # Index partitionné : créé sur chaque partition après la copie
+    op.create_index(
+        'ix_lot_notifications_user_created_id', 'lot_notifications',
+        ['user_id', sa.text('created_at DESC'), sa.text('id DESC')], unique=False
+    )
+    op.drop_table('lot_notifications_legacy')
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    _rename_legacy(bind, 'partitioned')
+    _create_sequence(bind, 'lot_notifications_partitioned')
+    op.execute("""
+        CREATE TABLE lot_notifications (
+            id BIGINT NOT NULL DEFAULT nextval('lot_notifications_id_seq') PRIMARY KEY,
+            user_id BIGINT NOT NULL REFERENCES accounts_account (id),
+            message TEXT NOT NULL,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            is_read BOOLEAN NOT NULL DEFAULT false,
+            read_at TIMESTAMP WITHOUT TIME ZONE
+        )
+    """)
+    op.execute('ALTER SEQUENCE lot_notifications_id_seq OWNED BY lot_notifications.id')
+    op.execute(f'INSERT INTO lot_notifications ({COLUMNS}) SELECT {COLUMNS} FROM lot_notifications_partitioned')
+    op.create_index(
+        'ix_lot_notifications_user_created_id', 'lot_notifications',
+        ['user_id', sa.text('created_at DESC'), sa.text('id DESC')], unique=False
+    )
+    op.drop_table('lot_notifications_partitioned')
@@ -0,0 +1,110 @@
+"""transaction deposit_at timestamp and customer index
+
+Revision ID: e5b39c7a1f28
+Revises: d2a8f61c9e04
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from Customer.deposit_dates import backfill_deposit_at
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b39c7a1f28'
+down_revision = 'd2a8f61c9e04'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 10000
+
+# Les mouvements sont chargés hors de l'application : le trigger renseigne deposit_at à l'écriture
+# (les valeurs déjà fournies par l'ORM sont conservées). L'analyse reprend DEPOSIT_DATE_FORMATS de
+# Customer/deposit_dates.py au lieu d'un cast ::timestamp, qui dépend de DateStyle (05/04/2024 lu
+# le 4 mai en MDY) : ISO puis jj/mm/aaaa et jj-mm-aaaa, les valeurs invalides ou inconnues restent à NULL.
+CREATE_TRIGGER = r"""
+CREATE OR REPLACE FUNCTION customer_deposit_withdrawal_parse_date(value text) RETURNS timestamp AS $$
+DECLARE
+    v text := btrim(value, E' \t\r\n\f');
+    m text[];
+BEGIN
+    IF v IS NULL OR v = '' THEN
+        RETURN NULL;
+    END IF;
+    BEGIN
+        -- AAAA-MM-JJ, AAAA-MM-JJ HH:MI, AAAA-MM-JJ( |T)HH:MI:SS[.ffffff]
+        m := regexp_match(v, '^(\d{4})-(\d{1,2})-(\d{1,2})(?:([ T])(\d{1,2}):(\d{1,2})(?::(\d{1,2})(?:\.(\d{1,6}))?)?)?$');
+        IF m IS NOT NULL THEN
+            IF m[4] = 'T' AND m[7] IS NULL THEN
+                RETURN NULL;  -- AAAA-MM-JJTHH:MI ne fait pas partie des formats
+            END IF;
+            RETURN make_timestamp(
+                m[1]::int, m[2]::int, m[3]::int, coalesce(m[5], '0')::int, coalesce(m[6], '0')::int,
+                coalesce(m[7], '0')::double precision + coalesce(('0.' || m[8])::double precision, 0)
+            );
+        END IF;
+        -- JJ/MM/AAAA, JJ/MM/AAAA HH:MI, JJ/MM/AAAA HH:MI:SS
+        m := regexp_match(v, '^(\d{1,2})/(\d{1,2})/(\d{4})(?: (\d{1,2}):(\d{1,2})(?::(\d{1,2}))?)?$');
+        IF m IS NOT NULL THEN
+            RETURN make_timestamp(
+                m[3]::int, m[2]::int, m[1]::int, coalesce(m[4], '0')::int, coalesce(m[5], '0')::int,
+                coalesce(m[6], '0')::double precision
+            );
+        END IF;
+        -- JJ-MM-AAAA
+        m := regexp_match(v, '^(\d{1,2})-(\d{1,2})-(\d{4})$');
+        IF m IS NOT NULL THEN
+            RETURN make_timestamp(m[3]::int, m[2]::int, m[1]::int, 0, 0, 0);
+        END IF;
+    EXCEPTION WHEN others THEN
+        -- Date hors calendrier (31/02/2024, 25:00...) : illisible, comme pour strptime
+        RETURN NULL;
+    END;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION customer_deposit_withdrawal_set_deposit_at() RETURNS trigger AS $$
+BEGIN
+    IF NEW.deposit_date IS NOT NULL AND (
+        (TG_OP = 'INSERT' AND NEW.deposit_at IS NULL)
+        OR (TG_OP = 'UPDATE' AND NEW.deposit_date IS DISTINCT FROM OLD.deposit_date
+            AND NEW.deposit_at IS NOT DISTINCT FROM OLD.deposit_at)
+    ) THEN
+        NEW.deposit_at := customer_deposit_withdrawal_parse_date(NEW.deposit_date);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_customer_deposit_withdrawal_deposit_at
+    BEFORE INSERT OR UPDATE OF deposit_date, deposit_at ON customer_deposit_withdrawal
+    FOR EACH ROW EXECUTE PROCEDURE customer_deposit_withdrawal_set_deposit_at();
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER IF EXISTS trg_customer_deposit_withdrawal_deposit_at ON customer_deposit_withdrawal;
+DROP FUNCTION IF EXISTS customer_deposit_withdrawal_set_deposit_at();
+DROP FUNCTION IF EXISTS customer_deposit_withdrawal_parse_date(text);
+"""
+
+
+def upgrade():
+    op.add_column('customer_deposit_withdrawal', sa.Column('deposit_at', sa.DateTime(), nullable=True))
+    # Rattrapage par lots, les dates étant analysées en Python (formats ISO et jj/mm/aaaa) ;
+    # `flask backfill-deposit-at` permet de le relancer hors migration
+    backfill_deposit_at(op.get_bind(), batch_size=BACKFILL_BATCH_SIZE)
+    op.create_index(
+        'ix_customer_deposit_withdrawal_client_deposit_at', 'customer_deposit_withdrawal',
+        ['client', sa.text('deposit_at DESC')], unique=False
+    )
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(CREATE_TRIGGER)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(DROP_TRIGGER)
+    op.drop_index('ix_customer_deposit_withdrawal_client_deposit_at', table_name='customer_deposit_withdrawal')
+    op.drop_column('customer_deposit_withdrawal', 'deposit_at')
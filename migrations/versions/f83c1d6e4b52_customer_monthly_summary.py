@@ -0,0 +1,39 @@
+"""customer monthly transaction summaries
+
+Revision ID: f83c1d6e4b52
+Revises: e5b39c7a1f28
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f83c1d6e4b52'
+down_revision = 'e5b39c7a1f28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Table alimentée par `flask rebuild-monthly-summaries` (rattrapage initial)
+    # puis `flask refresh-monthly-summaries` (incrémental, depuis le filigrane dans version_counter)
+    op.create_table(
+        'customer_monthly_summary',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('client', sa.Text(), nullable=False),
+        sa.Column('month', sa.Date(), nullable=False),
+        sa.Column('transaction_count', sa.BigInteger(), nullable=False),
+        sa.Column('deposit_count', sa.BigInteger(), nullable=False),
+        sa.Column('deposit_sum', sa.Numeric(precision=38, scale=0), nullable=False),
+        sa.Column('withdrawal_count', sa.BigInteger(), nullable=False),
+        sa.Column('withdrawal_sum', sa.Numeric(precision=38, scale=0), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('client', 'month', name='uq_customer_monthly_summary_client_month')
+    )
+
+
+def downgrade():
+    op.drop_table('customer_monthly_summary')
+    op.execute("DELETE FROM version_counters WHERE name = 'customer_monthly_summary'")
@@ -0,0 +1,44 @@
+# pagination.py
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+
+def encode_cursor(*values):
+    """Curseur opaque (base64 url) portant les valeurs de la clé de tri de la dernière ligne renvoyée."""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, parsers):
+    """Décode un curseur ; parsers convertit chaque valeur (ex : (datetime.fromisoformat, int)).
+
+    Lève ValueError si le curseur est illisible ou ne correspond pas à la clé attendue.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+    except Exception as e:
+        raise ValueError("Curseur invalide") from e
+    if not isinstance(values, list) or len(values) != len(parsers):
+        raise ValueError("Curseur invalide")
+    try:
+        return tuple(parse(value) for parse, value in zip(parsers, values))
+    except (TypeError, ValueError) as e:
+        raise ValueError("Curseur invalide") from e
+
+
+def keyset_before(columns, values):
+    """Condition « strictement après le curseur » pour un tri décroissant sur columns (comparaison de tuples)."""
+    return tuple_(*columns) < tuple_(*values)
+
+
+def page_size(requested, default, maximum):
+    """Taille de page demandée, bornée à [1, maximum]."""
+    try:
+        size = int(requested) if requested is not None else default
+    except (TypeError, ValueError):
+        size = default
+    return max(1, min(size, maximum))
@@ -0,0 +1,244 @@
+# pubsub.py
+import atexit
+import json
+import os
+import queue
+import re
+import select
+import threading
+import time
+from collections import defaultdict
+
+from flask import Response
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from extensions import db
+
+BACKENDS = ('memory', 'postgres')
+ADMINS_CHANNEL = 'admins'
+# Canal commun aux flux des clients : un événement par envoi groupé plutôt qu'un par destinataire
+CUSTOMERS_CHANNEL = 'customers'
+# Limite de NOTIFY (8000 octets) moins une marge : au-delà, les événements sont répartis sur plusieurs NOTIFY
+MAX_NOTIFY_PAYLOAD = 7500
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+class Subscription:
+    """File bornée d'un abonné (un flux SSE) ; les événements en excès sont perdus pour cet abonné seulement."""
+
+    def __init__(self, channels, maxsize):
+        self.channels = tuple(channels)
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def get(self, timeout):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventBroker:
+    """Pub/sub en mémoire par canal (utilisateur, administrateurs).
+
+    Avec EVENTS_BACKEND = 'postgres', les événements passent par NOTIFY et un thread LISTEN par
+    processus les redistribue aux abonnés locaux : tous les workers reçoivent les événements publiés
+    par n'importe lequel d'entre eux. En 'memory', seuls les abonnés du processus sont servis.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.backend = 'memory'
+        self.queue_size = 100
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+        self._counters = {'published': 0, 'delivered': 0, 'dropped': 0}
+
+    def init_app(self, app):
+        self.app = app
+        self.backend = app.config['EVENTS_BACKEND']
+        if self.backend not in BACKENDS:
+            raise ValueError(f"EVENTS_BACKEND invalide : {self.backend}")
+        self.pg_channel = app.config['EVENTS_PG_CHANNEL']
+        if not re.fullmatch(r'[a-z_][a-z0-9_]*', self.pg_channel):
+            raise ValueError(f"EVENTS_PG_CHANNEL invalide : {self.pg_channel}")
+        self.queue_size = app.config['EVENTS_QUEUE_SIZE']
+        app.extensions['event_broker'] = self
+        atexit.register(self.stop)
+
+    def subscribe(self, channels):
+        if self.backend == 'postgres':
+            self._ensure_listening()
+        subscription = Subscription(channels, self.queue_size)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[channel]
+
+    def publish(self, events):
+        """Publie des événements (canal, nom, données JSON) ; appelé après le commit qui les a produits."""
+        if not events:
+            return
+        self._increment('published', len(events))
+        if self.backend == 'postgres':
+            self._notify(events)
+        else:
+            for channel, name, data in events:
+                self.deliver(channel, name, data)
+
+    def deliver(self, channel, name, data):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.queue.put_nowait((name, data))
+                self._increment('delivered')
+            except queue.Full:
+                subscription.dropped += 1
+                self._increment('dropped')
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+            counters['subscriptions'] = len({s for subscribers in self._subscribers.values() for s in subscribers})
+        counters['backend'] = self.backend
+        return counters
+
+    def stop(self):
+        self._stop.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=2)
+
+    def _increment(self, name, value=1):
+        with self._lock:
+            self._counters[name] += value
+
+    def _notify(self, events):
+        payloads = []
+        current = []
+        size = 2
+        for item in events:
+            encoded = json.dumps(list(item), ensure_ascii=False, default=str)
+            if current and size + len(encoded.encode('utf-8')) + 1 > MAX_NOTIFY_PAYLOAD:
+                payloads.append('[' + ','.join(current) + ']')
+                current, size = [], 2
+            current.append(encoded)
+            size += len(encoded.encode('utf-8')) + 1
+        if current:
+            payloads.append('[' + ','.join(current) + ']')
+        # Connexion distincte de la session : la transaction qui a produit les événements est déjà validée
+        with db.engine.begin() as connection:
+            for payload in payloads:
+                connection.execute(text('SELECT pg_notify(:channel, :payload)'),
+                                   {'channel': self.pg_channel, 'payload': payload})
+
+    def _ensure_listening(self):
+        # Relancer le thread après un fork (workers gunicorn en mode preload)
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._listen, name='event-listener', daemon=True)
+            self._thread.start()
+
+    def _listen(self):
+        while not self._stop.is_set():
+            try:
+                with self.app.app_context():
+                    raw = db.engine.raw_connection()
+                try:
+                    connection = raw.driver_connection
+                    connection.set_isolation_level(0)  # autocommit : les notifications arrivent hors transaction
+                    with connection.cursor() as cursor:
+                        cursor.execute(f'LISTEN {self.pg_channel}')
+                    while not self._stop.is_set():
+                        if select.select([connection], [], [], 1.0) == ([], [], []):
+                            continue
+                        connection.poll()
+                        while connection.notifies:
+                            notification = connection.notifies.pop(0)
+                            for channel, name, data in json.loads(notification.payload):
+                                self.deliver(channel, name, data)
+                finally:
+                    raw.invalidate()
+            except Exception as e:
+                self.app.logger.error(f"Écoute des événements interrompue, reconnexion : {e}")
+                time.sleep(1)
+
+
+event_broker = EventBroker()
+
+
+def queue_event(session, channel, name, data):
+    """Ajoute un événement à publier après le commit de session (abandonné en cas de rollback)."""
+    if session is not None:
+        session.info.setdefault('_pending_events', []).append((channel, name, data))
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_after_commit(session):
+    events = session.info.pop('_pending_events', None)
+    if events:
+        try:
+            event_broker.publish(events)
+        except Exception as e:
+            # La publication ne doit pas faire échouer la requête : les clients resynchronisent à la reconnexion
+            if event_broker.app is not None:
+                event_broker.app.logger.error(f"Publication de {len(events)} événements impossible : {e}")
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop('_pending_events', None)
+
+
+def sse_response(subscription, heartbeat=15, max_seconds=300):
+    """Flux text/event-stream d'un abonnement ; commentaire de maintien toutes les heartbeat secondes.
+
+    Le flux est fermé après max_seconds (le client se reconnecte, délai indiqué par `retry`) pour ne
+    pas immobiliser indéfiniment un thread du serveur. Aucune session de base n'est tenue pendant le flux.
+    """
+    def generate():
+        try:
+            yield 'retry: 3000\n\n'
+            deadline = time.monotonic() + max_seconds
+            while time.monotonic() < deadline:
+                if subscription.dropped:
+                    # File pleine : des événements ont été perdus, le client doit recharger ses listes
+                    subscription.dropped = 0
+                    yield 'event: resync\ndata: {}\n\n'
+                item = subscription.get(timeout=min(heartbeat, max(0.0, deadline - time.monotonic())))
+                if item is None:
+                    yield ': keep-alive\n\n'
+                    continue
+                name, data = item
+                yield f'event: {name}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n'
+        finally:
+            event_broker.unsubscribe(subscription)
+
+    response = Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # pas de mise en tampon par nginx
+    })
+    # Réponse fermée sans avoir été lue (générateur jamais démarré) : le finally ne s'exécute pas
+    response.call_on_close(lambda: event_broker.unsubscribe(subscription))
+    return response
@@ -0,0 +1,284 @@
+# synthetic.py
+import random
+from datetime import datetime, timedelta
+
+from werkzeug.security import generate_password_hash
+
+from extensions import db
+from Account.models import Account
+from Customer.models import Customer, Transaction
+from Lot.catalog import reward_catalog_version
+from Lot.models import Recompense, Stock, Order, CartItem, order_items
+from Lot.notifications import insert_notifications
+from Models.page_visit import PageVisit
+from Survey.models import Survey, SurveyOption, SurveyResponse
+from Analytics.rollup import rebuild_rollups
+from Category.tiers import tier_table
+from Customer.monthly_summary import refresh_summaries
+
+SYNTHETIC_PASSWORD = 'synthetic'
+
+FIRST_NAMES = ['Aya', 'Koffi', 'Awa', 'Yao', 'Mariam', 'Kouassi', 'Fatou', 'Ibrahim', 'Adjoua', 'Moussa', 'Aminata', 'Serge']
+SHORT_NAMES = ['Kouamé', 'Traoré', 'Koné', 'Diallo', 'Ouattara', 'Yao', 'Bamba', 'Coulibaly', "N'Guessan", 'Touré']
+STREETS = ['Cocody', 'Plateau', 'Marcory', 'Yopougon', 'Treichville', 'Abobo', 'Koumassi', 'Bingerville']
+ORDER_STATUSES = ['pending'] * 3 + ['validated'] * 6 + ['cancelled']
+SURVEY_OPTIONS = ['Très mal', 'Mal', 'Moyen', 'Bien', 'Très bien']
+# Pages consultées par un client, au format (règle d'URL, gabarit du chemin)
+VISITED_ROUTES = [
+    ('/customer/<string:customer_code>/dashboard', '/customer/{code}/dashboard'),
+    ('/customer/<string:customer_code>/transactions', '/customer/{code}/transactions'),
+    ('/customer/<string:customer_code>/notifications', '/customer/{code}/notifications'),
+    ('/customer/<string:customer_code>/profile', '/customer/{code}/profile'),
+    ('/lot/rewards', '/lot/rewards'),
+    ('/lot/cart', '/lot/cart'),
+    ('/lot/favorites', '/lot/favorites'),
+    ('/survey/surveys', '/survey/surveys'),
+]
+
+
+def _insert(table, rows, returning=None):
+    """INSERT multi-lignes ; avec returning, les valeurs sont renvoyées dans l'ordre des lignes."""
+    if not rows:
+        return []
+    if returning is None:
+        db.session.execute(table.insert(), rows)
+        return []
+    stmt = table.insert().returning(table.c[returning], sort_by_parameter_order=True)
+    return list(db.session.execute(stmt, rows).scalars())
+
+
+class SyntheticDataGenerator:
+    """Génère des volumes réalistes (jusqu'à plusieurs millions de lignes) pour les benchmarks.
+
+    Les clients sont créés par lots de chunk_size avec leurs comptes, transactions, commandes,
+    notifications, visites et réponses aux sondages ; chaque lot est validé séparément.
+    Le tirage est reproductible pour une même graine.
+    """
+
+    def __init__(self, customers=1000, transactions_per_customer=50, orders_per_customer=2,
+                 notifications_per_customer=10, page_visits_per_customer=20, cart_items_per_customer=2,
+                 rewards=60, surveys=3, survey_response_rate=0.5, days=365, end=None,
+                 prefix='SYN', chunk_size=2000, seed=42):
+        self.customers = customers
+        self.transactions_per_customer = transactions_per_customer
+        self.orders_per_customer = orders_per_customer
+        self.notifications_per_customer = notifications_per_customer
+        self.page_visits_per_customer = page_visits_per_customer
+        self.cart_items_per_customer = cart_items_per_customer
+        self.rewards = rewards
+        self.surveys = surveys
+        self.survey_response_rate = survey_response_rate
+        self.days = days
+        self.end = end or datetime.utcnow().replace(microsecond=0)
+        self.start = self.end - timedelta(days=days)
+        self.prefix = prefix
+        self.chunk_size = chunk_size
+        self.rng = random.Random(seed)
+        self.counts = {}
+
+    def run(self, progress=None, rollups=True):
+        # Un seul hachage : le même mot de passe pour tous les comptes synthétiques
+        self.password_hash = generate_password_hash(SYNTHETIC_PASSWORD)
+        first_index = Customer.query.filter(Customer.customer_code.like(f'{self.prefix}%')).count()
+        self._ensure_admin()
+        reward_rows = self._generate_rewards()
+        options_by_survey = self._generate_surveys()
+        for offset in range(0, self.customers, self.chunk_size):
+            size = min(self.chunk_size, self.customers - offset)
+            self._generate_chunk(first_index + offset, size, reward_rows, options_by_survey)
+            db.session.commit()
+            if progress:
+                progress(offset + size, self.customers)
+        if rollups and self.page_visits_per_customer:
+            # Les statistiques admin lisent les agrégats : ils sont recalculés sur la période générée
+            rebuild_rollups(since=self.start, chunk_size=max(self.chunk_size, 10000))
+        if rollups and self.transactions_per_customer:
+            # Idem pour les résumés mensuels des mouvements (seule la queue au-delà du filigrane est traitée)
+            refresh_summaries()
+        return dict(self.counts)
+
+    def _count(self, table, rows):
+        self.counts[table] = self.counts.get(table, 0) + len(rows)
+
+    def _timestamp(self):
+        return self.end - timedelta(seconds=self.rng.randrange(self.days * 86400))
+
+    def _ensure_admin(self):
+        """Super admin synthétique ({prefix}ADMIN / {prefix}admin@example.com) utilisé par les tests de charge."""
+        identifiant = f'{self.prefix}ADMIN'
+        if Account.query.filter_by(identifiant=identifiant).first():
+            return
+        db.session.add(Account(
+            password=self.password_hash, first_name='Admin', last_name=self.prefix, username=identifiant.lower(),
+            email=f'{identifiant.lower()}@example.com', identifiant=identifiant, date_joined=self.end,
+            last_login=self.end, is_active=True, is_admin=True, is_staff=True, is_superuser=True
+        ))
+        db.session.commit()
+        self.counts['admins'] = 1
+
+    def _generate_rewards(self):
+        first_index = Recompense.query.filter(Recompense.slug.like(f'{self.prefix.lower()}-%')).count()
+        rows = []
+        for n in range(first_index, first_index + self.rewards):
+            rows.append({
+                'libelle': f'{self.prefix} Récompense {n}',
+                'slug': f'{self.prefix.lower()}-recompense-{n}',
+                'recompense_image': 'recompenses/synthetic.png',
+                'jeton': self.rng.choice([50, 80, 150, 300, 600, 900, 1500, 2500, 4000, 6000])
+            })
+        ids = _insert(Recompense.__table__, rows, returning='id')
+        # INSERT ensembliste : pas d'événement ORM, les catalogues en cache sont invalidés ici
+        reward_catalog_version.bump()
+        stock_rows = [{
+            'reward_id': reward_id,
+            'quantity_available': self.rng.choice([0, 5, 20, 50, 100, 500]),
+            'last_updated': self.end,
+            'created_at': self.end
+        } for reward_id in ids]
+        _insert(Stock.__table__, stock_rows)
+        db.session.commit()
+        self._count('lot_recompenses', rows)
+        self._count('lot_stock', stock_rows)
+        return list(zip(ids, [row['jeton'] for row in rows]))
+
+    def _generate_surveys(self):
+        options_by_survey = {}
+        for n in range(self.surveys):
+            survey = Survey(title=f'{self.prefix} Sondage {n + 1}', description='Sondage synthétique',
+                            created_at=self.start, updated_at=self.start, is_active=True)
+            db.session.add(survey)
+            db.session.flush()
+            options = [SurveyOption(survey_id=survey.id, option_text=text, option_value=value)
+                       for value, text in enumerate(SURVEY_OPTIONS, start=1)]
+            db.session.add_all(options)
+            db.session.flush()
+            options_by_survey[survey.id] = [option.id for option in options]
+        db.session.commit()
+        self.counts['surveys'] = self.surveys
+        return options_by_survey
+
+    def _generate_chunk(self, first_index, size, reward_rows, options_by_survey):
+        rng = self.rng
+        codes = [f'{self.prefix}{index:08d}' for index in range(first_index, first_index + size)]
+        tiers = tier_table()
+        account_rows = []
+        customer_rows = []
+        for code in codes:
+            first_name = rng.choice(FIRST_NAMES)
+            short_name = rng.choice(SHORT_NAMES)
+            joined = self._timestamp()
+            account_rows.append({
+                'password': self.password_hash,
+                'first_name': first_name,
+                'last_name': short_name,
+                'username': code.lower(),
+                'email': f'{code.lower()}@example.com',
+                'identifiant': code,
+                'date_joined': joined,
+                'last_login': joined,
+                'is_active': True,
+                'is_admin': False,
+                'is_staff': False,
+                'is_superuser': False
+            })
+            solde = min(int(rng.paretovariate(1.2) * 50), 20000)
+            customer_rows.append({
+                'customer_code': code,
+                'short_name': short_name,
+                'first_name': first_name,
+                'gender': rng.choice(['M', 'F']),
+                'birth_date': f'{rng.randint(1950, 2004)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}',
+                'phone_number': f'+225 07{rng.randint(0, 99999999):08d}',
+                'street': rng.choice(STREETS),
+                'users': 1,
+                'category': tiers.name_for(solde),
+                'total': solde,
+                'solde': solde
+            })
+        account_ids = _insert(Account.__table__, account_rows, returning='id')
+        customer_ids = _insert(Customer.__table__, customer_rows, returning='id')
+        self._count('accounts_account', account_rows)
+        self._count('customer_customers', customer_rows)
+
+        transaction_rows = []
+        order_rows = []
+        order_item_choices = []
+        notification_rows = []
+        visit_rows = []
+        cart_rows = []
+        response_rows = []
+        for code, account_id, customer_id in zip(codes, account_ids, customer_ids):
+            for _ in range(self.transactions_per_customer):
+                sens = 'DEPOSIT' if rng.random() < 0.7 else 'WITHDRAWAL'
+                deposit_at = self._timestamp()
+                transaction_rows.append({
+                    'libelle': 'Versement' if sens == 'DEPOSIT' else 'Retrait',
+                    'code': 'VER' if sens == 'DEPOSIT' else 'RET',
+                    'sens': sens,
+                    'montant': rng.randrange(5000, 500000, 500),
+                    'deposit_date': deposit_at.strftime('%Y-%m-%d %H:%M:%S'),
+                    'deposit_at': deposit_at,
+                    'compte': f'{code}-01',
+                    'client': code
+                })
+            for _ in range(self.orders_per_customer):
+                items = rng.sample(reward_rows, min(len(reward_rows), rng.randint(1, 3)))
+                quantities = [rng.randint(1, 2) for _ in items]
+                order_rows.append({
+                    'user_id': account_id,
+                    'customer_id': customer_id,
+                    'amount': sum(jeton * quantity for (_, jeton), quantity in zip(items, quantities)),
+                    'status': rng.choice(ORDER_STATUSES),
+                    'contact': 'N/A',
+                    'created_at': self._timestamp()
+                })
+                order_item_choices.append([(reward_id, quantity) for (reward_id, _), quantity in zip(items, quantities)])
+            for n in range(self.notifications_per_customer):
+                created_at = self._timestamp()
+                is_read = rng.random() < 0.7
+                notification_rows.append({
+                    'user_id': account_id,
+                    'message': f'Notification synthétique {n + 1}',
+                    'created_at': created_at,
+                    'is_read': is_read,
+                    'read_at': created_at if is_read else None
+                })
+            for _ in range(self.page_visits_per_customer):
+                route, path = rng.choice(VISITED_ROUTES)
+                visit_rows.append({
+                    'path': path.format(code=code),
+                    'route': route,
+                    'user_id': account_id,
+                    'timestamp': self._timestamp()
+                })
+            for reward_id, _ in rng.sample(reward_rows, min(len(reward_rows), self.cart_items_per_customer)):
+                cart_rows.append({
+                    'user_id': account_id,
+                    'reward_id': reward_id,
+                    'quantity': rng.randint(1, 3),
+                    'added_at': self._timestamp()
+                })
+            for survey_id, option_ids in options_by_survey.items():
+                if rng.random() < self.survey_response_rate:
+                    response_rows.append({
+                        'survey_id': survey_id,
+                        'user_id': account_id,
+                        'customer_id': customer_id,
+                        'option_id': rng.choice(option_ids),
+                        'submitted_at': self._timestamp()
+                    })
+
+        order_ids = _insert(Order.__table__, order_rows, returning='id')
+        item_rows = [{'order_id': order_id, 'reward_id': reward_id, 'quantity': quantity}
+                     for order_id, items in zip(order_ids, order_item_choices)
+                     for reward_id, quantity in items]
+        for table, rows in ((Transaction.__table__, transaction_rows), (order_items, item_rows),
+                            (PageVisit.__table__, visit_rows),
+                            (CartItem.__table__, cart_rows), (SurveyResponse.__table__, response_rows)):
+            _insert(table, rows)
+            self._count(table.name, rows)
+        # Compteurs de non-lues mis à jour avec les notifications
+        # Pas d'événement SSE par notification générée (un NOTIFY par lot de 7,5 Ko avec le backend postgres)
+        insert_notifications(notification_rows, publish=False)
+        self._count('lot_notifications', notification_rows)
+        self._count('lot_orders', order_rows)